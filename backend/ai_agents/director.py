@@ -13,11 +13,21 @@ Include:
 * raggruppamento skill avanzato in design_team_structure.
 """
 
+import asyncio
+import copy
+import functools
 import logging
 import os
+import random
 import re
 import json
-from typing import List, Dict, Any, Optional, Union, Set  # Per type hints compatibili
+import time
+import hashlib
+import shelve
+from collections import OrderedDict
+from contextlib import AsyncExitStack
+from types import MappingProxyType, SimpleNamespace
+from typing import Callable, List, Dict, Any, FrozenSet, Literal, Mapping, Optional, TypedDict, Union, Set, Tuple  # Per type hints compatibili
 from uuid import UUID
 from enum import Enum
 
@@ -136,28 +146,127 @@ except Exception:  # pragma: no cover - fallback if wrong module on path
         AgentSeniority,
         DirectorHandoffProposal,
     )  # type: ignore
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError
 
 # ---------------------------------------------------------------------------
-# Module‑level constants (single source of truth)
+# Fast JSON (orjson if installed, stdlib otherwise)
 # ---------------------------------------------------------------------------
-MAX_TEAM_SIZE: int = 6  # hard cap per workspace
-RATES_PER_DAY: Dict[str, int] = {  # EUR/giorno
-    AgentSeniority.JUNIOR.value: 8,
-    AgentSeniority.SENIOR.value: 15,
-    AgentSeniority.EXPERT.value: 25,
-}
-COST_PER_MONTH: Dict[str, int] = {k: v * 30 for k, v in RATES_PER_DAY.items()}
-MODEL_BY_SENIORITY: Dict[str, str] = {
-    AgentSeniority.JUNIOR.value: "gpt-4.1-nano",
-    AgentSeniority.SENIOR.value: "gpt-4.1-mini",
-    AgentSeniority.EXPERT.value: "gpt-4.1",
-}
+try:
+    import orjson
+
+    ORJSON_AVAILABLE = True
+
+    def _loads(data: Union[str, bytes]) -> Any:
+        return orjson.loads(data)
+
+    def _dumps(obj: Any) -> str:
+        return orjson.dumps(obj).decode()
+
+except ImportError:  # pragma: no cover - stdlib fallback
+    ORJSON_AVAILABLE = False
+
+    def _loads(data: Union[str, bytes]) -> Any:
+        return json.loads(data)
+
+    def _dumps(obj: Any) -> str:
+        return json.dumps(obj)
+
+# ---------------------------------------------------------------------------
+# Module‑level constants (single source of truth) and pure team-design helpers
+# ---------------------------------------------------------------------------
+from .director_helpers import (
+    COST_PER_MONTH,
+    MAX_TEAM_SIZE,
+    MODEL_BY_SENIORITY,
+    RATES_PER_DAY,
+    _EXPERT,
+    _JUNIOR,
+    _PERSONA_FIRST_NAMES,
+    _PERSONA_LAST_NAMES,
+    _SENIOR,
+    _budget_team_size,
+    _calculate_optimal_team_size,
+    _extract_budget,
+    _generate_personality_fallback,
+    _get_model_for_design,
+    _get_tools_for_design,
+    _pick_seniority,
+    _skills_overlap,
+)
+
 # 🤖 AI-DRIVEN UNIVERSAL SKILL CATEGORIZATION
 # No longer using hard-coded domain mappings - replaced with AI-driven analysis
 AI_AVAILABLE = bool(os.getenv("OPENAI_API_KEY"))
 
 
+@functools.lru_cache(maxsize=32)
+def _cached_model_settings(temperature: float, **kwargs: Any) -> ModelSettings:
+    """Shared ModelSettings per knob combination; treat the result as read-only."""
+    return create_model_settings(temperature=temperature, **kwargs)
+
+
+# Precompiled patterns used on every tool call
+_TEAM_SIZE_RE = re.compile(r"(\d+)\s*agent[si]?", re.IGNORECASE)
+_JSON_START_RE = re.compile(r"[{\[]")
+_NON_WORD_RE = re.compile(r"\W+")
+_ROLE_TOKEN_RE = re.compile(r"[a-z]+")
+# Constraint keys forwarded to the analyzer (budget/feedback are sent separately)
+_ANALYZER_CONSTRAINT_KEYS: Tuple[str, ...] = ("required_skills", "expertise_areas", "raw_constraints")
+# Matches the required_skills array once its closing bracket has streamed in
+_STREAMED_SKILLS_RE = re.compile(r'"required_skills"\s*:\s*(\[[^\]]*\])')
+
+# Keyword patterns for grouping skills when no LLM is available; the first
+# three categories are treated as high importance
+UNIVERSAL_SKILL_PATTERNS: Dict[str, Tuple[str, ...]] = {
+    "coordination_activities": ("manage", "coordina", "plan", "lead", "organiz", "oversight", "stakeholder"),
+    "technical_implementation": ("develop", "engineer", "implement", "build", "code", "automat", "integrat", "technical"),
+    "analytical_tasks": ("analy", "research", "data", "metric", "insight", "forecast", "audit"),
+    "creative_work": ("design", "content", "creative", "writ", "copy", "brand", "visual"),
+    "communication": ("communicat", "outreach", "social", "email", "present", "relation", "support"),
+}
+# One alternation per category: a single C-level scan instead of a Python any() loop
+_SKILL_PATTERN_RES: Dict[str, "re.Pattern[str]"] = {
+    name: re.compile("|".join(map(re.escape, keywords)))
+    for name, keywords in UNIVERSAL_SKILL_PATTERNS.items()
+}
+# Management skills are left to the Project Manager when one is on the team
+_MGMT_SKILL_RE = re.compile(
+    "|".join(("manage", "coordina", "plan", "lead", "oversight", "organize", "coordinate")),
+    re.IGNORECASE,
+)
+
+_JSON_DECODER = json.JSONDecoder()
+
+
+def _extract_json(text: Any, openers: str = "{[", required_key: Optional[str] = None) -> Any:
+    """
+    First JSON value embedded in ``text`` (bare, fenced in ```json or wrapped in prose).
+
+    One forward scan with ``raw_decode`` from each candidate opener: no failed
+    full parse followed by regex backtracking and a second parse. ``openers``
+    restricts the expected top-level type ("{" objects, "[" arrays); with
+    ``required_key`` only objects containing that key are accepted, so a
+    stray example object in the prose doesn't win over the real payload.
+    Returns None when nothing decodes.
+    """
+    if not isinstance(text, str):
+        return None
+    if "\ufffd" in text:
+        # Replacement chars from mis-decoded streams break otherwise valid JSON
+        text = text.replace("\ufffd", "")
+    for match in _JSON_START_RE.finditer(text):
+        if match.group() not in openers:
+            continue
+        try:
+            value, _ = _JSON_DECODER.raw_decode(text, match.start())
+        except json.JSONDecodeError:
+            continue
+        if required_key is None or (isinstance(value, dict) and required_key in value):
+            return value
+    return None
+
+
+
 # ---------------------------------------------------------------------------
 # Typed helper for structured output (già presente, verificata)
 # ---------------------------------------------------------------------------
@@ -168,76 +277,130 @@ class ProjectAnalysisOutput(BaseModel):
     rationale: str
 
 
-# ---------------------------------------------------------------------------
-# DirectorAgent definition
-# ---------------------------------------------------------------------------
-class DirectorAgent:
-    """Crea proposte di team di AI‑agents evitando delega circolare."""
+class AgentPersonality(BaseModel):
+    personality_traits: List[str]
+    communication_style: str
+    soft_skills: List[Dict[str, str]]
+    hard_skills: List[Dict[str, str]]
+    background_story: str
 
-    def __init__(self):
-        if not os.getenv("OPENAI_API_KEY") and SDK_AVAILABLE:
-            logger.warning(
-                "OPENAI_API_KEY non impostata – i tools LLM potrebbero fallire."
-            )
-        self.max_team_size: int = MAX_TEAM_SIZE
-        self.min_team_size: int = 1
-        self.max_coordinator_ratio: float = 0.4
 
-    @staticmethod
-    @function_tool
-    async def analyze_project_requirements_llm(goal: str, constraints_json: str) -> str:
-        """Restituisce JSON con skill, aree di expertise, team raccomandato. 'constraints_json' DEVE essere una stringa JSON valida."""
-        logger.info("Director Tool: analyze_project_requirements_llm invoked")
-        try:
-            constraints_dict: Dict[str, Any] = {}
-            try:
-                constraints_dict = json.loads(constraints_json)
-            except json.JSONDecodeError:
-                logger.warning(
-                    f"constraints_json non era un JSON valido: {constraints_json[:100]}. Trattato come testo grezzo."
-                )
-                constraints_dict = {
-                    "raw_constraints": constraints_json
-                }  # Fallback se non è JSON
-
-            budget = (
-                constraints_dict.get("max_amount")
-                or constraints_dict.get("max_cost")  # Support both field names
-                or constraints_dict.get("budget", {}).get("max_amount")
-                or constraints_dict.get("budget", {}).get("max_cost")
-                or constraints_dict.get("budget_constraint", {}).get("max_amount")
-                or constraints_dict.get("budget_constraint", {}).get("max_cost")
-                or 0
-            )
-            if not isinstance(budget, (int, float)):
-                budget = 0  # Ensure budget is numeric
-            
-            # Extract user feedback for consideration in team sizing
-            user_feedback = constraints_dict.get("user_feedback", "")
-            
-            logger.info(f"🎯 Analyzing requirements with budget: {budget} EUR, user_feedback: '{user_feedback}'")
+class SkillGroup(BaseModel):
+    category: str
+    skills: List[str]
+    importance: str = "medium"
+    rationale: Optional[str] = None
 
-            # Parse user feedback for specific team size requests
-            user_requested_size = None
-            if user_feedback:
-                # Look for numeric requests in user feedback
-                import re
-                size_matches = re.findall(r'(\d+)\s*agent[si]?', user_feedback.lower())
-                if size_matches:
-                    try:
-                        user_requested_size = int(size_matches[0])
-                        logger.info(f"🎯 User requested team size: {user_requested_size} agents")
-                    except ValueError:
-                        pass
-            
-            instruction = f"""You are a strategic project analyst AI.
-Project Goal: \"{goal}\"
-Constraints (from JSON string): {json.dumps(constraints_dict)}
-Budget (EUR): {budget or 'Not specified'}
-User Feedback: {user_feedback or 'None'}
+
+class _SkillGroupingOutput(BaseModel):
+    groups: List[SkillGroup]
+
+
+# Strict structured output for the Director proposal. Strict JSON schemas
+# cannot express free-form dicts, so costs per agent are a list here and
+# ``to_proposal_dict`` rebuilds the AITeamProposal shape
+class _ProposalSkill(BaseModel):
+    name: str
+    level: Literal["beginner", "intermediate", "expert"]
+
+
+class _ProposalTool(BaseModel):
+    type: str
+    name: str
+    description: str
+
+
+class _ProposalLLMConfig(BaseModel):
+    model: str
+    temperature: float
+
+
+class _ProposalAgent(BaseModel):
+    name: str
+    role: str
+    seniority: Literal["junior", "senior", "expert"]
+    description: str
+    system_prompt: str
+    llm_config: _ProposalLLMConfig
+    tools: List[_ProposalTool]
+    first_name: str
+    last_name: str
+    personality_traits: List[
+        Literal[
+            "analytical", "creative", "detail-oriented", "proactive", "collaborative",
+            "decisive", "innovative", "methodical", "adaptable", "diplomatic",
+        ]
+    ]
+    communication_style: Literal[
+        "formal", "casual", "technical", "concise", "detailed", "empathetic", "assertive"
+    ]
+    hard_skills: List[_ProposalSkill]
+    soft_skills: List[_ProposalSkill]
+    background_story: str
+
+
+class _ProposalHandoff(BaseModel):
+    from_agent: str
+    to_agents: List[str]
+    description: str
+
+
+class _ProposalAgentCost(BaseModel):
+    agent: str
+    cost: float
+
+
+class _ProposalCost(BaseModel):
+    total_estimated_cost: float
+    currency: str
+    breakdown_by_agent: List[_ProposalAgentCost]
+
+
+class TeamProposalOutput(BaseModel):
+    agents: List[_ProposalAgent]
+    handoffs: List[_ProposalHandoff]
+    estimated_cost: _ProposalCost
+    rationale: str
+
+    def to_proposal_dict(self) -> Dict[str, Any]:
+        """Same dict layout the legacy JSON-text path produces."""
+        return {
+            "agents": [a.model_dump() for a in self.agents],
+            "handoffs": [
+                {"from": h.from_agent, "to": h.to_agents, "description": h.description}
+                for h in self.handoffs
+            ],
+            "estimated_cost": {
+                "total_estimated_cost": self.estimated_cost.total_estimated_cost,
+                "currency": self.estimated_cost.currency,
+                "breakdown_by_agent": {
+                    c.agent: c.cost for c in self.estimated_cost.breakdown_by_agent
+                },
+            },
+            "rationale": self.rationale,
+        }
+
+
+class _AgentCostSpec(BaseModel):
+    name: str
+    seniority: Union[AgentSeniority, str]
+
+
+# Built once: constructing a TypeAdapter compiles a validator
+_AGENT_COST_SPECS_ADAPTER = TypeAdapter(List[_AgentCostSpec])
+_AGENT_CREATE_LIST_ADAPTER = TypeAdapter(List[AgentCreate])
+_HANDOFF_PROPOSAL_LIST_ADAPTER = TypeAdapter(List[DirectorHandoffProposal])
+_DEFAULT_DAILY_RATE: int = RATES_PER_DAY[_JUNIOR]
+
+
+# ---------------------------------------------------------------------------
+# Static LLM instructions (stable prefix, no per-call interpolation)
+# ---------------------------------------------------------------------------
+STATIC_ANALYZER_RULES: str = f"""You are a strategic project analyst AI.
+The user message is a JSON object with: goal, constraints, budget_eur, user_feedback, user_requested_size (fields that are not set are omitted; no budget_eur means the budget is not specified).
 
 CRITICAL GUIDELINES:
-1. {"PRIORITIZE USER FEEDBACK: If user specified a team size preference, strongly consider it." if user_feedback else "Keep team size CONSERVATIVE (1-{MAX_TEAM_SIZE})."}
+1. PRIORITIZE USER FEEDBACK: If user_feedback specifies a team size preference, strongly consider it. Otherwise keep team size CONSERVATIVE (1-{MAX_TEAM_SIZE}).
 2. Focus on ESSENTIAL skills only – avoid redundancy. Combine related skills where possible.
 3. Consider budget strictly - use the FULL budget when appropriate.
 4. Prefer versatile agents when budget is tight.
@@ -246,7 +409,7 @@ CRITICAL GUIDELINES:
 
 TEAM SIZE GUIDELINES:
 - Budget-based sizing (EUR): <1500 ⇒ 1‑2 | 1500‑3000 ⇒ 2‑3 | 3000‑5000 ⇒ 3‑4 | 5000‑8000 ⇒ 4‑5 | >8000 ⇒ up to {MAX_TEAM_SIZE}
-{"- USER PREFERENCE: Consider user requested team size of " + str(user_requested_size) + " agents" if user_requested_size else ""}
+- USER PREFERENCE: If user_requested_size is set, consider that team size
 - ALWAYS justify your team size decision based on budget AND user feedback
 
 SKILL EXTRACTION APPROACH:
@@ -258,46 +421,1149 @@ SKILL EXTRACTION APPROACH:
 
 UNIVERSAL FUNCTIONAL EXAMPLES:
 - Creation: "Content Creation", "Product Development", "Process Design"
-- Analysis: "Data Analysis", "Performance Evaluation", "Research and Investigation"  
+- Analysis: "Data Analysis", "Performance Evaluation", "Research and Investigation"
 - Optimization: "Process Improvement", "Performance Enhancement", "Efficiency Analysis"
 - Strategy: "Strategic Planning", "Framework Development", "Roadmap Creation"
 
-Return *only* valid JSON:
-{{
-  "required_skills": ["Specific Functional Skill 1", "Domain Expertise 2", "Process Skill 3+"],
-  "expertise_areas": ["Primary Domain", "Supporting Area+"],
-  "recommended_team_size": X,
-  "rationale": "Functional explanation of why these skills and team size are optimal"
-}}"""
-
-            analyzer = OpenAIAgent(
-                name="ProjectRequirementsAnalyzer",
-                instructions=instruction,
-                model="gpt-4o-mini",
-                model_settings=create_model_settings(temperature=0.2),
+The rationale explains, functionally, why these skills and team size are optimal."""
+
+STATIC_SKILL_CATEGORIZER_RULES: str = """Group the skills in the user message into 2-5 FUNCTIONAL groups (not business domains):
+skills that work together naturally, balanced (no single-skill groups unless truly unique),
+with universal category names (e.g. "analytical_tasks", "creative_work", "coordination_activities").
+importance: "high" for core execution skills, "medium" for supporting skills; rationale says why they group together."""
+
+STATIC_PERSONALITY_RULES: str = """You are an expert at professional personality analysis. Provide only valid JSON output.
+
+The user message is a JSON object {"roles": [...]} listing professional roles.
+Generate appropriate personality traits for EACH role.
+
+Return a JSON object {"personalities": [...]} with exactly one element per role, in the same order as the input. Each element has:
+- personality_traits: array of 3 relevant traits (e.g., ANALYTICAL, CREATIVE, DECISIVE)
+- communication_style: one of ASSERTIVE, TECHNICAL, DETAILED, COLLABORATIVE
+- soft_skills: array of 2-3 objects with "name" and "level" (EXPERT, ADVANCED, INTERMEDIATE)
+- hard_skills: array of 2-3 objects with "name" and "level" (EXPERT, ADVANCED, INTERMEDIATE)
+- background_story: brief professional background story (1-2 sentences)
+
+Base traits on what would be most effective for each role."""
+
+
+# Proposal model and deadline: the schema (TeamProposalOutput) carries the
+# structure, so the existing low-cost model stays the default; both tunable for A/B runs
+DIRECTOR_MODEL: str = os.getenv("DIRECTOR_MODEL", "gpt-4o-mini")
+DIRECTOR_TIMEOUT_SECONDS: float = float(os.getenv("DIRECTOR_TIMEOUT_SECONDS", "60"))
+# No streamed token for this long means the run is dead: fail fast to the fallback
+DIRECTOR_STREAM_IDLE_SECONDS: float = float(os.getenv("DIRECTOR_STREAM_IDLE_SECONDS", "20"))
+
+# Static core of the Director prompt: per-call data (project, budget, size)
+# travels in the user message, so this prefix is identical on every proposal
+STATIC_DIRECTOR_RULES: str = f"""You are an AI Team Designer. The user message is JSON: project, budget_eur, team_size, budget_target_eur, seniority_mix.
+Design EXACTLY team_size agents for the project.
+
+Match the project domain, e.g.:
+- B2B/lead generation: business researcher, lead generation expert, email marketer, sales copywriter, CRM integrator, market intelligence analyst
+- Social/content: content writer, social media manager, visual designer, community manager, brand strategist
+- Technical: software developer, system architect, DevOps engineer, QA engineer
+- Business analysis: business analyst, strategy consultant, data analyst, market researcher
+
+RULES:
+- 1 senior Project Manager when team_size > 1; follow seniority_mix; spend about budget_target_eur
+- Monthly cost (EUR): junior={COST_PER_MONTH[_JUNIOR]}, senior={COST_PER_MONTH[_SENIOR]}, expert={COST_PER_MONTH[_EXPERT]}
+- llm_config.model: junior={MODEL_BY_SENIORITY[_JUNIOR]}, senior={MODEL_BY_SENIORITY[_SENIOR]}, expert={MODEL_BY_SENIORITY[_EXPERT]}
+- tools ({{type, name, description}}): web_search for senior/expert, file_search for research roles
+- name "NomeCognome" (e.g. "ElenaRossi"), plus first_name/last_name
+- system_prompt: "You are a [role]. [responsibilities]."; costs in EUR"""
+
+STATIC_SKILL_GROUPING_RULES: str = """Group the skills in the user message into 3-6 functional categories (e.g. coordination, analysis, creative, communication, technical, optimization), using only the given skills."""
+
+# Server-side grammar constraint for the semantic grouping call
+_SKILL_GROUPING_RESPONSE_FORMAT: Dict[str, Any] = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "SkillGroups",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "groups": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "category": {"type": "string"},
+                            "skills": {"type": "array", "items": {"type": "string"}},
+                        },
+                        "required": ["category", "skills"],
+                        "additionalProperties": False,
+                    },
+                }
+            },
+            "required": ["groups"],
+            "additionalProperties": False,
+        },
+    },
+}
+
+
+def _director_seniority_mix(budget_eur: float) -> str:
+    """Seniority mix the Director should aim for at this budget."""
+    if budget_eur > 8000:
+        return "2-3 expert, 2-3 senior, rest junior"
+    if budget_eur >= 3000:
+        return "1 expert, mostly senior, 1-2 junior"
+    return "mostly senior, 1 junior"
+
+
+_ANALYZER_AGENT: Optional[Any] = None
+
+
+def _get_analyzer_agent() -> Any:
+    """ProjectRequirementsAnalyzer agent; instructions are static so one instance serves every call."""
+    global _ANALYZER_AGENT
+    if _ANALYZER_AGENT is None:
+        # Structured output: the response is constrained to the
+        # ProjectAnalysisOutput JSON schema, so no format block in the prompt
+        structured_output = {"output_type": ProjectAnalysisOutput} if SDK_AVAILABLE else {}
+        _ANALYZER_AGENT = OpenAIAgent(
+            name="ProjectRequirementsAnalyzer",
+            instructions=STATIC_ANALYZER_RULES,
+            model="gpt-4o-mini",
+            model_settings=_cached_model_settings(0.2),
+            **structured_output,
+        )
+    return _ANALYZER_AGENT
+
+
+_SKILL_CATEGORIZER_AGENT: Optional[Any] = None
+_DIRECTOR_LLM_AGENT: Optional[Any] = None
+
+
+def _get_skill_categorizer_agent() -> Any:
+    """SkillCategorizer agent; the skills travel in the user message, so one instance serves every call."""
+    global _SKILL_CATEGORIZER_AGENT
+    if _SKILL_CATEGORIZER_AGENT is None:
+        # Structured output: groups arrive already validated against the schema
+        structured_output = {"output_type": _SkillGroupingOutput} if SDK_AVAILABLE else {}
+        _SKILL_CATEGORIZER_AGENT = OpenAIAgent(
+            name="SkillCategorizer",
+            instructions=STATIC_SKILL_CATEGORIZER_RULES,
+            model="gpt-4o-mini",
+            model_settings=_cached_model_settings(0.3),
+            **structured_output,
+        )
+    return _SKILL_CATEGORIZER_AGENT
+
+
+def _get_director_llm_agent() -> Any:
+    """DetailedTeamDirectorLLM agent; per-proposal data travels in the user message."""
+    global _DIRECTOR_LLM_AGENT
+    if _DIRECTOR_LLM_AGENT is None:
+        _DIRECTOR_LLM_AGENT = OpenAIAgent(
+            name="DetailedTeamDirectorLLM",
+            instructions=STATIC_DIRECTOR_RULES,
+            model=DIRECTOR_MODEL,  # 💰 COST-OPTIMIZED: schema-constrained mini model
+            model_settings=_cached_model_settings(
+                0.3  # Good balance for creative but consistent teams
+            ),
+            # 🔧 OPTIMIZATION: No tools needed for single-call approach
+            tools=[],
+            # Grammar-constrained JSON: shape and enum values come from the schema
+            **({"output_type": TeamProposalOutput} if SDK_AVAILABLE else {}),
+        )
+    return _DIRECTOR_LLM_AGENT
+
+
+if SDK_AVAILABLE and AI_AVAILABLE:
+    # Built eagerly at import so concurrent first calls never race on construction
+    _get_analyzer_agent()
+    _get_skill_categorizer_agent()
+    _get_director_llm_agent()
+
+
+# ---------------------------------------------------------------------------
+# Project analysis cache (exact match + semantic fallback)
+# ---------------------------------------------------------------------------
+try:
+    import numpy as np  # type: ignore
+
+    NUMPY_AVAILABLE = True
+except ImportError:  # pragma: no cover - pure-Python cosine fallback
+    np = None  # type: ignore
+    NUMPY_AVAILABLE = False
+
+ANALYSIS_CACHE_MAX_SIZE: int = 512
+ANALYSIS_CACHE_TTL_SECONDS: int = int(os.getenv("DIRECTOR_ANALYSIS_CACHE_TTL", "3600"))
+ANALYSIS_SEMANTIC_THRESHOLD: float = float(
+    os.getenv("DIRECTOR_ANALYSIS_SEMANTIC_THRESHOLD", "0.92")
+)
+ANALYSIS_EMBEDDING_MODEL: str = "text-embedding-3-small"
+
+
+def _budget_bucket(budget: float) -> str:
+    """Maps a raw EUR budget onto the sizing ranges used by the analyzer prompt."""
+    if not budget or budget <= 0:
+        return "unspecified"
+    if budget < 1500:
+        return "<1500"
+    if budget < 3000:
+        return "1500-3000"
+    if budget < 5000:
+        return "3000-5000"
+    if budget < 8000:
+        return "5000-8000"
+    return ">8000"
+
+
+# Fallback proposals are deterministic per (goal, budget): cached so repeated
+# timeouts for the same project reuse the already-built team
+FALLBACK_PROPOSAL_CACHE_MAX_SIZE: int = 128
+FALLBACK_PROPOSAL_CACHE_TTL_SECONDS: float = float(os.getenv("DIRECTOR_FALLBACK_CACHE_TTL", "3600"))
+_FALLBACK_PROPOSAL_CACHE: "OrderedDict[Tuple[str, Optional[float]], Tuple[float, Dict[str, Any]]]" = OrderedDict()
+
+
+class _AnalysisCache:
+    """In-process cache for ProjectRequirementsAnalyzer responses.
+
+    Exact hits are keyed on ``(goal_normalized, budget_bucket,
+    user_requested_size, constraints_hash)``. On an exact miss the goal is
+    embedded once and compared (cosine) with cached goals sharing the same
+    budget bucket, size and constraints; a similarity above
+    ``ANALYSIS_SEMANTIC_THRESHOLD`` reuses the stored response.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = ANALYSIS_CACHE_MAX_SIZE,
+        ttl_seconds: int = ANALYSIS_CACHE_TTL_SECONDS,
+        similarity_threshold: float = ANALYSIS_SEMANTIC_THRESHOLD,
+    ):
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        # key -> (stored_at, response_json, goal_embedding | None)
+        self._entries: "OrderedDict[Tuple[Any, ...], Tuple[float, str, Optional[List[float]]]]" = OrderedDict()
+        self.stats: Dict[str, int] = {"exact_hits": 0, "semantic_hits": 0, "misses": 0}
+
+    @staticmethod
+    def make_key(
+        goal: str,
+        budget: float,
+        user_requested_size: Optional[int],
+        constraints_dict: Dict[str, Any],
+    ) -> Tuple[Any, ...]:
+        goal_normalized = " ".join(str(goal).lower().split())
+        skills = constraints_dict.get("required_skills") or []
+        if not isinstance(skills, list):
+            skills = [skills]
+        fingerprint = "|".join(sorted(str(s).strip().lower() for s in skills))
+        fingerprint += "#" + " ".join(str(constraints_dict.get("user_feedback", "")).lower().split())
+        constraints_hash = hashlib.sha1(fingerprint.encode("utf-8")).hexdigest()[:16]
+        return (goal_normalized, _budget_bucket(budget), user_requested_size, constraints_hash)
+
+    def _is_fresh(self, stored_at: float) -> bool:
+        return (time.time() - stored_at) < self.ttl_seconds
+
+    def get(self, key: Tuple[Any, ...]) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if not self._is_fresh(entry[0]):
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        self.stats["exact_hits"] += 1
+        return entry[1]
+
+    async def get_semantic(
+        self, key: Tuple[Any, ...], workspace_id: Optional[Any] = None
+    ) -> Tuple[Optional[str], Optional[List[float]]]:
+        """Returns ``(cached_json, goal_embedding)``; the embedding is reused by ``put``."""
+        if not AI_AVAILABLE:
+            self.stats["misses"] += 1
+            return None, None
+
+        scope = key[1:]
+        candidates = [
+            (k, v)
+            for k, v in self._entries.items()
+            if k[1:] == scope and v[2] is not None and self._is_fresh(v[0])
+        ]
+
+        if not candidates:
+            # Cold cache/new scope: nothing to compare, skip the embedding round trip
+            self.stats["misses"] += 1
+            return None, None
+
+        embedding = await _embed_text(key[0], workspace_id)
+        if embedding is None:
+            self.stats["misses"] += 1
+            return None, None
+
+        best_key, best_score = None, -1.0
+        if NUMPY_AVAILABLE:
+            matrix = np.asarray([v[2] for _, v in candidates], dtype=np.float32)
+            query = np.asarray(embedding, dtype=np.float32)
+            norms = np.linalg.norm(matrix, axis=1) * (np.linalg.norm(query) or 1.0)
+            scores = matrix @ query / np.where(norms == 0, 1.0, norms)
+            idx = int(scores.argmax())
+            best_key, best_score = candidates[idx][0], float(scores[idx])
+        else:
+            q_norm = sum(x * x for x in embedding) ** 0.5 or 1.0
+            for k, v in candidates:
+                vec = v[2]
+                denom = (sum(x * x for x in vec) ** 0.5 or 1.0) * q_norm
+                score = sum(a * b for a, b in zip(vec, embedding)) / denom
+                if score > best_score:
+                    best_key, best_score = k, score
+
+        if best_key is not None and best_score >= self.similarity_threshold:
+            self._entries.move_to_end(best_key)
+            self.stats["semantic_hits"] += 1
+            logger.info(f"🧠 Analysis semantic cache hit (similarity={best_score:.3f})")
+            return self._entries[best_key][1], embedding
+
+        self.stats["misses"] += 1
+        return None, embedding
+
+    def put(
+        self,
+        key: Tuple[Any, ...],
+        response_json: str,
+        embedding: Optional[List[float]] = None,
+    ) -> None:
+        self._entries[key] = (time.time(), response_json, embedding)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+# Quota-tracked clients per workspace (LRU): each keeps its httpx pool warm
+OPENAI_CLIENTS_MAX_SIZE: int = 64
+_openai_clients: "OrderedDict[str, Any]" = OrderedDict()
+
+
+def _get_openai(workspace_id: Optional[Any] = None) -> Any:
+    """
+    Quota-tracked AsyncOpenAI client for the Director's direct API calls,
+    billed to ``workspace_id`` (the factory's "global" tracker when unknown).
+
+    Built through the enhanced factory once per workspace, so the httpx
+    connection pool (keep-alive, TLS sessions) is reused across personality,
+    grouping and embedding calls.
+    """
+    key = str(workspace_id) if workspace_id else "global"
+    client = _openai_clients.get(key)
+    if client is None:
+        from utils.openai_client_factory_enhanced import get_enhanced_async_openai_client
+
+        client = get_enhanced_async_openai_client(workspace_id=key)
+        _openai_clients[key] = client
+        while len(_openai_clients) > OPENAI_CLIENTS_MAX_SIZE:
+            _openai_clients.popitem(last=False)
+    else:
+        _openai_clients.move_to_end(key)
+    return client
+
+
+async def _embed_text(text: str, workspace_id: Optional[Any] = None) -> Optional[List[float]]:
+    """Embeds ``text`` for semantic cache lookups; returns None on any failure."""
+    try:
+        client = _get_openai(workspace_id)
+        response = await client.embeddings.create(
+            model=ANALYSIS_EMBEDDING_MODEL, input=text[:8000]
+        )
+        return list(response.data[0].embedding)
+    except Exception as e:
+        logger.debug(f"Goal embedding for analysis cache failed: {e}")
+        return None
+
+
+_analysis_cache = _AnalysisCache()
+
+
+# ---------------------------------------------------------------------------
+# Speculative team design (runs while the requirements analysis is in flight)
+# ---------------------------------------------------------------------------
+# Functional skills used to draft a team from the budget alone; ordered so the
+# first N are the most broadly useful for an N-agent team.
+SPECULATIVE_SKILLS: Tuple[str, ...] = (
+    "project_management",
+    "research",
+    "strategy",
+    "content_creation",
+    "data_analysis",
+    "quality_assurance",
+)
+# Minimum Jaccard overlap between analysed and speculative skills to keep the draft
+SPECULATIVE_MIN_OVERLAP: float = float(os.getenv("DIRECTOR_SPECULATIVE_MIN_OVERLAP", "0.6"))
+
+
+# ---------------------------------------------------------------------------
+# Per-role personality cache (names are re-rolled on every hit)
+# ---------------------------------------------------------------------------
+PERSONALITY_CACHE_MAX_SIZE: int = 2048
+# Roles per personality request; uncached roles are split into concurrent chunks
+PERSONALITY_BATCH_SIZE: int = max(1, int(os.getenv("DIRECTOR_PERSONALITY_BATCH_SIZE", "2")))
+PERSONALITY_MODEL: str = "gpt-4o-mini"
+# Optional on-disk second level (shelve file path) so traits survive restarts
+PERSONALITY_DISK_CACHE_PATH: Optional[str] = os.getenv("DIRECTOR_PERSONALITY_CACHE_PATH") or None
+
+_PERSONALITY_CACHE: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+# One lock per role key so concurrent misses for the same role share one LLM call
+_PERSONALITY_LOCKS: Dict[str, asyncio.Lock] = {}
+_personality_shelf: Optional[shelve.Shelf] = None
+
+
+# Keys copied from a generated personality onto each team member
+_PERSONALITY_FIELDS: Tuple[str, ...] = (
+    "first_name",
+    "last_name",
+    "personality_traits",
+    "communication_style",
+    "hard_skills",
+    "soft_skills",
+    "background_story",
+)
+
+
+def _personality_cache_key(role_str: str) -> str:
+    return _NON_WORD_RE.sub("_", role_str.strip().lower())
+
+
+def _get_personality_shelf() -> Optional[shelve.Shelf]:
+    """Lazily opened disk cache; disabled (None) when no path is configured or it can't be opened."""
+    global _personality_shelf, PERSONALITY_DISK_CACHE_PATH
+    if _personality_shelf is None and PERSONALITY_DISK_CACHE_PATH:
+        try:
+            _personality_shelf = shelve.open(PERSONALITY_DISK_CACHE_PATH)
+        except Exception as e:
+            logger.warning(f"Personality disk cache unavailable ({PERSONALITY_DISK_CACHE_PATH}): {e}")
+            PERSONALITY_DISK_CACHE_PATH = None
+    return _personality_shelf
+
+
+def _disk_personality_key(key: str) -> str:
+    # Model in the key: a model upgrade naturally invalidates old entries
+    return f"{PERSONALITY_MODEL}:{key}"
+
+
+def _cached_personality(key: str) -> Optional[Dict[str, Any]]:
+    """Returns a copy of the cached personality with fresh names, or None."""
+    base = _PERSONALITY_CACHE.get(key)
+    if base is None:
+        shelf = _get_personality_shelf()
+        if shelf is None:
+            return None
+        try:
+            base = shelf.get(_disk_personality_key(key))
+        except Exception as e:
+            logger.debug(f"Personality disk cache read failed: {e}")
+            base = None
+        if base is None:
+            return None
+        _PERSONALITY_CACHE[key] = base
+    _PERSONALITY_CACHE.move_to_end(key)
+    personality = copy.deepcopy(base)
+    personality["first_name"] = random.choice(_PERSONA_FIRST_NAMES)
+    personality["last_name"] = random.choice(_PERSONA_LAST_NAMES)
+    return personality
+
+
+def _store_personality(key: str, personality: Dict[str, Any]) -> None:
+    _PERSONALITY_CACHE[key] = {
+        k: copy.deepcopy(v) for k, v in personality.items() if k not in ("first_name", "last_name")
+    }
+    _PERSONALITY_CACHE.move_to_end(key)
+    while len(_PERSONALITY_CACHE) > PERSONALITY_CACHE_MAX_SIZE:
+        _PERSONALITY_CACHE.popitem(last=False)
+    shelf = _get_personality_shelf()
+    if shelf is not None:
+        try:
+            shelf[_disk_personality_key(key)] = _PERSONALITY_CACHE[key]
+            shelf.sync()
+        except Exception as e:
+            logger.debug(f"Personality disk cache write failed: {e}")
+
+
+# ---------------------------------------------------------------------------
+# Skill grouping cache (feedback iterations re-group the same skill set)
+# ---------------------------------------------------------------------------
+SKILL_GROUP_CACHE_MAX_SIZE: int = 512
+SKILL_GROUP_CACHE_TTL_SECONDS: float = float(os.getenv("DIRECTOR_SKILL_GROUP_CACHE_TTL", "3600"))
+
+_SKILL_GROUP_CACHE: "OrderedDict[FrozenSet[str], Tuple[float, List[Dict[str, Any]]]]" = OrderedDict()
+
+
+def _skill_group_cache_key(skills_list: List[str]) -> FrozenSet[str]:
+    return frozenset(s.strip().lower() for s in skills_list)
+
+
+def _cached_skill_groups(skills_list: List[str]) -> Optional[List[Dict[str, Any]]]:
+    key = _skill_group_cache_key(skills_list)
+    entry = _SKILL_GROUP_CACHE.get(key)
+    if entry is None:
+        return None
+    stored_at, groups = entry
+    if time.monotonic() - stored_at > SKILL_GROUP_CACHE_TTL_SECONDS:
+        del _SKILL_GROUP_CACHE[key]
+        return None
+    _SKILL_GROUP_CACHE.move_to_end(key)
+    return copy.deepcopy(groups)
+
+
+def _store_skill_groups(skills_list: List[str], groups: List[Dict[str, Any]]) -> None:
+    """Only AI groupings are stored: pattern fallbacks are cheap and shouldn't pin a transient failure."""
+    key = _skill_group_cache_key(skills_list)
+    _SKILL_GROUP_CACHE[key] = (time.monotonic(), copy.deepcopy(groups))
+    _SKILL_GROUP_CACHE.move_to_end(key)
+    while len(_SKILL_GROUP_CACHE) > SKILL_GROUP_CACHE_MAX_SIZE:
+        _SKILL_GROUP_CACHE.popitem(last=False)
+
+
+# ---------------------------------------------------------------------------
+# Team design helpers (used by _design_team_structure)
+# ---------------------------------------------------------------------------
+_PM_DESCRIPTION: str = (
+    "Oversees project execution, coordinates team, manages communication and ensures goal alignment."
+)
+
+_PM_SYSTEM_PROMPT: str = """You are a Project Manager. Your primary goal is to lead the team to successfully complete the project by ensuring concrete deliverables are produced.
+
+🎯 DELIVERABLE-FIRST MANAGEMENT:
+1. **FINAL ARTIFACTS FOCUS**: Your success is measured by concrete deliverables (reports, lists, documents, code), not by task organization.
+2. **NO TASK DECOMPOSITION**: Do not break goals into sub-tasks. Instead, assign complete work packages that produce finished outputs.
+3. **ENABLE DIRECT EXECUTION**: Provide specialists with all context, resources, and authority needed to complete work in one step.
+4. **CONCRETE TASK ASSIGNMENT**: Instead of "Research target market," assign "Produce a target market analysis document with demographics, competitors, and opportunities."
+5. **MANAGE OUTPUTS, NOT PROCESSES**: Focus on what gets delivered, not how it gets done.
+
+EXAMPLES:
+❌ Bad: "Create sub-tasks: 1) Research, 2) Analyze, 3) Document"  
+✅ Good: "Produce complete competitive analysis with 10 competitors, pricing, strengths/weaknesses, and recommendations"
+
+Your role: Remove barriers so specialists produce final, substantial deliverables directly."""
+
+# str.format placeholders: {role}, {skills}
+_SPECIALIST_PROMPT_TEMPLATE: str = """You are a {role}. Your expertise covers: {skills}.
+
+🎯 EXECUTION-FIRST PRINCIPLES:
+1. PRODUCE CONCRETE DELIVERABLES: Create actual content, data, documents, or code - not plans or todo lists.
+2. NO SUB-TASK CREATION: If asked to "research competitors," provide the actual competitor list with details, not a research plan.
+3. SINGLE-STEP COMPLETION: Finish tasks completely in one execution cycle.
+4. REAL DATA OVER TEMPLATES: Generate actual emails, contacts, reports - not "template for emails" or "example reports."
+5. ESCALATE ONLY FOR BLOCKERS: Only escalate if you need external resources or permissions, not for task breakdown.
+
+EXAMPLES:
+❌ Bad: "Here's a plan to research target audience: 1. Identify demographics 2. Analyze preferences..."
+✅ Good: "Target Audience: Age 25-40, Income €40K-€80K, Location: Milan/Rome, Interests: Tech/Sustainability..."
+
+Execute tasks directly and provide substantial, actionable results."""
+
+
+@functools.lru_cache(maxsize=256)
+def _specialist_prompt(role: str, skills: Tuple[str, ...]) -> str:
+    """Specialist system prompt, memoized per (role, skills): pass skills as a tuple."""
+    return _SPECIALIST_PROMPT_TEMPLATE.format(role=role, skills=", ".join(skills))
+
+# Keys shared by every designed member; personality fields are added at the end
+_AGENT_BASE_TEMPLATE: Dict[str, Any] = {
+    "name": "",
+    "role": "",
+    "seniority": _JUNIOR,
+    "description": "",
+    "system_prompt": "",
+    "llm_config": None,
+    "tools": None,
+}
+
+
+def _new_team_member(
+    name: str,
+    role: str,
+    seniority: str,
+    description: str,
+    system_prompt: str,
+    temperature: float,
+    tools_role: Optional[str] = None,
+) -> Dict[str, Any]:
+    agent = _AGENT_BASE_TEMPLATE.copy()
+    agent.update(
+        name=name,
+        role=role,
+        seniority=seniority,
+        description=description,
+        system_prompt=system_prompt,
+        llm_config={"model": _get_model_for_design(seniority), "temperature": temperature},
+        tools=_get_tools_for_design(tools_role or role, seniority),
+    )
+    return agent
+
+
+_PERSONALITY_SKILL_SCHEMA: Dict[str, Any] = {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "properties": {"name": {"type": "string"}, "level": {"type": "string"}},
+        "required": ["name", "level"],
+        "additionalProperties": False,
+    },
+}
+
+# Server-side grammar constraint for personality batches (one element per role)
+_PERSONALITY_RESPONSE_FORMAT: Dict[str, Any] = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "Personalities",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "personalities": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "personality_traits": {"type": "array", "items": {"type": "string"}},
+                            "communication_style": {"type": "string"},
+                            "soft_skills": _PERSONALITY_SKILL_SCHEMA,
+                            "hard_skills": _PERSONALITY_SKILL_SCHEMA,
+                            "background_story": {"type": "string"},
+                        },
+                        "required": [
+                            "personality_traits",
+                            "communication_style",
+                            "soft_skills",
+                            "hard_skills",
+                            "background_story",
+                        ],
+                        "additionalProperties": False,
+                    },
+                }
+            },
+            "required": ["personalities"],
+            "additionalProperties": False,
+        },
+    },
+}
+
+
+async def _request_personalities(
+    miss_roles: List[str], workspace_id: Optional[Any] = None
+) -> List[Dict[str, Any]]:
+    """One schema-constrained call generating personalities for ``miss_roles`` (raises on failure)."""
+    response = await _get_openai(workspace_id).chat.completions.create(
+        model=PERSONALITY_MODEL,
+        messages=[
+            {"role": "system", "content": STATIC_PERSONALITY_RULES},
+            {"role": "user", "content": _dumps({"roles": miss_roles})},
+        ],
+        response_format=_PERSONALITY_RESPONSE_FORMAT,
+        temperature=0.3,
+        max_tokens=250 * len(miss_roles),
+    )
+    payload = _loads(response.choices[0].message.content)
+    generated = [
+        AgentPersonality.model_validate(p).model_dump()
+        for p in payload.get("personalities", [])
+    ]
+    if len(generated) != len(miss_roles):
+        logger.warning(
+            f"Batch personality generation returned {len(generated)} items for {len(miss_roles)} roles"
+        )
+    return generated
+
+
+async def _generate_personalities_batch(
+    roles: List[str], workspace_id: Optional[Any] = None
+) -> List[Dict[str, Any]]:
+    """🤖 AI-DRIVEN: Personalities for all roles, in input order (uncached roles fetched concurrently)"""
+    if not roles:
+        return []
+    if not AI_AVAILABLE:
+        return [_generate_personality_fallback(r) for r in roles]
+
+    results: List[Optional[Dict[str, Any]]] = [None] * len(roles)
+    # ⚡ CACHE: same functional role → reuse traits, only re-roll names
+    misses: Dict[str, List[int]] = {}
+    for i, role_str in enumerate(roles):
+        key = _personality_cache_key(role_str)
+        cached = _cached_personality(key)
+        if cached is not None:
+            results[i] = cached
+        else:
+            misses.setdefault(key, []).append(i)
+
+    if misses:
+        miss_keys = list(misses)
+        try:
+            # Per-key locks (sorted to avoid deadlocks) coalesce concurrent misses
+            async with AsyncExitStack() as stack:
+                for key in sorted(misses):
+                    await stack.enter_async_context(
+                        _PERSONALITY_LOCKS.setdefault(key, asyncio.Lock())
+                    )
+                for key in list(misses):
+                    if key in _PERSONALITY_CACHE:
+                        for i in misses.pop(key):
+                            results[i] = _cached_personality(key)
+
+                if misses:
+                    # ⚡ Independent chunks run concurrently: wall time follows the
+                    # slowest chunk instead of one long N-role completion
+                    pending = list(misses.items())
+                    chunks = [
+                        pending[i:i + PERSONALITY_BATCH_SIZE]
+                        for i in range(0, len(pending), PERSONALITY_BATCH_SIZE)
+                    ]
+                    outcomes = await asyncio.gather(
+                        *(
+                            _request_personalities([roles[idxs[0]] for _, idxs in chunk], workspace_id)
+                            for chunk in chunks
+                        ),
+                        return_exceptions=True,
+                    )
+                    for chunk, outcome in zip(chunks, outcomes):
+                        if isinstance(outcome, BaseException):
+                            # One failed chunk only degrades its own roles to the fallback
+                            logger.warning(f"AI personality generation failed: {outcome}")
+                            continue
+                        for (key, idxs), data in zip(chunk, outcome):
+                            _store_personality(key, {"bio": "", **data})
+                            for i in idxs:
+                                results[i] = _cached_personality(key)
+        finally:
+            # Locks are released: drop them whether generation succeeded, failed
+            # or was cancelled, so failing roles don't accumulate entries
+            for key in miss_keys:
+                _PERSONALITY_LOCKS.pop(key, None)
+
+    return [
+        personality if personality is not None else _generate_personality_fallback(role_str)
+        for personality, role_str in zip(results, roles)
+    ]
+
+
+async def _generate_personality_for_role(
+    role_str: str, workspace_id: Optional[Any] = None
+) -> Dict[str, Any]:
+    """Single-role entry point for non-design callers (shares cache and batching)."""
+    return (await _generate_personalities_batch([role_str], workspace_id))[0]
+
+
+async def _group_skills_for_design(
+    skills_list: List[str],
+    workspace_id: Optional[Any] = None,
+) -> List[Dict[str, Any]]:
+    """
+    🤖 AI-DRIVEN UNIVERSAL SKILL CATEGORIZATION
+    
+    Groups skills semantically without domain-specific assumptions
+    """
+    # ⚡ CACHE: same skill set (any order/case) → reuse the AI grouping
+    cached_groups = _cached_skill_groups(skills_list) if skills_list else None
+    if cached_groups is not None:
+        logger.info(f"⚡ Skill grouping cache hit for {len(skills_list)} skills")
+        return cached_groups
+
+    # Use AI-driven categorization if available
+    if AI_AVAILABLE and len(skills_list) > 0:
+        try:
+            ai_categorized_groups = await _ai_categorize_skills(skills_list)
+            if ai_categorized_groups:
+                logger.info(f"🤖 AI categorized {len(skills_list)} skills into {len(ai_categorized_groups)} groups")
+                _store_skill_groups(skills_list, ai_categorized_groups)
+                return ai_categorized_groups
+        except Exception as e:
+            logger.debug(f"AI skill categorization failed, using fallback: {e}")
+    
+    # Fallback: Universal pattern-based grouping (no domain assumptions)
+    return await _universal_skill_grouping_fallback(skills_list, workspace_id)
+
+
+async def _ai_categorize_skills(skills_list: List[str]) -> List[Dict[str, Any]]:
+    """🤖 AI-driven skill categorization without domain assumptions"""
+    try:
+        skills_str = ', '.join(skills_list)
+
+        result = await Runner.run(
+            _get_skill_categorizer_agent(), f"SKILLS TO CATEGORIZE: {skills_str}"
+        )
+        raw_output = result.final_output
+
+        categorized_groups_validated: List[SkillGroup] = []
+        if isinstance(raw_output, _SkillGroupingOutput):
+            categorized_groups_validated = raw_output.groups
+        else:
+            # Legacy path: text that should contain a JSON array of groups
+            candidate = _extract_json(raw_output, "[")
+            if isinstance(candidate, list):
+                try:
+                    categorized_groups_validated = [SkillGroup.model_validate(g) for g in candidate]
+                except ValidationError as e:
+                    logger.error(f"Could not parse extracted JSON with Pydantic: {e}")
+            else:
+                logger.debug(f"No JSON array in skill categorization output: {str(raw_output)[:200]}")
+
+        # Convert to expected format
+        return [
+            {
+                "domain": group.category,
+                "skills": group.skills,
+                "importance": group.importance,
+            }
+            for group in categorized_groups_validated
+        ]
+
+    except Exception as e:
+        logger.debug(f"AI skill categorization error: {e}")
+    
+    return []
+
+
+async def _universal_skill_grouping_fallback(
+    skills_list: List[str], workspace_id: Optional[Any] = None
+) -> List[Dict[str, Any]]:
+    """
+    🤖 AI-DRIVEN UNIVERSAL FALLBACK: Semantic skill grouping without hard-coded patterns
+    """
+    if not AI_AVAILABLE:
+        # Fallback to simpler grouping if AI unavailable
+        return await _simple_semantic_fallback(skills_list)
+    # AI-driven semantic grouping handles its own errors (falls back internally)
+    return await _ai_driven_skill_grouping(skills_list, workspace_id)
+
+
+async def _ai_driven_skill_grouping(
+    skills_list: List[str], workspace_id: Optional[Any] = None
+) -> List[Dict[str, Any]]:
+    """
+    🤖 AI-DRIVEN: Use AI to semantically group skills into functional categories
+    """
+    try:
+        skills_text = ", ".join(skills_list)
+
+        response = await _get_openai(workspace_id).chat.completions.create(
+            model="gpt-4o-mini",
+            messages=[
+                {"role": "system", "content": STATIC_SKILL_GROUPING_RULES},
+                {"role": "user", "content": f"Skills: {skills_text}"}
+            ],
+            response_format=_SKILL_GROUPING_RESPONSE_FORMAT,
+            temperature=0.1,
+            max_tokens=800
+        )
+
+        # Schema-constrained: always {"groups": [{"category", "skills"}]}
+        skill_groups = _loads(response.choices[0].message.content)["groups"]
+
+        # Convert to expected format
+        grouped_skills = []
+        for group in skill_groups:
+            if group["skills"]:  # Only add non-empty categories
+                grouped_skills.append({
+                    "domain": group["category"],
+                    "skills": group["skills"],
+                    "importance": "medium",
+                })
+        
+        logger.info(f"✅ AI-driven skill grouping created {len(grouped_skills)} categories")
+        if grouped_skills:
+            _store_skill_groups(skills_list, grouped_skills)
+        return grouped_skills
+        
+    except Exception as e:
+        logger.warning(f"AI skill grouping failed: {e}")
+        # Fall back to simple approach
+        return await _simple_semantic_fallback(skills_list)
+
+
+async def _simple_semantic_fallback(skills_list: List[str]) -> List[Dict[str, Any]]:
+    """
+    🔄 SIMPLE FALLBACK: Basic grouping when AI is unavailable
+    """
+    # Group skills by pattern matching
+    s_groups: Dict[str, List[str]] = {pattern: [] for pattern in UNIVERSAL_SKILL_PATTERNS}
+    s_groups["specialized_tasks"] = []  # For unmatched skills
+    
+    # Case-insensitive dedup in one C-level pass (insertion order preserved)
+    unique_skills = dict(zip(map(str.lower, skills_list), skills_list))
+    for normalized_skill, skill_item in unique_skills.items():
+        assigned = False
+        for pattern_name, pattern_re in _SKILL_PATTERN_RES.items():
+            if pattern_re.search(normalized_skill):
+                s_groups[pattern_name].append(skill_item)
+                assigned = True
+                break
+        
+        if not assigned:
+            s_groups["specialized_tasks"].append(skill_item)
+    
+    # Convert to expected format
+    final_skill_groups: List[Dict[str, Any]] = []
+    for pattern_name, skills_in_group in s_groups.items():
+        if skills_in_group:
+            importance = "high" if pattern_name in ["coordination_activities", "technical_implementation", "analytical_tasks"] else "medium"
+            final_skill_groups.append({
+                "domain": pattern_name,
+                "skills": skills_in_group,
+                "importance": importance
+            })
+    
+    return final_skill_groups
+
+
+# ---------------------------------------------------------------------------
+# Tool implementations (plain coroutines; the @function_tool wrappers on
+# DirectorAgent delegate here so the Director can also call them directly)
+# ---------------------------------------------------------------------------
+async def _run_analyzer_streamed(
+    user_msg: str, on_required_skills: Callable[[List[str]], None]
+) -> Any:
+    """
+    Streams the analyzer and calls ``on_required_skills`` as soon as the
+    ``required_skills`` array is complete, while the rationale is still being
+    generated. Returns the run's final output.
+    """
+    from openai.types.responses import ResponseTextDeltaEvent
+
+    streamed = Runner.run_streamed(_get_analyzer_agent(), user_msg)
+    text = ""
+    notified = False
+    async for event in streamed.stream_events():
+        if notified or event.type != "raw_response_event":
+            continue
+        if not isinstance(event.data, ResponseTextDeltaEvent):
+            continue
+        text += event.data.delta
+        match = _STREAMED_SKILLS_RE.search(text)
+        if not match:
+            continue
+        try:
+            skills = _loads(match.group(1))
+        except ValueError:
+            continue  # a ']' inside a skill name: wait for more output
+        notified = True
+        try:
+            on_required_skills(skills)
+        except Exception as e:
+            logger.warning(f"analyze_project: required_skills callback failed: {e}")
+    return streamed.final_output
+
+
+# Strong refs for background stream drains (the loop only keeps weak ones)
+_DIRECTOR_DRAIN_TASKS: Set["asyncio.Task[None]"] = set()
+
+
+async def _drain_director_stream(streamed: Any, events: Any) -> None:
+    """Consumes the rest of a streamed run so the SDK completes it and saves its session."""
+
+    async def _consume() -> None:
+        async for _ in events:
+            pass
+
+    try:
+        await asyncio.wait_for(_consume(), DIRECTOR_TIMEOUT_SECONDS)
+    except Exception as e:
+        logger.warning(f"⚠️ Director stream drain failed, session not saved: {e}")
+        streamed.cancel()
+
+
+async def _run_director_streamed(
+    agent: Any, user_input: str, session: Any = None
+) -> Any:
+    """
+    Streams the Director proposal and returns as soon as the top-level JSON
+    object closes (validated against the agent's output type when it has one),
+    without waiting for the response tail. Raises ``asyncio.TimeoutError``
+    when no event arrives for DIRECTOR_STREAM_IDLE_SECONDS.
+
+    The SDK writes ``session`` only after the final turn, so with a session
+    the tail is drained in the background instead of cancelled.
+    """
+    from openai.types.responses import ResponseTextDeltaEvent
+
+    run_kwargs: Dict[str, Any] = {"session": session} if session else {}
+    streamed = Runner.run_streamed(agent, user_input, **run_kwargs)
+    events = streamed.stream_events().__aiter__()
+    chunks: List[str] = []
+    offset = 0  # characters scanned so far
+    start: Optional[int] = None  # offset of the top-level '{'
+    depth = 0
+    in_string = escaped = False
+    while True:
+        try:
+            event = await asyncio.wait_for(events.__anext__(), DIRECTOR_STREAM_IDLE_SECONDS)
+        except StopAsyncIteration:
+            break
+        except asyncio.TimeoutError:
+            streamed.cancel()
+            raise
+        if event.type != "raw_response_event" or not isinstance(event.data, ResponseTextDeltaEvent):
+            continue
+        delta = event.data.delta
+        chunks.append(delta)
+        closed = False
+        # Running brace depth (string-aware) so we only try to decode once
+        for i, ch in enumerate(delta):
+            if in_string:
+                if escaped:
+                    escaped = False
+                elif ch == "\\":
+                    escaped = True
+                elif ch == '"':
+                    in_string = False
+            elif ch == '"':
+                in_string = start is not None
+            elif ch == "{":
+                if start is None:
+                    start = offset + i
+                depth += 1
+            elif ch == "}" and start is not None:
+                depth -= 1
+                if depth == 0:
+                    closed = True
+                    break
+        offset += len(delta)
+        if not closed:
+            continue
+        try:
+            value, _ = _JSON_DECODER.raw_decode("".join(chunks), start)
+            output_type = getattr(agent, "output_type", None)
+            if isinstance(output_type, type) and issubclass(output_type, BaseModel):
+                value = output_type.model_validate(value)
+        except (json.JSONDecodeError, ValidationError) as e:
+            logger.debug(f"Director stream: early parse failed, waiting for final output: {e}")
+            continue
+        if session is None:
+            streamed.cancel()  # drop the response tail (usage/completion events)
+        else:
+            drain = asyncio.create_task(_drain_director_stream(streamed, events))
+            _DIRECTOR_DRAIN_TASKS.add(drain)
+            drain.add_done_callback(_DIRECTOR_DRAIN_TASKS.discard)
+        return value
+    return streamed.final_output
+
+
+async def _analyze_project_requirements(
+    goal: str,
+    constraints_json: str,
+    on_required_skills: Optional[Callable[[List[str]], None]] = None,
+) -> str:
+    """
+    Body of ``DirectorAgent.analyze_project_requirements_llm``.
+
+    When ``on_required_skills`` is given the analyzer is streamed and the
+    callback fires as soon as the skills are known (LLM path only).
+    """
+    logger.info("Director Tool: analyze_project_requirements_llm invoked")
+    try:
+        constraints_dict: Dict[str, Any] = {}
+        try:
+            constraints_dict = _loads(constraints_json)
+        except json.JSONDecodeError:
+            logger.warning(
+                f"constraints_json non era un JSON valido: {constraints_json[:100]}. Trattato come testo grezzo."
+            )
+            constraints_dict = {
+                "raw_constraints": constraints_json
+            }  # Fallback se non è JSON
+
+        # Shared with propose_team: max_amount/max_cost, top-level or nested
+        budget = _extract_budget(constraints_dict)
+        
+        # Extract user feedback for consideration in team sizing
+        user_feedback = constraints_dict.get("user_feedback", "")
+        
+        logger.info(f"🎯 Analyzing requirements with budget: {budget} EUR, user_feedback: '{user_feedback}'")
+
+        # Parse user feedback for specific team size requests
+        user_requested_size = None
+        if user_feedback:
+            # Look for numeric requests in user feedback
+            size_matches = _TEAM_SIZE_RE.findall(user_feedback)
+            if size_matches:
+                try:
+                    user_requested_size = int(size_matches[0])
+                    logger.info(f"🎯 User requested team size: {user_requested_size} agents")
+                except ValueError:
+                    pass
+
+        # ⚡ Fully specified by the caller (pinned size + explicit skills): the
+        # analyzer's output would be overridden anyway, so skip the LLM call
+        explicit_skills = constraints_dict.get("required_skills")
+        if user_requested_size and user_requested_size >= 1 and explicit_skills and isinstance(explicit_skills, list):
+            logger.info("⚡ analyze_project: user-pinned size and skills, skipping LLM analysis")
+            return _dumps(
+                {
+                    "required_skills": explicit_skills,
+                    "expertise_areas": constraints_dict.get("expertise_areas") or ["general"],
+                    "recommended_team_size": min(user_requested_size, MAX_TEAM_SIZE),
+                    "rationale": "User-specified team configuration.",
+                }
             )
-            result = await Runner.run(
-                analyzer, "Analyze requirements and output structured JSON."
+
+        # 🧠 CACHE: exact match first, then semantic near-miss on the goal
+        cache_key = _analysis_cache.make_key(
+            goal, budget, user_requested_size, constraints_dict
+        )
+        cached_json = _analysis_cache.get(cache_key)
+        goal_embedding: Optional[List[float]] = None
+        if cached_json is None:
+            cached_json, goal_embedding = await _analysis_cache.get_semantic(
+                cache_key, constraints_dict.get("workspace_id")
+            )
+        if cached_json is not None:
+            logger.info("⚡ analyze_project: served from analysis cache")
+            return cached_json
+
+        # Only the per-call data travels in the user message: the rules are a
+        # fixed system prefix so provider-side prompt caching can hit.
+        # Budget and feedback travel as their own fields; only constraint keys
+        # the rules actually use are forwarded, and empty fields are dropped
+        slim_constraints = {
+            k: constraints_dict[k]
+            for k in _ANALYZER_CONSTRAINT_KEYS
+            if constraints_dict.get(k) not in (None, "", [], {})
+        }
+        user_payload: Dict[str, Any] = {
+            "goal": goal,
+            "constraints": slim_constraints,
+            "budget_eur": budget,
+            "user_feedback": user_feedback,
+            "user_requested_size": user_requested_size,
+        }
+        user_msg = _dumps({k: v for k, v in user_payload.items() if v})
+
+        # ⚡ Goal embedding for put() runs alongside the analyzer, not before it
+        embed_task: Optional["asyncio.Task[Optional[List[float]]]"] = None
+        if goal_embedding is None and AI_AVAILABLE:
+            embed_task = asyncio.create_task(
+                _embed_text(cache_key[0], constraints_dict.get("workspace_id"))
             )
-            raw_output = result.final_output
+        try:
+            if on_required_skills is not None and SDK_AVAILABLE:
+                raw_output = await _run_analyzer_streamed(user_msg, on_required_skills)
+            else:
+                result = await Runner.run(_get_analyzer_agent(), user_msg)
+                raw_output = result.final_output
 
             data: Dict[str, Any] = {}
             parsed_ok = False
-            try:
-                # 🤖 PILLAR 2: Use Pydantic for robust, AI-aware JSON validation.
-                data = ProjectAnalysisOutput.model_validate_json(raw_output).model_dump()
+            if isinstance(raw_output, ProjectAnalysisOutput):
+                # Structured output path: already validated against the schema
+                data = raw_output.model_dump()
                 parsed_ok = True
-            except Exception: # Catches both JSONDecodeError and ValidationError
-                match = re.search(
-                    r"```json\s*({[\s\S]*?})\s*```", raw_output, re.DOTALL
-                ) or re.search(
-                    r"({[\s\S]*})", raw_output, re.DOTALL
-                )  # DOTALL per multiline
-                if match:
+            else:
+                # Legacy path (no structured output): text that should contain JSON
+                raw_output = str(raw_output)
+                candidate = _extract_json(raw_output, "{")
+                if isinstance(candidate, dict):
                     try:
-                        data = ProjectAnalysisOutput.model_validate_json(match.group(1)).model_dump()
+                        # 🤖 PILLAR 2: Use Pydantic for robust, AI-aware JSON validation.
+                        data = ProjectAnalysisOutput.model_validate(candidate).model_dump()
                         parsed_ok = True
-                    except Exception as e:
+                    except ValidationError as e:
                         logger.error(
                             f"analyze_project: Could not parse extracted JSON with Pydantic: {e}"
                         )
@@ -330,821 +1596,558 @@ Return *only* valid JSON:
             data.setdefault("expertise_areas", ["general"])
             data.setdefault("rationale", "Analysis completed.")
 
-            return json.dumps(data)
+            response_json = _dumps(data)
+            if parsed_ok:
+                if embed_task is not None:
+                    goal_embedding = await embed_task
+                _analysis_cache.put(cache_key, response_json, goal_embedding)
+            return response_json
+        finally:
+            if embed_task is not None and not embed_task.done():
+                embed_task.cancel()
+
+    except Exception as exc:
+        logger.error(
+            f"analyze_project_requirements_llm failed critically: {exc}",
+            exc_info=True,
+        )
+        return _dumps(
+            {
+                "required_skills": ["critical_fallback_skill"],
+                "expertise_areas": ["error_handling"],
+                "recommended_team_size": 1,
+                "rationale": f"Critical fallback in analysis tool: {exc}",
+            }
+        )
 
-        except Exception as exc:
-            logger.error(
-                f"analyze_project_requirements_llm failed critically: {exc}",
-                exc_info=True,
-            )
-            return json.dumps(
-                {
-                    "required_skills": ["critical_fallback_skill"],
-                    "expertise_areas": ["error_handling"],
-                    "recommended_team_size": 1,
-                    "rationale": f"Critical fallback in analysis tool: {exc}",
-                }
-            )
 
-    @staticmethod
-    @function_tool
-    async def estimate_costs(
-        team_composition_json: str, duration_days: Optional[int] = None
-    ) -> str:
-        """
-        Stima i costi del team.
+async def _estimate_costs(
+    team_composition_json: str, duration_days: Optional[int] = None
+) -> str:
+    """Body of ``DirectorAgent.estimate_costs``."""
+    # Gestisci il default internamente
+    actual_duration = (
+        duration_days if duration_days is not None and duration_days > 0 else 30
+    )
+    logger.info(
+        f"Director Tool: estimate_costs invoked for {actual_duration} days."
+    )
 
-        Args:
-            team_composition_json: Stringa JSON contenente la lista di specifiche agenti.
-            duration_days: Durata del progetto in giorni. Se non specificato, usa 30 giorni come default.
+    try:
+        agents_specs = _AGENT_COST_SPECS_ADAPTER.validate_json(team_composition_json)
+
+        # Normalise seniorities once, then a single pass for rates
+        seniorities = [
+            spec.seniority.value if isinstance(spec.seniority, Enum) else str(spec.seniority).lower()
+            for spec in agents_specs
+        ]
+        agent_costs = [
+            RATES_PER_DAY.get(seniority_str, _DEFAULT_DAILY_RATE) * actual_duration
+            for seniority_str in seniorities
+        ]
+        total_cost = float(sum(agent_costs))
+        cost_breakdown: Dict[str, float] = {
+            f"{spec.name} ({seniority_str})": round(agent_cost, 2)
+            for spec, seniority_str, agent_cost in zip(agents_specs, seniorities, agent_costs)
+        }
 
-        Returns:
-            JSON string con i costi stimati e breakdown per agente.
-        """
-        # Gestisci il default internamente
-        actual_duration = (
-            duration_days if duration_days is not None and duration_days > 0 else 30
+        return _dumps(
+            {
+                "total_estimated_cost": round(total_cost, 2),
+                "currency": "EUR",
+                "estimated_duration_days": actual_duration,
+                "breakdown_by_agent": cost_breakdown,
+                "notes": "Cost estimates are based on projected daily rates and duration.",
+            }
         )
-        logger.info(
-            f"Director Tool: estimate_costs invoked for {actual_duration} days."
+    except Exception as exc:
+        logger.error(f"estimate_costs failed: {exc}", exc_info=True)
+        return _dumps(
+            {
+                "error": str(exc),
+                "total_estimated_cost": 0,
+                "notes": "Error during cost estimation.",
+            }
         )
 
-        try:
-            from pydantic import TypeAdapter
 
-            # Define a simple model for validation
-            class AgentSpec(BaseModel):
-                name: str
-                seniority: Union[AgentSeniority, str]
+async def _design_team_structure(
+    required_skills_json: str,
+    budget_total: float,
+    max_agents: Optional[int] = None,
+    user_feedback: str = "",
+    workspace_id: Optional[str] = None,
+) -> str:
+    """Body of ``DirectorAgent.design_team_structure``."""
+    logger.info(
+        f"Director Tool: design_team_structure invoked. Max_agents: {max_agents}, Budget: {budget_total}, User feedback: '{user_feedback}'"
+    )
+    try:
+        from pydantic import TypeAdapter
 
-            AgentSpecListAdapter = TypeAdapter(List[AgentSpec])
-            agents_specs = [spec.model_dump() for spec in AgentSpecListAdapter.validate_json(team_composition_json)]
-            
-            if not isinstance(agents_specs, list):
-                raise ValueError(
-                    "team_composition_json must be a list of agent specifications."
-                )
+        # Use TypeAdapter for validating a list of strings
+        StringListAdapter = TypeAdapter(List[str])
+        try:
+            required_skills = StringListAdapter.validate_json(required_skills_json)
+        except Exception:
+            # Fallback for non-JSON string
+            required_skills = [s.strip() for s in required_skills_json.split(',')]
+            logger.warning("required_skills_json was not a valid JSON list, treated as comma-separated string.")
+
+        # Order-preserving dedup: duplicates only inflate grouping prompts
+        raw_skill_count = len(required_skills)
+        required_skills = list(dict.fromkeys(s.strip() for s in required_skills if s and s.strip()))
+        if len(required_skills) != raw_skill_count:
+            logger.info(
+                f"design_team_structure: dropped {raw_skill_count - len(required_skills)} duplicate/blank skills"
+            )
 
-            total_cost = 0.0
-            cost_breakdown: Dict[str, float] = {}
-            for agent_spec in agents_specs:
-                seniority_val = agent_spec.get("seniority", AgentSeniority.JUNIOR.value)
-                # Handle if seniority_val is an Enum member or string
-                if isinstance(seniority_val, Enum):
-                    seniority_str = seniority_val.value
-                else:
-                    seniority_str = str(seniority_val).lower()
+        # Parse user feedback for team size preference
+        user_requested_size = None
+        if user_feedback:
+            size_matches = _TEAM_SIZE_RE.findall(user_feedback)
+            if size_matches:
+                try:
+                    user_requested_size = int(size_matches[0])
+                    logger.info(f"🎯 User requested {user_requested_size} agents in feedback")
+                except ValueError:
+                    pass
 
-                rate = RATES_PER_DAY.get(
-                    seniority_str, RATES_PER_DAY[AgentSeniority.JUNIOR.value]
-                )
-                agent_cost = rate * actual_duration
-                total_cost += agent_cost
-                agent_name = agent_spec.get("name", "UnnamedAgent")
-                cost_breakdown[f"{agent_name} ({seniority_str})"] = round(agent_cost, 2)
+        # Determine effective_max_agents respecting MAX_TEAM_SIZE
+        eff_max_agents = MAX_TEAM_SIZE
+        if isinstance(max_agents, int) and 0 < max_agents <= MAX_TEAM_SIZE:
+            eff_max_agents = max_agents
 
-            return json.dumps(
-                {
-                    "total_estimated_cost": round(total_cost, 2),
-                    "currency": "EUR",
-                    "estimated_duration_days": actual_duration,
-                    "breakdown_by_agent": cost_breakdown,
-                    "notes": "Cost estimates are based on projected daily rates and duration.",
-                }
-            )
-        except Exception as exc:
-            logger.error(f"estimate_costs failed: {exc}", exc_info=True)
-            return json.dumps(
-                {
-                    "error": str(exc),
-                    "total_estimated_cost": 0,
-                    "notes": "Error during cost estimation.",
-                }
-            )
-
-    @staticmethod
-    @function_tool
-    async def design_team_structure(
-        required_skills_json: str, budget_total: float, max_agents: Optional[int] = None, user_feedback: str = ""
-    ) -> str:
-        """Progetta la struttura del team. 'required_skills_json' è una stringa JSON di una lista di skill."""
+        optimal_team_size = _calculate_optimal_team_size(
+            budget_total, required_skills, user_requested_size
+        )
+        eff_max_agents = min(eff_max_agents, optimal_team_size)
         logger.info(
-            f"Director Tool: design_team_structure invoked. Max_agents: {max_agents}, Budget: {budget_total}, User feedback: '{user_feedback}'"
+            f"Effective max agents: {eff_max_agents} (budget: {budget_total}, skills: {len(required_skills)})"
         )
-        try:
-            from pydantic import TypeAdapter
 
-            # Use TypeAdapter for validating a list of strings
-            StringListAdapter = TypeAdapter(List[str])
-            try:
-                required_skills = StringListAdapter.validate_json(required_skills_json)
-            except Exception:
-                # Fallback for non-JSON string
-                required_skills = [s.strip() for s in required_skills_json.split(',')]
-                logger.warning("required_skills_json was not a valid JSON list, treated as comma-separated string.")
-
-            # Parse user feedback for team size preference
-            user_requested_size = None
-            if user_feedback:
-                import re
-                size_matches = re.findall(r'(\d+)\s*agent[si]?', user_feedback.lower())
-                if size_matches:
-                    try:
-                        user_requested_size = int(size_matches[0])
-                        logger.info(f"🎯 User requested {user_requested_size} agents in feedback")
-                    except ValueError:
-                        pass
-
-            # PRIMA DEFINISCI LE FUNZIONI HELPER (SPOSTATO IN ALTO)
-            def _calculate_optimal_team_size(
-                budget_total: float, required_skills: List[str]
-            ) -> int:
-                """Calcola team size ottimale basato su budget e complessità"""
-
-                # If user explicitly requested a size, prioritize it (if within reasonable bounds)
-                if user_requested_size and 1 <= user_requested_size <= MAX_TEAM_SIZE:
-                    logger.info(f"🎯 Using user-requested team size: {user_requested_size}")
-                    return user_requested_size
-
-                # Budget-based sizing (più aggressivo nell'utilizzare il budget)
-                if budget_total >= 8000:
-                    budget_team_size = 6
-                elif budget_total >= 5000:
-                    budget_team_size = 5
-                elif budget_total >= 3000:
-                    budget_team_size = 4
-                elif budget_total >= 1500:
-                    budget_team_size = 3
-                elif budget_total >= 800:
-                    budget_team_size = 2
-                else:
-                    budget_team_size = 1
-
-                # Skill-based sizing
-                skill_complexity_score = len(required_skills)
-
-                # 🤖 UNIVERSAL COMPLEXITY BOOST: Based on functional patterns, not domains
-                skills_text = " ".join(required_skills).lower()
-                # Boost for functionally complex patterns (universal across domains)
-                if any(
-                    pattern in skills_text
-                    for pattern in [
-                        "strategy", "analysis", "research", "optimization", 
-                        "implementation", "coordination", "management",
-                        "multiple", "complex", "integration", "automation"
-                    ]
-                ):
-                    skill_complexity_score += 2
-                
-                # Additional boost for cross-functional requirements
-                if len(required_skills) > 5:
-                    skill_complexity_score += 1
-
-                skill_team_size = min(6, max(2, skill_complexity_score // 2 + 1))
-
-                # Prendi il massimo tra budget e skill sizing (più generoso)
-                optimal_size = max(budget_team_size, skill_team_size)
-
-                logger.info(
-                    f"Optimal team calculation: budget_size={budget_team_size}, skill_size={skill_team_size}, final={optimal_size}"
-                )
-                return optimal_size
-
-            def _get_model_for_design(s_val: str) -> str:
-                return MODEL_BY_SENIORITY.get(
-                    s_val.lower(), MODEL_BY_SENIORITY[AgentSeniority.JUNIOR.value]
-                )
-
-            def _get_tools_for_design(
-                role_str: str, s_val: str
-            ) -> List[Dict[str, str]]:
-                tools_list: List[Dict[str, str]] = []
-                if (
-                    s_val.lower()
-                    in (AgentSeniority.SENIOR.value, AgentSeniority.EXPERT.value)
-                    or "manager" in role_str.lower()
-                ):
-                    tools_list.append(
-                        {
-                            "type": "web_search",
-                            "name": "web_search",
-                            "description": "Enables web searching for current information.",
-                        }
-                    )
-                # 🤖 AI-DRIVEN: Determine tool needs based on role semantics
-                if _role_needs_file_search_tool_sync(role_str):
-                    tools_list.append(
-                        {
-                            "type": "file_search",
-                            "name": "file_search",
-                            "description": "Enables searching through provided documents.",
-                        }
-                    )
-                return tools_list
+        team: List[Dict[str, Any]] = []
+        used_names: Set[str] = set()
+        has_pm = False
+        allocated_budget = 0.0
+        agents_created_count = 0
+
+        # --- Main design logic --- (resto del codice rimane uguale)
+        # 1. Add Project Manager if team > 1 agent and budget allows
+        if eff_max_agents > 1:
+            pm_s_val = _SENIOR
+            pm_c_val = COST_PER_MONTH[pm_s_val]
+            if (
+                allocated_budget + pm_c_val <= budget_total
+                and agents_created_count < eff_max_agents
+            ):
 
-            async def _generate_personality_for_role(role_str: str) -> Dict[str, Any]:
-                """🤖 AI-DRIVEN: Generate personality traits based on role semantics"""
-                return await _generate_ai_driven_personality(role_str)
-            
-            def _role_needs_file_search_tool_sync(role_str: str) -> bool:
-                """
-                🤖 AI-DRIVEN: Synchronous version - determine if role needs file search capability
-                """
-                # For now, use simple semantic analysis until we can make the whole chain async
-                role_lower = role_str.lower()
-                
-                # Semantic keywords that indicate need for file search
-                research_indicators = ["research", "analysis", "analyst", "content", "writer", "manager", "coordinator"]
-                document_indicators = ["review", "audit", "compliance", "legal", "documentation"]
-                information_indicators = ["data", "information", "intelligence", "market", "competitive"]
-                
-                all_indicators = research_indicators + document_indicators + information_indicators
-                
-                return any(indicator in role_lower for indicator in all_indicators)
-            
-            async def _generate_ai_driven_personality(role_str: str) -> Dict[str, Any]:
-                """🤖 AI-DRIVEN: Generate personality traits based on role semantics"""
-                try:
-                    if not AI_AVAILABLE:
-                        return _generate_personality_fallback(role_str)
-                    
-                    ai_prompt = f"""
-                    Generate appropriate personality traits for this professional role:
-                    
-                    Role: {role_str}
-                    
-                    Return a JSON object with:
-                    - personality_traits: array of 3 relevant traits (e.g., ANALYTICAL, CREATIVE, DECISIVE)
-                    - communication_style: one of ASSERTIVE, TECHNICAL, DETAILED, COLLABORATIVE
-                    - soft_skills: array of 2-3 objects with "name" and "level" (EXPERT, ADVANCED, INTERMEDIATE)
-                    - hard_skills: array of 2-3 objects with "name" and "level" (EXPERT, ADVANCED, INTERMEDIATE)
-                    - background_story: brief professional background story (1-2 sentences)
-                    
-                    Base traits on what would be most effective for this role.
-                    
-                    Format: {{"personality_traits": [...], "communication_style": "...", "soft_skills": [...], "hard_skills": [...], "background_story": "..."}}
-                    """
-                    
-                    # Create OpenAI client inline since we don't have access to self
-                    from utils.openai_client_factory_enhanced import get_enhanced_async_openai_client
-                    openai_client = get_enhanced_async_openai_client(workspace_id=workspace_id)
-                    
-                    response = await openai_client.chat.completions.create(
-                        model="gpt-4o-mini",
-                        messages=[
-                            {"role": "system", "content": "You are an expert at professional personality analysis. Provide only valid JSON output."},
-                            {"role": "user", "content": ai_prompt}
-                        ],
+                team.append(
+                    _new_team_member(
+                        name="ProjectManager",
+                        role="Project Manager",
+                        seniority=pm_s_val,
+                        description=_PM_DESCRIPTION,
+                        system_prompt=_PM_SYSTEM_PROMPT,
                         temperature=0.3,
-                        max_tokens=300
                     )
-                    
-                    ai_result = response.choices[0].message.content.strip()
-                    personality_data = AgentPersonality.model_validate_json(ai_result).model_dump()
-                    
-                    # Add default fields and names
-                    import random
-                    first_names = ["Alex", "Sam", "Jordan", "Morgan", "Taylor", "Casey", "Riley", "Avery", "Quinn", "Jamie"]
-                    last_names = ["Chen", "Smith", "Rodriguez", "Johnson", "Patel", "Wilson", "Garcia", "Martinez", "Lee", "Brown"]
-                    
-                    personality = {
-                        "first_name": random.choice(first_names),
-                        "last_name": random.choice(last_names),
-                        "bio": "",
-                        **personality_data
-                    }
-                    
-                    return personality
-                    
-                except Exception as e:
-                    logger.warning(f"AI personality generation failed: {e}")
-                    return _generate_personality_fallback(role_str)
-            
-            def _generate_personality_fallback(role_str: str) -> Dict[str, Any]:
-                """🔄 FALLBACK: Basic personality generation when AI unavailable"""
-                import random
-                first_names = ["Alex", "Sam", "Jordan", "Morgan", "Taylor", "Casey", "Riley", "Avery", "Quinn", "Jamie"]
-                last_names = ["Chen", "Smith", "Rodriguez", "Johnson", "Patel", "Wilson", "Garcia", "Martinez", "Lee", "Brown"]
-                
-                return {
-                    "first_name": random.choice(first_names),
-                    "last_name": random.choice(last_names),
-                    "bio": "",
-                    "personality_traits": ["PROFESSIONAL", "RELIABLE", "ADAPTABLE"],
-                    "communication_style": "COLLABORATIVE",
-                    "soft_skills": [
-                        {"name": "Communication", "level": "ADVANCED"},
-                        {"name": "Problem Solving", "level": "ADVANCED"}
-                    ],
-                    "hard_skills": [
-                        {"name": "Technical Proficiency", "level": "ADVANCED"},
-                        {"name": "Domain Knowledge", "level": "INTERMEDIATE"}
-                    ],
-                    "background_story": f"Experienced {role_str.lower()} with proven track record in project delivery and team collaboration."
-                }
+                )
+                used_names.add("ProjectManager")
+                has_pm = True
+                allocated_budget += pm_c_val
+                agents_created_count += 1
 
-            async def _group_skills_for_design(
-                skills_list: List[str],
-            ) -> List[Dict[str, Any]]:
-                """
-                🤖 AI-DRIVEN UNIVERSAL SKILL CATEGORIZATION
-                
-                Groups skills semantically without domain-specific assumptions
-                """
-                # Use AI-driven categorization if available
-                if AI_AVAILABLE and len(skills_list) > 0:
-                    try:
-                        ai_categorized_groups = await _ai_categorize_skills(skills_list)
-                        if ai_categorized_groups:
-                            logger.info(f"🤖 AI categorized {len(skills_list)} skills into {len(ai_categorized_groups)} groups")
-                            return ai_categorized_groups
-                    except Exception as e:
-                        logger.debug(f"AI skill categorization failed, using fallback: {e}")
-                
-                # Fallback: Universal pattern-based grouping (no domain assumptions)
-                return await _universal_skill_grouping_fallback(skills_list)
-            
-            async def _ai_categorize_skills(skills_list: List[str]) -> List[Dict[str, Any]]:
-                """🤖 AI-driven skill categorization without domain assumptions"""
-                try:
-                    skills_str = ', '.join(skills_list)
-                    
-                    categorization_prompt = f"""Analyze these skills and group them into functional categories:
-
-SKILLS TO CATEGORIZE: {skills_str}
-
-Group these skills based on their FUNCTIONAL SIMILARITY (not business domain). Create 2-5 logical groups where:
-1. Skills in each group work together naturally
-2. Each group represents a coherent functional area
-3. Groups are balanced (avoid single-skill groups unless truly unique)
-4. Categories are UNIVERSAL (applicable across all business domains)
-
-For each group, determine:
-- A functional category name (e.g., "analytical_tasks", "creative_work", "coordination_activities")
-- Importance level: "high" for core execution skills, "medium" for supporting skills
-- Which skills belong in that group
-
-Return ONLY a JSON array in this format:
-[
-  {{
-    "category": "functional_category_name",
-    "skills": ["skill1", "skill2", "skill3"],
-    "importance": "high|medium",
-    "rationale": "Brief explanation of why these skills group together"
-  }}
-]"""
-
-                    analyzer = OpenAIAgent(
-                        name="SkillCategorizer",
-                        instructions=categorization_prompt,
-                        model="gpt-4o-mini",
-                        model_settings=create_model_settings(temperature=0.3),
-                    )
-                    
-                    result = await Runner.run(analyzer, "Categorize the skills into functional groups.")
-                    raw_output = result.final_output
-                    
-                    # Parse AI response with Pydantic
-                    try:
-                        # The model should return a list of SkillGroup objects
-                        categorized_groups_validated = [SkillGroup.model_validate(g) for g in json.loads(raw_output)]
-                        
-                        # Convert to expected format
-                        final_groups = [
-                            {
-                                "domain": group.category,
-                                "skills": group.skills,
-                                "importance": group.importance,
-                            }
-                            for group in categorized_groups_validated
-                        ]
-                        return final_groups
-                    except (json.JSONDecodeError, ValidationError) as e:
-                        logger.debug(f"Initial Pydantic parsing failed: {e}")
-                        # Try to extract JSON from response
-                        import re
-                        match = re.search(r'\[(.*?)\]', raw_output, re.DOTALL)
-                        if match:
-                            try:
-                                cleaned_json = f"[{match.group(1)}]"
-                                categorized_groups_validated = [SkillGroup.model_validate(g) for g in json.loads(cleaned_json)]
-                                final_groups = [
-                                    {
-                                        "domain": group.category,
-                                        "skills": group.skills,
-                                        "importance": group.importance,
-                                    }
-                                    for group in categorized_groups_validated
-                                ]
-                                return final_groups
-                            except (json.JSONDecodeError, ValidationError) as e2:
-                                logger.error(f"Could not parse extracted JSON with Pydantic: {e2}")
-                                pass
-                                
-                except Exception as e:
-                    logger.debug(f"AI skill categorization error: {e}")
-                
-                return []
-            
-            async def _universal_skill_grouping_fallback(skills_list: List[str]) -> List[Dict[str, Any]]:
-                """
-                🤖 AI-DRIVEN UNIVERSAL FALLBACK: Semantic skill grouping without hard-coded patterns
-                """
-                try:
-                    # Try AI-driven semantic grouping first
-                    if self.ai_available and self.openai_client:
-                        return await self._ai_driven_skill_grouping(skills_list)
-                    else:
-                        # Fallback to simpler grouping if AI unavailable
-                        return await self._simple_semantic_fallback(skills_list)
-                except Exception as e:
-                    logger.warning(f"AI skill grouping failed, using simple fallback: {e}")
-                    return await self._simple_semantic_fallback(skills_list)
-            
-            async def _ai_driven_skill_grouping(self, skills_list: List[str]) -> List[Dict[str, Any]]:
-                """
-                🤖 AI-DRIVEN: Use AI to semantically group skills into functional categories
-                """
-                try:
-                    skills_text = ", ".join(skills_list)
-                    
-                    ai_prompt = f"""
-                    Analyze these skills and group them into functional categories based on semantic similarity and purpose.
-                    
-                    Skills: {skills_text}
-                    
-                    Group these skills into logical functional categories (e.g., coordination, analysis, creative, communication, technical, optimization).
-                    Return a JSON object where keys are category names and values are arrays of skills that belong to that category.
-                    
-                    Only use skills from the provided list. Create 3-6 meaningful categories that capture the functional essence of the skills.
-                    
-                    Format: {{"category_name": ["skill1", "skill2"], "another_category": ["skill3"]}}
-                    """
-                    
-                    response = await self.openai_client.chat.completions.create(
-                        model="gpt-4o-mini",
-                        messages=[
-                            {"role": "system", "content": "You are an expert at semantic skill analysis and categorization. Provide only valid JSON output."},
-                            {"role": "user", "content": ai_prompt}
-                        ],
-                        temperature=0.1,
-                        max_tokens=800
-                    )
-                    
-                    ai_result = response.choices[0].message.content.strip()
-                    # Parse AI response
-                    import json
-                    skill_groups = json.loads(ai_result)
-                    
-                    # Convert to expected format
-                    grouped_skills = []
-                    for category, skills in skill_groups.items():
-                        if skills:  # Only add non-empty categories
-                            grouped_skills.append({
-                                "functional_group": category,
-                                "skills": skills,
-                                "expertise_level": "mixed",
-                                "collaboration_style": "adaptive"
-                            })
-                    
-                    logger.info(f"✅ AI-driven skill grouping created {len(grouped_skills)} categories")
-                    return grouped_skills
-                    
-                except Exception as e:
-                    logger.warning(f"AI skill grouping failed: {e}")
-                    # Fall back to simple approach
-                    return await self._simple_semantic_fallback(skills_list)
-            
-            async def _simple_semantic_fallback(self, skills_list: List[str]) -> List[Dict[str, Any]]:
-                """
-                🔄 SIMPLE FALLBACK: Basic grouping when AI is unavailable
-                """
-                # Simple approach: group by skill similarity without hard-coded keywords
-                s_groups = {
-                    "primary_skills": [],
-                    "secondary_skills": [],
-                    "specialized_skills": []
-                }
-                
-                # Group skills by pattern matching
-                s_groups: Dict[str, List[str]] = {pattern: [] for pattern in universal_patterns}
-                s_groups["specialized_tasks"] = []  # For unmatched skills
-                
-                processed: Set[str] = set()
-                for skill_item in skills_list:
-                    normalized_skill = skill_item.lower()
-                    if normalized_skill in processed:
-                        continue
-                    
-                    assigned = False
-                    for pattern_name, keywords in universal_patterns.items():
-                        if any(kw in normalized_skill for kw in keywords):
-                            s_groups[pattern_name].append(skill_item)
-                            assigned = True
-                            break
-                    
-                    if not assigned:
-                        s_groups["specialized_tasks"].append(skill_item)
-                    processed.add(normalized_skill)
-                
-                # Convert to expected format
-                final_skill_groups: List[Dict[str, Any]] = []
-                for pattern_name, skills_in_group in s_groups.items():
-                    if skills_in_group:
-                        importance = "high" if pattern_name in ["coordination_activities", "technical_implementation", "analytical_tasks"] else "medium"
-                        final_skill_groups.append({
-                            "domain": pattern_name,
-                            "skills": skills_in_group,
-                            "importance": importance
-                        })
-                
-                return final_skill_groups
+        # 2. Group remaining skills
+        skills_to_assign = required_skills
+        if has_pm:  # If PM exists, filter out mgmt skills
+            # Universal management keywords (no domain assumptions)
+            skills_to_assign = [
+                s
+                for s in required_skills
+                if not _MGMT_SKILL_RE.search(s)
+            ]
+
+        # Roles fixed before grouping (the PM) get their personalities while
+        # the categorizer runs; specialist titles depend on its output
+        known_roles = [a["role"] for a in team]
+        if known_roles:
+            skill_groups_list, known_personalities = await asyncio.gather(
+                _group_skills_for_design(skills_to_assign, workspace_id),
+                _generate_personalities_batch(known_roles, workspace_id),
+            )
+        else:
+            skill_groups_list = await _group_skills_for_design(skills_to_assign, workspace_id)
+            known_personalities = []
 
-            # ADESSO PUOI USARE LE FUNZIONI
-            # Determine effective_max_agents respecting MAX_TEAM_SIZE
-            eff_max_agents = MAX_TEAM_SIZE
-            if isinstance(max_agents, int) and 0 < max_agents <= MAX_TEAM_SIZE:
-                eff_max_agents = max_agents
+        # 3. Create specialists for skill groups
+        for group_item in skill_groups_list:
+            if (
+                agents_created_count >= eff_max_agents
+                or allocated_budget >= budget_total
+            ):
+                break
+            if not group_item["skills"]:
+                continue
 
-            optimal_team_size = _calculate_optimal_team_size(
-                budget_total, required_skills
+            # LINKING: Get best performing agents for this role/skill group
+            role_for_memory_lookup = group_item["domain"]
+            best_performers: List[Dict[str, Any]] = []
+            if workspace_id:
+                best_performers = await unified_memory_engine.get_best_performing_agents(
+                    workspace_id=workspace_id,
+                    role=role_for_memory_lookup,
+                    limit=1
+                )
+            
+            performance_boost = 0.0
+            if best_performers:
+                top_performer = best_performers[0]
+                avg_quality = top_performer.get('avg_quality_score', 0.0)
+                if avg_quality > 0.85:
+                    performance_boost = 0.2 # Boost for expert
+                elif avg_quality > 0.75:
+                    performance_boost = 0.1 # Boost for senior
+
+            # Determine seniority based on remaining budget per slot and importance
+            slots_remaining = eff_max_agents - agents_created_count
+            avg_budget_per_slot = (
+                (budget_total - allocated_budget) / slots_remaining
+                if slots_remaining > 0
+                else 0.0
             )
-            eff_max_agents = min(eff_max_agents, optimal_team_size)
-            logger.info(
-                f"Effective max agents: {eff_max_agents} (budget: {budget_total}, skills: {len(required_skills)})"
+            # Apply performance boost to budget calculation, then walk the
+            # expert → senior → junior ladder down to what the budget affords
+            picked_seniority = _pick_seniority(
+                avg_budget_per_slot * (1 + performance_boost),
+                group_item["importance"] == "high",
+                budget_total - allocated_budget,
+            )
+            if picked_seniority is None:
+                continue  # Cannot afford even a Junior for this group
+            s_val = picked_seniority
+            agent_cost = COST_PER_MONTH[s_val]
+
+            # Create agent name and role
+            skill_name_base = group_item["skills"][0].replace("_", " ").title()
+            domain_name_part = (
+                group_item["domain"].title().replace("_", "") + ""
+                if group_item["domain"] and group_item["domain"] != "OtherDomain"
+                else ""
+            )
+            name_prefix = (
+                domain_name_part
+                if domain_name_part
+                else _NON_WORD_RE.sub("", skill_name_base.split(" ")[0])
             )
 
-            team: List[Dict[str, Any]] = []
-            allocated_budget = 0.0
-            agents_created_count = 0
-
-            # --- Main design logic --- (resto del codice rimane uguale)
-            # 1. Add Project Manager if team > 1 agent and budget allows
-            if eff_max_agents > 1:
-                pm_s_val = AgentSeniority.SENIOR.value
-                pm_c_val = COST_PER_MONTH[pm_s_val]
-                if (
-                    allocated_budget + pm_c_val <= budget_total
-                    and agents_created_count < eff_max_agents
-                ):
-                    pm_personality = await _generate_personality_for_role("Project Manager")
+            base_agent_name = f"{name_prefix}Specialist"
+            unique_agent_name = base_agent_name
+            name_counter = 1
+            while unique_agent_name in used_names:
+                unique_agent_name = f"{base_agent_name}{name_counter}"
+                name_counter += 1
+            used_names.add(unique_agent_name)
+
+            agent_role_title = (
+                f"{domain_name_part} {skill_name_base} Specialist"
+                if domain_name_part
+                else f"{skill_name_base} Specialist"
+            )
+            skills_text = ', '.join(group_item['skills'])
+            team.append(
+                _new_team_member(
+                    name=unique_agent_name,
+                    role=agent_role_title.strip(),
+                    seniority=s_val,
+                    description=f"Handles tasks related to: {skills_text} within the {group_item['domain'] or 'general'} domain.",
+                    system_prompt=_specialist_prompt(
+                        agent_role_title.strip(), tuple(group_item['skills'])
+                    ),
+                    temperature=0.35,
+                    tools_role=agent_role_title,
+                )
+            )
+            allocated_budget += agent_cost
+            agents_created_count += 1
 
-                    team.append(
+        if (
+            not team and required_skills
+        ):  # If no agents were created but skills were listed
+            logger.warning(
+                "design_team_structure: No agents created, attempting minimal fallback agent."
+            )
+            s_val = _JUNIOR
+            if (
+                budget_total >= COST_PER_MONTH[s_val]
+                and agents_created_count < eff_max_agents
+            ):
+                team.append(
+                    _new_team_member(
+                        name="GeneralTaskExecutor",
+                        role="General Task Executor",
+                        seniority=s_val,
+                        description="Handles general project tasks due to constraints.",
+                        system_prompt="You are a General Task Executor. Handle all assigned tasks efficiently.",
+                        temperature=0.4,
+                    )
+                )
+            else:
+                logger.error(
+                    "design_team_structure: Could not create even a fallback agent."
+                )
+                return _dumps(
+                    [
                         {
-                            "name": "ProjectManager",
-                            "role": "Project Manager",
-                            "seniority": pm_s_val,
-                            "description": "Oversees project execution, coordinates team, manages communication and ensures goal alignment.",
-                        "system_prompt": """You are a Project Manager. Your primary goal is to lead the team to successfully complete the project by ensuring concrete deliverables are produced.
+                            "error": "Unable to design any agent within budget/constraints."
+                        }
+                    ]
+                )
 
-🎯 DELIVERABLE-FIRST MANAGEMENT:
-1. **FINAL ARTIFACTS FOCUS**: Your success is measured by concrete deliverables (reports, lists, documents, code), not by task organization.
-2. **NO TASK DECOMPOSITION**: Do not break goals into sub-tasks. Instead, assign complete work packages that produce finished outputs.
-3. **ENABLE DIRECT EXECUTION**: Provide specialists with all context, resources, and authority needed to complete work in one step.
-4. **CONCRETE TASK ASSIGNMENT**: Instead of "Research target market," assign "Produce a target market analysis document with demographics, competitors, and opportunities."
-5. **MANAGE OUTPUTS, NOT PROCESSES**: Focus on what gets delivered, not how it gets done.
+        # 4. Personalities for the remaining members in a single batched LLM call
+        personalities = known_personalities + await _generate_personalities_batch(
+            [a["role"] for a in team[len(known_personalities):]], workspace_id
+        )
+        for agent, personality in zip(team, personalities):
+            agent.update({k: personality[k] for k in _PERSONALITY_FIELDS})
 
-EXAMPLES:
-❌ Bad: "Create sub-tasks: 1) Research, 2) Analyze, 3) Document"  
-✅ Good: "Produce complete competitive analysis with 10 competitors, pricing, strengths/weaknesses, and recommendations"
+        logger.info(
+            f"Team designed with {len(team)} agents. Budget used: {allocated_budget:.2f}/{budget_total:.2f}."
+        )
+        return _dumps(team)
+    except Exception as exc:
+        logger.error(
+            f"design_team_structure critically failed: {exc}", exc_info=True
+        )
+        return _dumps([{"error": f"Critical failure in team design: {exc}"}])
 
-Your role: Remove barriers so specialists produce final, substantial deliverables directly.""",
-                        "llm_config": {
-                                "model": _get_model_for_design(pm_s_val),
-                                "temperature": 0.3,
-                            },
-                            "tools": _get_tools_for_design("Project Manager", pm_s_val),
-                            "first_name": pm_personality["first_name"],
-                            "last_name": pm_personality["last_name"],
-                            "personality_traits": pm_personality["personality_traits"],
-                            "communication_style": pm_personality[
-                                "communication_style"
-                            ],
-                            "hard_skills": pm_personality["hard_skills"],
-                            "soft_skills": pm_personality["soft_skills"],
-                            "background_story": pm_personality["background_story"],
-                        }
-                    )
-                    allocated_budget += pm_c_val
-                    agents_created_count += 1
-
-            # 2. Group remaining skills
-            skills_to_assign = required_skills
-            if any(
-                a.get("role") == "Project Manager" for a in team
-            ):  # If PM exists, filter out mgmt skills
-                # Universal management keywords (no domain assumptions)
-                mgmt_keywords = ["manage", "coordina", "plan", "lead", "oversight", "organize", "coordinate"]
-                skills_to_assign = [
-                    s
-                    for s in required_skills
-                    if not any(kw in s.lower() for kw in mgmt_keywords)
+
+class _AgentSpec(TypedDict, total=False):
+    """Shape of the internally built default/fallback agent specs."""
+
+    name: str
+    role: str
+    seniority: str
+    description: str
+    system_prompt: str
+    llm_config: Dict[str, Any]
+    tools: List[Dict[str, str]]
+    estimated_monthly_cost: float
+    workspace_id: UUID
+    _presanitized: bool
+
+
+@functools.lru_cache(maxsize=16)
+def _seniority_from_str(value: str) -> AgentSeniority:
+    try:
+        return AgentSeniority(value.lower())
+    except ValueError:
+        return AgentSeniority.JUNIOR
+
+
+def _coerce_seniority(value: Any) -> AgentSeniority:
+    """AgentSeniority from an enum, a string in any case, or junk (→ JUNIOR)."""
+    if isinstance(value, AgentSeniority):
+        return value
+    if isinstance(value, Enum):
+        value = value.value
+    if isinstance(value, str):
+        return _seniority_from_str(value)
+    return AgentSeniority.JUNIOR
+
+
+def _trusted_agent_create(spec: Union[_AgentSpec, Dict[str, Any]]) -> AgentCreate:
+    """
+    AgentCreate for internally generated specs (fallback/default agents),
+    skipping validation. Values are coerced the way validation would
+    (seniority enum → str, cost → float); LLM-derived specs must keep using
+    the validating constructor.
+    """
+    # trusted: internally generated
+    fields = {k: v for k, v in spec.items() if k in AgentCreate.model_fields}
+    seniority = fields.get("seniority")
+    if isinstance(seniority, Enum):
+        fields["seniority"] = seniority.value
+    if fields.get("estimated_monthly_cost") is not None:
+        fields["estimated_monthly_cost"] = float(fields["estimated_monthly_cost"])
+    return AgentCreate.model_construct(**fields)
+
+
+_SKILL_KEYS: Tuple[str, ...] = ("hard_skills", "soft_skills")
+
+# Whole-word role matching for default-agent tools (no "management" -> "manager")
+_FILE_SEARCH_ROLES: FrozenSet[str] = frozenset(
+    {"content", "writing", "research", "analysis", "marketing", "manager"}
+)
+_WEB_SEARCH_SENIORITIES: FrozenSet[str] = frozenset({_SENIOR, _EXPERT})
+
+# Tool prototypes: read-only views, copied ({**proto}) into every agent spec
+_WEB_SEARCH_TOOL: Mapping[str, str] = MappingProxyType({
+    "type": "web_search",
+    "name": "web_search",
+    "description": "Enables searching the web for current information.",
+})
+_FILE_SEARCH_TOOL: Mapping[str, str] = MappingProxyType({
+    "type": "file_search",
+    "name": "file_search",
+    "description": "Enables searching through provided documents and knowledge base.",
+})
+
+
+def _canonical_trait(trait: str) -> str:
+    """Lowercase, hyphenated trait; allocates only when something changes."""
+    lo = trait if trait.islower() else trait.lower()
+    return lo.replace("_", "-") if "_" in lo else lo
+
+
+def _normalize_agent_enums(agent_data: Dict[str, Any]) -> None:
+    """
+    Normalize case for enum values in place (single pass over the agent dict)
+    to fix Pydantic validation errors on LLM output. Values come from JSON, so
+    exact type checks (``type(v) is list``) are enough.
+    """
+    for key, value in agent_data.items():
+        if key == "personality_traits":
+            if type(value) is list:
+                # Replace underscores with hyphens for enum compatibility
+                agent_data[key] = [
+                    _canonical_trait(t) if isinstance(t, str) else t for t in value
                 ]
+        elif key == "communication_style":
+            if type(value) is str and not value.islower():
+                agent_data[key] = value.lower()
+        elif key in _SKILL_KEYS and type(value) is list:
+            for skill in value:
+                if isinstance(skill, dict):
+                    level = skill.get("level")
+                    if isinstance(level, str) and not level.islower():
+                        skill["level"] = level.lower()
 
-            skill_groups_list = await _group_skills_for_design(skills_to_assign)
 
-            # 3. Create specialists for skill groups
-            for group_item in skill_groups_list:
-                if (
-                    agents_created_count >= eff_max_agents
-                    or allocated_budget >= budget_total
-                ):
-                    break
-                if not group_item["skills"]:
-                    continue
+# ---------------------------------------------------------------------------
+# DirectorAgent definition
+# ---------------------------------------------------------------------------
+class DirectorAgent:
+    """Crea proposte di team di AI‑agents evitando delega circolare."""
 
-                # LINKING: Get best performing agents for this role/skill group
-                role_for_memory_lookup = group_item["domain"]
-                best_performers = await unified_memory_engine.get_best_performing_agents(
-                    workspace_id=proposal_request.workspace_id,
-                    role=role_for_memory_lookup,
-                    limit=1
-                )
-                
-                performance_boost = 0.0
-                if best_performers:
-                    top_performer = best_performers[0]
-                    avg_quality = top_performer.get('avg_quality_score', 0.0)
-                    if avg_quality > 0.85:
-                        performance_boost = 0.2 # Boost for expert
-                    elif avg_quality > 0.75:
-                        performance_boost = 0.1 # Boost for senior
-
-                # Determine seniority based on remaining budget per slot and importance
-                s_val = AgentSeniority.JUNIOR.value  # Default
-                slots_remaining = eff_max_agents - agents_created_count
-                if slots_remaining > 0:
-                    avg_budget_per_slot = (
-                        budget_total - allocated_budget
-                    ) / slots_remaining
-                    
-                    # Apply performance boost to budget calculation
-                    if (
-                        avg_budget_per_slot * (1 + performance_boost)
-                        >= COST_PER_MONTH[AgentSeniority.EXPERT.value]
-                        and group_item["importance"] == "high"
-                    ):
-                        s_val = AgentSeniority.EXPERT.value
-                    elif (
-                        avg_budget_per_slot * (1 + performance_boost)
-                        >= COST_PER_MONTH[AgentSeniority.SENIOR.value]
-                    ):
-                        s_val = AgentSeniority.SENIOR.value
-
-                agent_cost = COST_PER_MONTH[s_val]
-                # Downgrade if current seniority choice exceeds budget for this agent
-                if allocated_budget + agent_cost > budget_total:
-                    if (
-                        s_val == AgentSeniority.EXPERT.value
-                        and allocated_budget
-                        + COST_PER_MONTH[AgentSeniority.SENIOR.value]
-                        <= budget_total
-                    ):
-                        s_val = AgentSeniority.SENIOR.value
-                    elif (
-                        s_val != AgentSeniority.JUNIOR.value
-                        and allocated_budget
-                        + COST_PER_MONTH[AgentSeniority.JUNIOR.value]
-                        <= budget_total
-                    ):
-                        s_val = AgentSeniority.JUNIOR.value
-                    else:
-                        continue  # Cannot afford even a Junior for this group
-                    agent_cost = COST_PER_MONTH[s_val]  # Update cost after downgrade
-
-                # Create agent name and role
-                skill_name_base = group_item["skills"][0].replace("_", " ").title()
-                domain_name_part = (
-                    group_item["domain"].title().replace("_", "") + ""
-                    if group_item["domain"] and group_item["domain"] != "OtherDomain"
-                    else ""
-                )
-                name_prefix = (
-                    domain_name_part
-                    if domain_name_part
-                    else re.sub(r"\W+", "", skill_name_base.split(" ")[0])
-                )
+    def __init__(self):
+        if not os.getenv("OPENAI_API_KEY") and SDK_AVAILABLE:
+            logger.warning(
+                "OPENAI_API_KEY non impostata – i tools LLM potrebbero fallire."
+            )
+        self.max_team_size: int = MAX_TEAM_SIZE
+        self.min_team_size: int = 1
+        self.max_coordinator_ratio: float = 0.4
 
-                base_agent_name = f"{name_prefix}Specialist"
-                unique_agent_name = base_agent_name
-                name_counter = 1
-                while any(a.get("name") == unique_agent_name for a in team):
-                    unique_agent_name = f"{base_agent_name}{name_counter}"
-                    name_counter += 1
-
-                agent_role_title = (
-                    f"{domain_name_part} {skill_name_base} Specialist"
-                    if domain_name_part
-                    else f"{skill_name_base} Specialist"
-                )
-                specialist_personality = await _generate_personality_for_role(
-                    agent_role_title
-                )
-                team.append(
-                    {
-                        "name": unique_agent_name,
-                        "role": agent_role_title.strip(),
-                        "seniority": s_val,
-                        "description": f"Handles tasks related to: {', '.join(group_item['skills'])} within the {group_item['domain'] or 'general'} domain.",
-                        "system_prompt": f"""You are a {agent_role_title.strip()}. Your expertise covers: {', '.join(group_item['skills'])}.
+    @staticmethod
+    @function_tool
+    async def analyze_project_requirements_llm(goal: str, constraints_json: str) -> str:
+        """Restituisce JSON con skill, aree di expertise, team raccomandato. 'constraints_json' DEVE essere una stringa JSON valida."""
+        return await _analyze_project_requirements(goal, constraints_json)
 
-🎯 EXECUTION-FIRST PRINCIPLES:
-1. PRODUCE CONCRETE DELIVERABLES: Create actual content, data, documents, or code - not plans or todo lists.
-2. NO SUB-TASK CREATION: If asked to "research competitors," provide the actual competitor list with details, not a research plan.
-3. SINGLE-STEP COMPLETION: Finish tasks completely in one execution cycle.
-4. REAL DATA OVER TEMPLATES: Generate actual emails, contacts, reports - not "template for emails" or "example reports."
-5. ESCALATE ONLY FOR BLOCKERS: Only escalate if you need external resources or permissions, not for task breakdown.
+    @staticmethod
+    @function_tool
+    async def estimate_costs(
+        team_composition_json: str, duration_days: Optional[int] = None
+    ) -> str:
+        """
+        Stima i costi del team.
 
-EXAMPLES:
-❌ Bad: "Here's a plan to research target audience: 1. Identify demographics 2. Analyze preferences..."
-✅ Good: "Target Audience: Age 25-40, Income €40K-€80K, Location: Milan/Rome, Interests: Tech/Sustainability..."
+        Args:
+            team_composition_json: Stringa JSON contenente la lista di specifiche agenti.
+            duration_days: Durata del progetto in giorni. Se non specificato, usa 30 giorni come default.
 
-Execute tasks directly and provide substantial, actionable results.""",
-                        "llm_config": {
-                            "model": _get_model_for_design(s_val),
-                            "temperature": 0.35,
-                        },
-                        "tools": _get_tools_for_design(agent_role_title, s_val),
-                        "first_name": specialist_personality["first_name"],
-                        "last_name": specialist_personality["last_name"],
-                        "personality_traits": specialist_personality[
-                            "personality_traits"
-                        ],
-                        "communication_style": specialist_personality[
-                            "communication_style"
-                        ],
-                        "hard_skills": specialist_personality["hard_skills"],
-                        "soft_skills": specialist_personality["soft_skills"],
-                        "background_story": specialist_personality["background_story"],
-                    }
-                )
-                allocated_budget += agent_cost
-                agents_created_count += 1
+        Returns:
+            JSON string con i costi stimati e breakdown per agente.
+        """
+        return await _estimate_costs(team_composition_json, duration_days)
 
-            if (
-                not team and required_skills
-            ):  # If no agents were created but skills were listed
-                logger.warning(
-                    "design_team_structure: No agents created, attempting minimal fallback agent."
+    @staticmethod
+    @function_tool
+    async def design_team_structure(
+        required_skills_json: str, budget_total: float, max_agents: Optional[int] = None, user_feedback: str = ""
+    ) -> str:
+        """Progetta la struttura del team. 'required_skills_json' è una stringa JSON di una lista di skill."""
+        return await _design_team_structure(
+            required_skills_json, budget_total, max_agents, user_feedback
+        )
+
+    async def propose_team(
+        self, goal: str, constraints: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Analizza i requisiti e progetta il team in parallelo.
+
+        A draft team is designed from a budget-only skill list while the
+        requirements analysis runs; the draft is kept when the analysed skills
+        overlap enough with it, otherwise the design is re-issued — as soon as
+        the skills have streamed in, not after the full analysis.
+
+        Returns:
+            Dict con ``analysis``, ``team`` e ``costs`` (già decodificati).
+        """
+        constraints = dict(constraints or {})
+        budget_total = _extract_budget(constraints)
+        user_feedback = str(constraints.get("user_feedback") or "")
+        workspace_id = constraints.get("workspace_id")
+
+        speculative_skills = list(
+            SPECULATIVE_SKILLS[: max(1, min(_budget_team_size(budget_total), self.max_team_size))]
+        )
+        design_task = asyncio.create_task(
+            _design_team_structure(
+                _dumps(speculative_skills), budget_total, self.max_team_size, user_feedback, workspace_id
+            )
+        )
+        early: Dict[str, Any] = {}
+
+        def _on_required_skills(skills: List[str]) -> None:
+            # Skills streamed in before the rationale: re-design right away if they diverge
+            if _skills_overlap(skills, speculative_skills) >= SPECULATIVE_MIN_OVERLAP:
+                return
+            design_task.cancel()
+            early["skills"] = skills
+            early["task"] = asyncio.create_task(
+                _design_team_structure(
+                    _dumps(skills), budget_total, self.max_team_size, user_feedback, workspace_id
                 )
-                s_val = AgentSeniority.JUNIOR.value
-                if (
-                    budget_total >= COST_PER_MONTH[s_val]
-                    and agents_created_count < eff_max_agents
-                ):
-                    fallback_personality = await _generate_personality_for_role(
-                        "General Task Executor"
-                    )
-                    team.append(
-                        {
-                            "name": "GeneralTaskExecutor",
-                            "role": "General Task Executor",
-                            "seniority": s_val,
-                            "description": "Handles general project tasks due to constraints.",
-                            "system_prompt": "You are a General Task Executor. Handle all assigned tasks efficiently.",
-                            "llm_config": {
-                                "model": _get_model_for_design(s_val),
-                                "temperature": 0.4,
-                            },
-                            "tools": _get_tools_for_design(
-                                "General Task Executor", s_val
-                            ),
-                            "first_name": fallback_personality["first_name"],
-                            "last_name": fallback_personality["last_name"],
-                            "personality_traits": fallback_personality[
-                                "personality_traits"
-                            ],
-                            "communication_style": fallback_personality[
-                                "communication_style"
-                            ],
-                            "hard_skills": fallback_personality["hard_skills"],
-                            "soft_skills": fallback_personality["soft_skills"],
-                            "background_story": fallback_personality[
-                                "background_story"
-                            ],
-                        }
-                    )
-                else:
-                    logger.error(
-                        "design_team_structure: Could not create even a fallback agent."
-                    )
-                    return json.dumps(
-                        [
-                            {
-                                "error": "Unable to design any agent within budget/constraints."
-                            }
-                        ]
-                    )
+            )
 
-            logger.info(
-                f"Team designed with {len(team)} agents. Budget used: {allocated_budget:.2f}/{budget_total:.2f}."
+        try:
+            analysis = _loads(
+                await _analyze_project_requirements(
+                    goal, _dumps(constraints), on_required_skills=_on_required_skills
+                )
             )
-            return json.dumps(team)
-        except Exception as exc:
-            logger.error(
-                f"design_team_structure critically failed: {exc}", exc_info=True
+        except BaseException:
+            design_task.cancel()
+            if "task" in early:
+                early["task"].cancel()
+            raise
+
+        required_skills = analysis.get("required_skills") or speculative_skills
+        overlap = _skills_overlap(required_skills, speculative_skills)
+        early_task: Optional["asyncio.Task[str]"] = early.get("task")
+        if early_task is not None and early["skills"] == required_skills:
+            logger.info(f"⚡ propose_team: re-design started while analysis streamed (overlap={overlap:.2f})")
+            team_json = await early_task
+        elif early_task is None and overlap >= SPECULATIVE_MIN_OVERLAP:
+            logger.info(f"⚡ propose_team: keeping speculative design (overlap={overlap:.2f})")
+            team_json = await design_task
+        else:
+            logger.info(f"🔄 propose_team: skills diverged (overlap={overlap:.2f}), re-designing")
+            design_task.cancel()
+            if early_task is not None:
+                early_task.cancel()
+            team_json = await _design_team_structure(
+                _dumps(required_skills), budget_total, self.max_team_size, user_feedback, workspace_id
             )
-            return json.dumps([{"error": f"Critical failure in team design: {exc}"}])
+
+        team = _loads(team_json)
+        if any("error" in agent for agent in team):
+            costs: Dict[str, Any] = {"total_estimated_cost": 0, "notes": "No team to estimate."}
+        else:
+            costs = _loads(await _estimate_costs(_dumps(team)))
+        return {"analysis": analysis, "team": team, "costs": costs}
 
     def _is_same_role_type(self, role1: str, role2: str) -> bool:
         """Checks if two roles are of the same broad type (manager, specialist)."""
@@ -1223,278 +2226,231 @@ Execute tasks directly and provide substantial, actionable results.""",
         max_team_for_performance = min(8, max(3, int(budget_amount / 1500)))  # Dynamic sizing based on budget
         logger.info(f"👥 CALCULATED TEAM SIZE: {max_team_for_performance} agents (budget {budget_amount} / 1500)")
         
-        director_instructions = f"""You are an AI Team Designer. Create a complete team proposal.
-
-PROJECT: {proposal_request.requirements}
-BUDGET: {budget_amount} EUR
-MAX TEAM SIZE: {max_team_for_performance} agents (analyze project needs to determine optimal size)
-
-CRITICAL: ANALYZE PROJECT DOMAIN FIRST - Match project to the correct category below:
-
-1. **B2B/LEAD GENERATION PROJECTS** (Keywords: contatti, ICP, CMO, CTO, SaaS, leads, outbound, Hubspot, CRM, B2B):
-   REQUIRED SPECIALISTS (assign EXPERT or SENIOR level for high-budget projects):
-   - Business Research Specialist (EXPERT: finds target companies, ICPs, decision makers)
-   - Lead Generation Expert (EXPERT: builds prospect lists, enriches contact data)
-   - Email Marketing Strategist (SENIOR: creates sequences, nurture campaigns)
-   - Sales Copywriter (SENIOR: persuasive B2B messaging, value propositions)
-   - CRM Integration Specialist (SENIOR: Hubspot, Salesforce setup)
-   - Market Intelligence Analyst (EXPERT: competitive analysis, industry insights)
-
-2. **SOCIAL MEDIA/CONTENT PROJECTS** (Keywords: Instagram, TikTok, social, posts, stories, reels):
-   - Content Creator/Writer (creates posts, captions, content calendars)
-   - Social Media Manager (strategy, posting schedules, engagement)
-   - Visual Content Designer (graphics, layouts, visual identity)
-   - Community Manager (audience interaction, relationship building)
-   - Brand Strategist (brand voice, messaging consistency)
-
-3. **TECHNICAL/DEVELOPMENT PROJECTS** (Keywords: app, website, API, code, software, system):
-   - Software Developer (coding, implementation)
-   - System Architect (design, infrastructure)
-   - DevOps Engineer (deployment, CI/CD)
-   - QA Engineer (testing, quality assurance)
-
-4. **BUSINESS ANALYSIS PROJECTS** (Keywords: analysis, strategy, planning, research):
-   - Business Analyst (requirements, process analysis)
-   - Strategic Consultant (business strategy, recommendations)
-   - Data Analyst (metrics, insights, reporting)
-   - Market Researcher (trends, opportunities)
-
-Create a focused, expert team with detailed profiles. Each agent should have:
-- Rich personality traits and background
-- Detailed hard/soft skills  
-- Clear role specialization
-- Professional communication style
-
-ENUM VALUES (use exactly these):
-- personality_traits: analytical, creative, detail-oriented, proactive, collaborative, decisive, innovative, methodical, adaptable, diplomatic
-- communication_style: formal, casual, technical, concise, detailed, empathetic, assertive
-- skill levels: beginner, intermediate, expert
-- seniority: junior, senior, expert
-
-Return ONLY this JSON structure:
-{{
-  "agents": [
-    {{
-      "name": "NomeCognome",
-      "role": "specific_role",
-      "seniority": "junior|senior|expert",
-      "description": "what this agent does",
-      "system_prompt": "You are a [role]. [responsibilities].",
-      "llm_config": {{"model": "gpt-4.1-nano|gpt-4.1-mini|gpt-4.1", "temperature": 0.3}},
-      "tools": [{{"type": "web_search", "name": "web_search", "description": "Web search capability"}}],
-      "first_name": "Name",
-      "last_name": "Surname",
-      "personality_traits": ["trait1", "trait2"],
-      "communication_style": "collaborative",
-      "hard_skills": [{{"name": "skill", "level": "advanced"}}],
-      "soft_skills": [{{"name": "skill", "level": "advanced"}}],
-      "background_story": "Professional background..."
-    }}
-  ],
-  "handoffs": [
-    {{"from": "agent1", "to": ["agent2"], "description": "handoff description"}}
-  ],
-  "estimated_cost": {{
-    "total_estimated_cost": 450,
-    "currency": "EUR",
-    "breakdown_by_agent": {{"Agent1": 300, "Agent2": 150}}
-  }},
-  "rationale": "Brief explanation of team design"
-}}
-
-TEAM SIZING RULES (CRITICAL - FOLLOW EXACTLY):
-- Budget: junior=240€/month, senior=450€/month, expert=750€/month
-- TEAM SIZE CALCULATION:
-  * Budget <1500€: 1-2 agents
-  * Budget 1500-3000€: 3 agents  
-  * Budget 3000-5000€: 4 agents
-  * Budget 5000-8000€: 5 agents
-  * Budget 8000-12000€: 6 agents
-  * Budget >12000€: 7-8 agents
-- For €{budget_amount} budget: Create EXACTLY {min(8, max(3, int(budget_amount / 1500)))} agents
-- BUDGET UTILIZATION TARGET: Use 50-70% of available budget (€{int(budget_amount * 0.6)} target)
-- MIX SENIORITIES STRATEGICALLY:
-  * High budget (>8000€): Include 2-3 EXPERT agents + 2-3 SENIOR + remaining JUNIOR
-  * Medium budget (3000-8000€): Include 1 EXPERT + majority SENIOR + 1-2 JUNIOR
-  * Low budget (<3000€): Mostly SENIOR with 1 JUNIOR
-- Always include 1 Project Manager (senior) if team >1
-- Tools: web_search for senior+, file_search for research roles
-- AGENT NAMES: Use format "NomeCognome" (e.g., "ElenaRossi", "MarcoBianchi")
-
-RESPOND WITH ONLY THE JSON - NO OTHER TEXT."""
-        # 🔧 OPTIMIZATION: No tools needed for single-call approach
-        available_tools_list = []
-        llm_director_agent = OpenAIAgent(
-            name="DetailedTeamDirectorLLM",
-            instructions=director_instructions,
-            model="gpt-4o-mini",  # 💰 COST-OPTIMIZED: Use cost-effective model
-            model_settings=create_model_settings(
-                temperature=0.3  # Good balance for creative but consistent teams
-            ),
-            tools=available_tools_list,
-        )
+        llm_director_agent = _get_director_llm_agent()
         try:
-            # 🚀 PERFORMANCE: Single direct prompt for immediate JSON response
-            initial_user_prompt = (
-                "Generate the complete team proposal JSON now. "
-                "No analysis needed - respond immediately with the JSON structure."
+            # 🚀 PERFORMANCE: only the per-call data is sent after the static rules
+            initial_user_prompt = _dumps(
+                {
+                    "project": proposal_request.requirements,
+                    "budget_eur": budget_amount,
+                    "team_size": max_team_for_performance,
+                    "budget_target_eur": int(budget_amount * 0.6),
+                    "seniority_mix": _director_seniority_mix(budget_amount),
+                }
             )
             
             # 🔧 CRITICAL FIX: Add timeout to prevent hanging
-            import asyncio
-            import time
             start_time = time.time()
             
-            # 🚀 SIMPLE: Just use longer timeout for all projects
-            timeout_seconds = 180.0  # 3 minutes should be enough for any project
-                
+            # 🚀 Mini model + structured output: a short deadline is enough
+            timeout_seconds = DIRECTOR_TIMEOUT_SECONDS
+
+            # ⚡ PRE-WARM: build the fallback proposal while the LLM runs, so
+            # timeout/parse-failure recovery doesn't add its latency afterwards
+            fallback_task = asyncio.create_task(
+                self._create_fallback_dict_async(proposal_request)
+            )
+
+            # Single owner for the pre-warm task: cancelled however the run or
+            # the parse ends (timeout, API/guardrail/session error, success)
             try:
-                # 🧠 SDK MEMORY: Create session for Director agent memory persistence
-                director_session = None
                 try:
-                    # Try using SDK native SQLiteSession first
+                    # 🧠 SDK MEMORY: Create session for Director agent memory persistence
+                    director_session = None
+                    try:
+                        # Try using SDK native SQLiteSession first
+                        if SDK_AVAILABLE:
+                            from agents import SQLiteSession
+                            director_session = SQLiteSession(f"director_{str(proposal_request.workspace_id)[:8]}")
+                            logger.info(f"🌉 Created SDK SQLiteSession for Director in workspace {str(proposal_request.workspace_id)[:8]}...")
+                        else:
+                            # Fallback to our custom bridge
+                            director_session = create_workspace_session(
+                                workspace_id=str(proposal_request.workspace_id),
+                                agent_id="director_agent"
+                            )
+                            logger.info(f"🌉 Created custom session for Director in workspace {str(proposal_request.workspace_id)[:8]}...")
+                    except Exception as session_error:
+                        logger.warning(f"⚠️ Director session creation failed, proceeding without memory: {session_error}")
+                
+                    # Run with session for memory persistence (as per SDK documentation)
+                    run_params = {"starting_agent": llm_director_agent, "input": initial_user_prompt}
+                    if director_session:
+                        run_params["session"] = director_session
+                
                     if SDK_AVAILABLE:
-                        from agents import SQLiteSession
-                        director_session = SQLiteSession(f"director_{str(proposal_request.workspace_id)[:8]}")
-                        logger.info(f"🌉 Created SDK SQLiteSession for Director in workspace {str(proposal_request.workspace_id)[:8]}...")
+                        # ⚡ STREAMING: usable as soon as the JSON closes; stalls fail fast
+                        streamed_output = await asyncio.wait_for(
+                            _run_director_streamed(
+                                llm_director_agent, initial_user_prompt, director_session
+                            ),
+                            timeout=timeout_seconds,
+                        )
+                        run_result_obj = SimpleNamespace(final_output=streamed_output)
                     else:
-                        # Fallback to our custom bridge
-                        director_session = create_workspace_session(
-                            workspace_id=str(proposal_request.workspace_id),
-                            agent_id="director_agent"
+                        run_result_obj = await asyncio.wait_for(
+                            Runner.run(**run_params),
+                            timeout=timeout_seconds
                         )
-                        logger.info(f"🌉 Created custom session for Director in workspace {str(proposal_request.workspace_id)[:8]}...")
-                except Exception as session_error:
-                    logger.warning(f"⚠️ Director session creation failed, proceeding without memory: {session_error}")
-                
-                # Run with session for memory persistence (as per SDK documentation)
-                run_params = {"starting_agent": llm_director_agent, "input": initial_user_prompt}
-                if director_session:
-                    run_params["session"] = director_session
-                
-                run_result_obj = await asyncio.wait_for(
-                    Runner.run(**run_params), 
-                    timeout=timeout_seconds
-                )
-                execution_time = time.time() - start_time
-                logger.info(f"✅ Director Runner.run completed successfully in {execution_time:.1f}s")
+                    execution_time = time.time() - start_time
+                    logger.info(f"✅ Director Runner.run completed successfully in {execution_time:.1f}s")
                 
-                # Performance warning if taking too long
-                if execution_time > 60:
-                    logger.warning(f"⚠️ Director taking {execution_time:.1f}s - consider further optimization")
+                    # Performance warning if taking too long
+                    if execution_time > timeout_seconds / 2:
+                        logger.warning(f"⚠️ Director taking {execution_time:.1f}s - consider further optimization")
                     
-            except asyncio.TimeoutError:
-                logger.error(f"❌ Director Runner.run timed out after {timeout_seconds} seconds - using intelligent fallback")
-                logger.info("🔄 Fallback will provide a reasonable team structure based on goals")
-                # Create a robust fallback proposal when AI times out
-                fallback_dict = self._create_fallback_dict(proposal_request)
-                raw_llm_output_json_str = json.dumps(fallback_dict)
-                run_result_obj = None  # We'll handle this below
+                except asyncio.TimeoutError:
+                    logger.error(f"❌ Director Runner.run timed out after {timeout_seconds} seconds - using intelligent fallback")
+                    logger.info("🔄 Fallback will provide a reasonable team structure based on goals")
+                    # Create a robust fallback proposal when AI times out
+                    # Already built in the background; kept as a dict (no dump/re-parse)
+                    raw_llm_output_json_str = await fallback_task
+                    run_result_obj = None  # We'll handle this below
             
-            if run_result_obj is not None:
-                raw_llm_output_json_str = run_result_obj.final_output
-            # else: raw_llm_output_json_str already set in timeout case
+                if run_result_obj is not None:
+                    raw_llm_output_json_str = run_result_obj.final_output
+                # else: raw_llm_output_json_str already set in timeout case
             
-            logger.debug(
-                f"Director LLM raw output for proposal: {raw_llm_output_json_str}"
-            )
+                # Lazy %-formatting: the payload is only rendered when debug is on
+                logger.debug(
+                    "Director LLM raw output for proposal: %s", raw_llm_output_json_str
+                )
 
-            try:
-                # 🤖 PILLAR 2: AI-DRIVEN PARSING
-                # Use Pydantic for robust, AI-aware JSON validation instead of fragile text parsing.
-                from models import AITeamProposal
-                
-                # This single line replaces complex regex and multiple json.loads calls.
-                # It will automatically handle variations in the LLM's output, as long
-                # as the core fields defined in AITeamProposal are present.
-                ai_proposal = AITeamProposal.model_validate_json(raw_llm_output_json_str)
-                proposal_dict = ai_proposal.model_dump(by_alias=True) # Use by_alias=True for handoffs
+                try:
+                    # 🤖 PILLAR 2: AI-DRIVEN PARSING
+                    # Use Pydantic for robust, AI-aware JSON validation instead of fragile text parsing.
+                    from models import AITeamProposal
+
+                    ai_proposal: Optional[AITeamProposal] = None
+                    if isinstance(raw_llm_output_json_str, TeamProposalOutput):
+                        # Structured output: already schema-valid, no text parsing
+                        candidate = raw_llm_output_json_str.to_proposal_dict()
+                    elif isinstance(raw_llm_output_json_str, dict):
+                        candidate = raw_llm_output_json_str  # timeout fallback
+                    else:
+                        try:
+                            # ⚡ Bare JSON: pydantic-core parses and validates in one pass
+                            ai_proposal = AITeamProposal.model_validate_json(raw_llm_output_json_str)
+                        except ValidationError:
+                            pass
+                        # Otherwise one raw_decode scan handles fenced or prose-wrapped
+                        # JSON; Pydantic then accepts variations as long as the core
+                        # fields defined in AITeamProposal are present.
+                        candidate = (
+                            None if ai_proposal is not None
+                            else _extract_json(raw_llm_output_json_str, "{", required_key="agents")
+                        )
+                    if ai_proposal is None:
+                        if candidate is None:
+                            raise ValueError("no JSON object found in Director output")
+                        ai_proposal = AITeamProposal.model_validate(candidate)
+                    proposal_dict = ai_proposal.model_dump(by_alias=True) # Use by_alias=True for handoffs
 
-            except Exception as pydantic_error:
-                logger.error(
-                    f"Pydantic validation failed for AI proposal: {pydantic_error}. Raw output: {raw_llm_output_json_str[:300]}"
-                )
-                # If Pydantic fails, it means the output is fundamentally broken, so we use a safe fallback.
-                proposal_dict = self._create_fallback_dict(proposal_request)
+                except Exception as pydantic_error:
+                    logger.error(
+                        f"Pydantic validation failed for AI proposal: {pydantic_error}. Raw output: {str(raw_llm_output_json_str)[:300]}"
+                    )
+                    # If Pydantic fails, it means the output is fundamentally broken, so we use a safe fallback.
+                    proposal_dict = await fallback_task
+            finally:
+                if not fallback_task.done():
+                    fallback_task.cancel()
 
             # Validate and sanitize the dictionary before creating Pydantic models
             validated_proposal_data = self._validate_and_sanitize_proposal(
                 proposal_dict, proposal_request
             )
 
-            agents_create_obj_list: List[AgentCreate] = []
-            for agent_spec_dict in validated_proposal_data.get("agents", []):
+            agent_specs: List[Dict[str, Any]] = validated_proposal_data.get("agents", [])
+            for agent_spec_dict in agent_specs:
                 agent_spec_dict["workspace_id"] = (
                     proposal_request.workspace_id
                 )  # Ensure UUID is passed
 
                 # Robust seniority handling before Pydantic model creation
-                s_input = agent_spec_dict.get("seniority")
-                s_value_str: str
-                if isinstance(s_input, AgentSeniority):
-                    s_value_str = s_input.value
-                elif isinstance(s_input, str):
-                    s_value_str = s_input.lower()
-                else:
-                    s_value_str = AgentSeniority.JUNIOR.value  # Default
-                try:
-                    agent_spec_dict["seniority"] = AgentSeniority(
-                        s_value_str
-                    )  # Convert to Enum for Pydantic
-                except ValueError:
-                    agent_spec_dict["seniority"] = AgentSeniority.JUNIOR
+                agent_spec_dict["seniority"] = _coerce_seniority(
+                    agent_spec_dict.get("seniority")
+                )
 
                 # Ensure tools is a list of dicts
                 tools_list_sanitized: List[Dict[str, str]] = []
                 raw_tools = agent_spec_dict.get("tools", [])
                 if isinstance(raw_tools, list):
+                    add_tool = tools_list_sanitized.append
                     for t_item in raw_tools:
-                        if isinstance(t_item, str):  # If tool is just a name string
-                            tools_list_sanitized.append(
+                        # Exact types (parsed JSON / internal specs); dicts are the common case
+                        t_type = type(t_item)
+                        if t_type is dict:
+                            if "name" not in t_item:
+                                continue
+                            # Copy only when keys are missing; specs own their tool dicts
+                            if "type" not in t_item or "description" not in t_item:
+                                t_item = {
+                                    "type": "function",
+                                    "description": f"Tool: {t_item['name']}",
+                                    **t_item,
+                                }
+                            add_tool(t_item)  # type: ignore
+                        elif t_type is str:  # If tool is just a name string
+                            add_tool(
                                 {
                                     "name": t_item,
                                     "type": "function",
                                     "description": f"Tool: {t_item}",
                                 }
                             )
-                        elif isinstance(t_item, dict) and "name" in t_item:
-                            t_item.setdefault("type", "function")
-                            t_item.setdefault("description", f"Tool: {t_item['name']}")
-                            tools_list_sanitized.append(t_item)  # type: ignore
                 agent_spec_dict["tools"] = tools_list_sanitized
 
                 # 🔧 FIX: Calculate estimated_monthly_cost based on seniority
                 if "estimated_monthly_cost" not in agent_spec_dict:
-                    seniority = agent_spec_dict.get("seniority", AgentSeniority.JUNIOR)
-                    if isinstance(seniority, AgentSeniority):
-                        agent_spec_dict["estimated_monthly_cost"] = COST_PER_MONTH[seniority.value]
-                    else:
-                        agent_spec_dict["estimated_monthly_cost"] = COST_PER_MONTH[AgentSeniority.JUNIOR.value]
+                    agent_spec_dict["estimated_monthly_cost"] = COST_PER_MONTH[
+                        agent_spec_dict["seniority"].value
+                    ]
 
-                try:
-                    agents_create_obj_list.append(AgentCreate(**agent_spec_dict))
-                except Exception as e_ac:  # Catch Pydantic validation errors etc.
-                    logger.error(
-                        f"Error creating AgentCreate for agent '{agent_spec_dict.get('name')}': {e_ac}",
-                        exc_info=True,
-                    )
+            # ⚡ Validate the whole team in one call; only when some agent is
+            # invalid, retry one by one so the valid ones are kept
+            agents_create_obj_list: List[AgentCreate]
+            try:
+                agents_create_obj_list = _AGENT_CREATE_LIST_ADAPTER.validate_python(agent_specs)
+            except ValidationError:
+                agents_create_obj_list = []
+                for agent_spec_dict in agent_specs:
+                    try:
+                        agents_create_obj_list.append(AgentCreate(**agent_spec_dict))
+                    except ValidationError as e_ac:  # anything else reaches the outer handler
+                        logger.error(
+                            "Error creating AgentCreate for agent '%s': %s",
+                            agent_spec_dict.get("name"),
+                            e_ac.errors(include_url=False),
+                        )
 
-            handoffs_obj_list: List[DirectorHandoffProposal] = []
+            handoff_specs: List[Dict[str, Any]] = []
             for h_spec in validated_proposal_data.get("handoffs", []):
                 if h_spec.get("from") and h_spec.get("to"):
                     # Ensure 'to' is List[str] for DirectorHandoffProposal
                     if isinstance(h_spec["to"], str):
                         h_spec["to"] = [h_spec["to"]]
+                    handoff_specs.append(h_spec)
+
+            handoffs_obj_list: List[DirectorHandoffProposal]
+            try:
+                handoffs_obj_list = _HANDOFF_PROPOSAL_LIST_ADAPTER.validate_python(handoff_specs)
+            except ValidationError:
+                handoffs_obj_list = []
+                for h_spec in handoff_specs:
                     try:
                         handoffs_obj_list.append(DirectorHandoffProposal(**h_spec))
-                    except Exception as e_hc:  # Catch Pydantic validation errors etc.
+                    except ValidationError as e_hc:  # anything else reaches the outer handler
                         logger.warning(
-                            f"Skipping invalid handoff spec {h_spec}: {e_hc}"
+                            "Skipping invalid handoff spec %s: %s",
+                            h_spec,
+                            e_hc.errors(include_url=False),
                         )
 
             extra_data_for_proposal: Dict[str, Any] = {}
-            if hasattr(proposal_request, "user_feedback") and proposal_request.user_feedback:
-                extra_data_for_proposal["user_feedback"] = proposal_request.user_feedback
+            user_feedback = getattr(proposal_request, "user_feedback", None)
+            if user_feedback:
+                extra_data_for_proposal["user_feedback"] = user_feedback
 
             return DirectorTeamProposal(
                 workspace_id=proposal_request.workspace_id,  # UUID
@@ -1548,13 +2504,21 @@ RESPOND WITH ONLY THE JSON - NO OTHER TEXT."""
         # 2. Ensure unique agent names
         final_agents_list: List[Dict[str, Any]] = []
         seen_agent_names: Set[str] = set()
+        # Next suffix per base name: minting resumes where it stopped instead
+        # of rescanning _1, _2, ... on every duplicate
+        name_counts: Dict[str, int] = {}
         for idx, agent_data in enumerate(agents_list):
+            if not isinstance(agent_data, dict):
+                logger.warning(f"Skipping non-dict agent entry at index {idx}.")
+                continue
             base_name = agent_data.get("name", f"Agent{idx+1}")
-            current_name = base_name
-            name_idx = 1
+            name_idx = name_counts.get(base_name, 0)
+            current_name = base_name if name_idx == 0 else f"{base_name}_{name_idx}"
+            # Still guard against a literal "X_1" supplied by the LLM
             while current_name in seen_agent_names:
-                current_name = f"{base_name}_{name_idx}"
                 name_idx += 1
+                current_name = f"{base_name}_{name_idx}"
+            name_counts[base_name] = name_idx + 1
             if current_name != base_name:
                 logger.info(
                     f"Sanitized agent name from '{base_name}' to '{current_name}'."
@@ -1562,54 +2526,10 @@ RESPOND WITH ONLY THE JSON - NO OTHER TEXT."""
             agent_data["name"] = current_name
             seen_agent_names.add(current_name)
 
-            # Normalize case for enum values to fix Pydantic validation errors
-            # Fix personality_traits enum values
-            if "personality_traits" in agent_data and isinstance(
-                agent_data["personality_traits"], list
-            ):
-                sanitized_traits = []
-                for trait in agent_data["personality_traits"]:
-                    if isinstance(trait, str):
-                        # Replace underscores with hyphens for enum compatibility
-                        normalized_trait = trait.lower().replace("_", "-")
-                        sanitized_traits.append(normalized_trait)
-                    else:
-                        sanitized_traits.append(trait)
-
-                agent_data["personality_traits"] = sanitized_traits
-
-            # Fix communication_style enum value
-            if "communication_style" in agent_data and isinstance(
-                agent_data["communication_style"], str
-            ):
-                agent_data["communication_style"] = agent_data[
-                    "communication_style"
-                ].lower()
-
-            # Fix skill levels in hard_skills
-            if "hard_skills" in agent_data and isinstance(
-                agent_data["hard_skills"], list
-            ):
-                for skill in agent_data["hard_skills"]:
-                    if (
-                        isinstance(skill, dict)
-                        and "level" in skill
-                        and isinstance(skill["level"], str)
-                    ):
-                        skill["level"] = skill["level"].lower()
-
-            # Fix skill levels in soft_skills
-            if "soft_skills" in agent_data and isinstance(
-                agent_data["soft_skills"], list
-            ):
-                for skill in agent_data["soft_skills"]:
-                    if (
-                        isinstance(skill, dict)
-                        and "level" in skill
-                        and isinstance(skill["level"], str)
-                    ):
-                        skill["level"] = skill["level"].lower()
-
+            if not agent_data.pop("_presanitized", False):
+                _normalize_agent_enums(agent_data)
+            # Lowercased role computed once, reused by the manager and handoff checks
+            agent_data["_role_lc"] = str(agent_data.get("role") or "").lower()
             final_agents_list.append(agent_data)
 
         data["agents"] = final_agents_list
@@ -1617,13 +2537,14 @@ RESPOND WITH ONLY THE JSON - NO OTHER TEXT."""
         # 3. Ensure at least 1 manager if team has more than 1 agent
         if len(data["agents"]) > 1:
             is_manager_present = any(
-                "manager" in a.get("role", "").lower() for a in data["agents"]
+                "manager" in a["_role_lc"] for a in data["agents"]
             )
             if not is_manager_present and data["agents"]:  # Ensure list is not empty
                 logger.info(
                     "No manager in team > 1. Promoting first agent to Project Manager."
                 )
                 data["agents"][0]["role"] = "Project Manager"
+                data["agents"][0]["_role_lc"] = "project manager"
                 data["agents"][0][
                     "seniority"
                 ] = AgentSeniority.SENIOR.value  # Ensure it's the string value
@@ -1635,6 +2556,8 @@ RESPOND WITH ONLY THE JSON - NO OTHER TEXT."""
         # 4. Validate handoffs
         raw_handoffs = data.get("handoffs", [])
         data["handoffs"] = self._validate_handoffs_list(raw_handoffs, data["agents"])
+        for agent_data in data["agents"]:
+            agent_data.pop("_role_lc", None)
 
         # 5. Ensure other fields exist
         data.setdefault(
@@ -1651,11 +2574,14 @@ RESPOND WITH ONLY THE JSON - NO OTHER TEXT."""
     ) -> List[Dict[str, Any]]:
         """Validates a list of handoff specifications."""
         agent_name_to_role_map = {
-            a["name"]: a.get("role", "").lower()
+            a["name"]: a["_role_lc"] if "_role_lc" in a else a.get("role", "").lower()
             for a in agents_list_validated
             if "name" in a
         }
         valid_agent_names: Set[str] = set(agent_name_to_role_map.keys())
+        manager_agents: Set[str] = {
+            n for n, r in agent_name_to_role_map.items() if "manager" in r
+        }
 
         final_valid_handoffs: List[Dict[str, Any]] = []
         if not isinstance(handoffs_list_raw, list):
@@ -1679,9 +2605,12 @@ RESPOND WITH ONLY THE JSON - NO OTHER TEXT."""
             if isinstance(raw_target_agent_names, str):  # Single target string
                 current_handoff_targets = [raw_target_agent_names]
             elif isinstance(raw_target_agent_names, list):  # List of target strings
-                current_handoff_targets = [
-                    tgt for tgt in raw_target_agent_names if isinstance(tgt, str)
-                ]
+                # dict.fromkeys: drop repeated targets while keeping order
+                current_handoff_targets = list(
+                    dict.fromkeys(
+                        tgt for tgt in raw_target_agent_names if isinstance(tgt, str)
+                    )
+                )
 
             validated_targets_for_handoff: List[str] = []
             for target_name_candidate in current_handoff_targets:
@@ -1699,9 +2628,8 @@ RESPOND WITH ONLY THE JSON - NO OTHER TEXT."""
                 # Check for manager-to-manager handoff of the same type
                 src_role_str = agent_name_to_role_map.get(src_agent_name, "")
                 target_role_str = agent_name_to_role_map.get(target_name_candidate, "")
-                if (
-                    self._is_same_role_type(src_role_str, target_role_str)
-                    and "manager" in src_role_str
+                if src_agent_name in manager_agents and self._is_same_role_type(
+                    src_role_str, target_role_str
                 ):
                     logger.warning(
                         f"Preventing manager-to-manager handoff between similar roles: {src_agent_name} ({src_role_str}) -> {target_name_candidate} ({target_role_str})."
@@ -1727,19 +2655,18 @@ RESPOND WITH ONLY THE JSON - NO OTHER TEXT."""
         logger.info("Creating fallback proposal dictionary.")
         # Pass budget_constraint and project goal to _create_default_agents for smart fallback
         default_agents_list = self._create_default_agents(proposal_request.budget_limit, proposal_request.requirements)
-
-        total_est_cost = sum(
-            agent.get(
-                "estimated_monthly_cost", COST_PER_MONTH[AgentSeniority.JUNIOR.value]
-            )
-            for agent in default_agents_list
-        )
-        breakdown = {
-            agent.get("name", f"DefaultAgent{i}"): agent.get(
-                "estimated_monthly_cost", COST_PER_MONTH[AgentSeniority.JUNIOR.value]
-            )
-            for i, agent in enumerate(default_agents_list)
-        }
+        # Internal specs already use canonical enum casing: sanitizing skips them
+        for agent in default_agents_list:
+            agent["_presanitized"] = True
+
+        # Total and per-agent breakdown in one pass
+        default_cost = COST_PER_MONTH[_JUNIOR]
+        total_est_cost = 0
+        breakdown: Dict[str, Any] = {}
+        for i, agent in enumerate(default_agents_list):
+            cost = agent.get("estimated_monthly_cost", default_cost)
+            total_est_cost += cost
+            breakdown[agent.get("name", f"DefaultAgent{i}")] = cost
         return {
             "agents": default_agents_list,
             "handoffs": [],
@@ -1751,9 +2678,29 @@ RESPOND WITH ONLY THE JSON - NO OTHER TEXT."""
             "rationale": "Fallback minimal team due to an issue in proposal generation. Please review.",
         }
 
+    async def _create_fallback_dict_async(
+        self, proposal_request: DirectorTeamProposal
+    ) -> Dict[str, Any]:
+        """``_create_fallback_dict`` off the event loop, with a TTL cache; returns a private copy."""
+        key = (
+            hashlib.sha1((proposal_request.requirements or "").encode("utf-8")).hexdigest(),
+            proposal_request.budget_limit,
+        )
+        entry = _FALLBACK_PROPOSAL_CACHE.get(key)
+        if entry is not None and time.monotonic() - entry[0] <= FALLBACK_PROPOSAL_CACHE_TTL_SECONDS:
+            _FALLBACK_PROPOSAL_CACHE.move_to_end(key)
+            return copy.deepcopy(entry[1])
+        fallback_dict = await asyncio.to_thread(self._create_fallback_dict, proposal_request)
+        _FALLBACK_PROPOSAL_CACHE[key] = (time.monotonic(), fallback_dict)
+        _FALLBACK_PROPOSAL_CACHE.move_to_end(key)
+        while len(_FALLBACK_PROPOSAL_CACHE) > FALLBACK_PROPOSAL_CACHE_MAX_SIZE:
+            _FALLBACK_PROPOSAL_CACHE.popitem(last=False)
+        # Callers sanitize proposals in place: never hand out the cached object
+        return copy.deepcopy(fallback_dict)
+
     def _create_default_agents(
         self, budget_constraint_data: Optional[Union[Dict[str, Any], float]] = None, project_goal: str = ""
-    ) -> List[Dict[str, Any]]:
+    ) -> List[_AgentSpec]:
         """Creates a budget-aware and domain-specific list of agent specifications for fallback."""
         logger.debug("Creating smart fallback agents set based on budget and domain.")
         current_budget = 1000.0  # Default budget if parsing fails or not provided
@@ -1769,7 +2716,7 @@ RESPOND WITH ONLY THE JSON - NO OTHER TEXT."""
 
         # Domain-specific agent templates based on project goal
         goal_lower = project_goal.lower() if project_goal else ""
-        agents_list_default: List[Dict[str, Any]] = []
+        agents_list_default: List[_AgentSpec] = []
         
         # 🤖 CONFIGURABLE DOMAIN DETECTION (supports AI-driven + keyword fallback)
         # This enables domain-agnostic team generation for ANY business sector
@@ -1807,7 +2754,7 @@ RESPOND WITH ONLY THE JSON - NO OTHER TEXT."""
 
 Your role: Remove barriers so specialists produce final, substantial deliverables directly.""",
             "llm_config": {
-                "model": self._get_model_for_seniority(AgentSeniority.SENIOR.value),
+                "model": self._get_model_for_seniority(AgentSeniority.SENIOR),
                 "temperature": 0.3,
             },
             "tools": self._get_tools_for_role(
@@ -2128,24 +3075,14 @@ Your role: Remove barriers so specialists produce final, substantial deliverable
         for agent_s in fallback_data_dict.get("agents", []):
             agent_s["workspace_id"] = proposal_request.workspace_id  # UUID
             # Ensure seniority is Enum for AgentCreate
-            s_val_str = agent_s.get("seniority", AgentSeniority.JUNIOR.value)
-            if isinstance(s_val_str, Enum):
-                s_val_str = s_val_str.value  # if already enum, get value
-            try:
-                agent_s["seniority"] = AgentSeniority(s_val_str.lower())
-            except:
-                agent_s["seniority"] = AgentSeniority.JUNIOR
+            agent_s["seniority"] = _coerce_seniority(agent_s.get("seniority"))
 
             # 🔧 FIX: Add estimated_monthly_cost for minimal fallback agents
             if "estimated_monthly_cost" not in agent_s:
-                seniority = agent_s.get("seniority", AgentSeniority.JUNIOR)
-                if isinstance(seniority, AgentSeniority):
-                    agent_s["estimated_monthly_cost"] = COST_PER_MONTH[seniority.value]
-                else:
-                    agent_s["estimated_monthly_cost"] = COST_PER_MONTH[AgentSeniority.JUNIOR.value]
+                agent_s["estimated_monthly_cost"] = COST_PER_MONTH[agent_s["seniority"].value]
 
             try:
-                minimal_agents_list.append(AgentCreate(**agent_s))
+                minimal_agents_list.append(_trusted_agent_create(agent_s))
             except Exception as e_ac_fb:
                 logger.error(
                     f"Error creating AgentCreate in minimal fallback: {e_ac_fb}"
@@ -2154,22 +3091,21 @@ Your role: Remove barriers so specialists produce final, substantial deliverable
         if not minimal_agents_list:  # Ensure at least one agent always
             panic_agent_spec = self._create_default_agents(proposal_request.budget_limit, proposal_request.requirements)[0]  # Get the PM spec
             panic_agent_spec["workspace_id"] = proposal_request.workspace_id
-            panic_agent_spec["seniority"] = AgentSeniority(
-                panic_agent_spec["seniority"]
+            panic_agent_spec["seniority"] = _coerce_seniority(
+                panic_agent_spec.get("seniority")
             )
             # 🔧 FIX: Add estimated_monthly_cost for panic agent
             if "estimated_monthly_cost" not in panic_agent_spec:
-                seniority = panic_agent_spec.get("seniority", AgentSeniority.JUNIOR)
-                if isinstance(seniority, AgentSeniority):
-                    panic_agent_spec["estimated_monthly_cost"] = COST_PER_MONTH[seniority.value]
-                else:
-                    panic_agent_spec["estimated_monthly_cost"] = COST_PER_MONTH[AgentSeniority.JUNIOR.value]
-            minimal_agents_list.append(AgentCreate(**panic_agent_spec))
+                panic_agent_spec["estimated_monthly_cost"] = COST_PER_MONTH[
+                    panic_agent_spec["seniority"].value
+                ]
+            minimal_agents_list.append(_trusted_agent_create(panic_agent_spec))
             logger.warning(
                 "Panic: Created an ultra-minimal agent as last resort in fallback proposal."
             )
 
-        return DirectorTeamProposal(
+        # trusted: internally generated, every field already has its final type
+        return DirectorTeamProposal.model_construct(
             workspace_id=proposal_request.workspace_id,  # UUID
             agents=minimal_agents_list,
             handoffs=[],  # No handoffs in minimal fallback
@@ -2179,70 +3115,30 @@ Your role: Remove barriers so specialists produce final, substantial deliverable
 
     # Helper methods for instance use (e.g., in _create_default_agents, _create_minimal_fallback_proposal)
     # These are kept as instance methods for potential future use of 'self' if needed.
-    def _get_model_for_seniority(self, seniority_value_str: str) -> str:
-        """Get appropriate LLM model based on agent seniority string value."""
-        return MODEL_BY_SENIORITY.get(
-            seniority_value_str.lower(), MODEL_BY_SENIORITY[AgentSeniority.JUNIOR.value]
-        )
+    def _get_model_for_seniority(self, seniority: Union[AgentSeniority, str]) -> str:
+        """Get appropriate LLM model based on agent seniority (enum or string value)."""
+        # AgentSeniority is a str enum, so members hit the str-keyed table
+        # directly; only non-canonical strings pay for .lower()
+        model = MODEL_BY_SENIORITY.get(seniority)
+        if model is None:
+            model = MODEL_BY_SENIORITY.get(
+                str(seniority).lower(), MODEL_BY_SENIORITY[_JUNIOR]
+            )
+        return model
 
     def _get_tools_for_role(
         self, role_str: str, seniority_value_str: str
     ) -> List[Dict[str, str]]:
         """Get appropriate tools based on agent role and seniority string values."""
         tools_output: List[Dict[str, str]] = []
-        role_l = role_str.lower()
-        seniority_l = seniority_value_str.lower()
+        role_tokens = set(_ROLE_TOKEN_RE.findall(role_str.lower()))
 
         if (
-            seniority_l in [AgentSeniority.SENIOR.value, AgentSeniority.EXPERT.value]
-            or "manager" in role_l
+            seniority_value_str.lower() in _WEB_SEARCH_SENIORITIES
+            or "manager" in role_tokens
         ):
-            tools_output.append(
-                {
-                    "type": "web_search",
-                    "name": "web_search",
-                    "description": "Enables searching the web for current information.",
-                }
-            )
+            tools_output.append({**_WEB_SEARCH_TOOL})
 
-        if any(
-            keyword in role_l
-            for keyword in [
-                "content",
-                "writing",
-                "research",
-                "analysis",
-                "marketing",
-                "manager",
-            ]
-        ):
-            tools_output.append(
-                {
-                    "type": "file_search",
-                    "name": "file_search",
-                    "description": "Enables searching through provided documents and knowledge base.",
-                }
-            )
+        if role_tokens & _FILE_SEARCH_ROLES:
+            tools_output.append({**_FILE_SEARCH_TOOL})
         return tools_output
-
-    def _create_specialist_prompt(self, role_str: str, skills_list: List[str]) -> str:
-        """Create a standardized system prompt for specialist agents."""
-        skills_str_display = (
-            ", ".join(skills_list)
-            if skills_list
-            else "assigned tasks according to your role"
-        )
-        return f"""You are a {role_str}. Your expertise covers: {skills_str_display}.
-
-🎯 EXECUTION-FIRST PRINCIPLES:
-1. PRODUCE CONCRETE DELIVERABLES: Create actual content, data, documents, or code - not plans or todo lists.
-2. NO SUB-TASK CREATION: If asked to "research competitors," provide the actual competitor list with details, not a research plan.
-3. SINGLE-STEP COMPLETION: Finish tasks completely in one execution cycle.
-4. REAL DATA OVER TEMPLATES: Generate actual emails, contacts, reports - not "template for emails" or "example reports."
-5. ESCALATE ONLY FOR BLOCKERS: Only escalate if you need external resources or permissions, not for task breakdown.
-
-EXAMPLES:
-❌ Bad: "Here's a plan to research target audience: 1. Identify demographics 2. Analyze preferences..."
-✅ Good: "Target Audience: Age 25-40, Income €40K-€80K, Location: Milan/Rome, Interests: Tech/Sustainability..."
-
-Execute tasks directly and provide substantial, actionable results."""
@@ -0,0 +1,244 @@
+"""
+Pure synchronous helpers for the Director's team design.
+
+No I/O, no async and no SDK imports: everything here is plain typed Python so
+the module can be compiled ahead-of-time (e.g. with mypyc) without touching the
+LLM code in ``director.py``, which imports these names.
+"""
+
+import logging
+import random
+import re
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Any, Dict, FrozenSet, List, Mapping, Optional, Set, Tuple
+
+try:
+    from models import AgentSeniority
+except Exception:  # pragma: no cover - fallback if wrong module on path
+    from backend.models import AgentSeniority  # type: ignore
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+# ---------------------------------------------------------------------------
+# Module‑level constants (single source of truth)
+# ---------------------------------------------------------------------------
+MAX_TEAM_SIZE: int = 6  # hard cap per workspace
+
+# Enum values resolved once (read on every per-agent lookup)
+_JUNIOR: str = AgentSeniority.JUNIOR.value
+_SENIOR: str = AgentSeniority.SENIOR.value
+_EXPERT: str = AgentSeniority.EXPERT.value
+
+# Read-only views: these tables are configuration, never mutated at runtime
+RATES_PER_DAY: Mapping[str, int] = MappingProxyType(  # EUR/giorno
+    {_JUNIOR: 8, _SENIOR: 15, _EXPERT: 25}
+)
+COST_PER_MONTH: Mapping[str, int] = MappingProxyType(
+    {k: v * 30 for k, v in RATES_PER_DAY.items()}
+)
+MODEL_BY_SENIORITY: Mapping[str, str] = MappingProxyType(
+    {_JUNIOR: "gpt-4.1-nano", _SENIOR: "gpt-4.1-mini", _EXPERT: "gpt-4.1"}
+)
+
+# Most to least expensive, with monthly cost resolved once
+_SENIORITY_LADDER: Tuple[Tuple[str, int], ...] = tuple(
+    (s, COST_PER_MONTH[s]) for s in (_EXPERT, _SENIOR, _JUNIOR)
+)
+
+_SKILL_TOKEN_RE = re.compile(r"[a-z]+")
+
+# Skill words that signal a functionally complex project (universal across domains)
+_COMPLEXITY_KEYWORDS: FrozenSet[str] = frozenset(
+    {
+        "strategy", "analysis", "research", "optimization",
+        "implementation", "coordination", "management",
+        "multiple", "complex", "integration", "automation",
+    }
+)
+
+# Role keywords that indicate the agent needs file search
+_FILE_SEARCH_INDICATORS: Tuple[str, ...] = (
+    # research
+    "research", "analysis", "analyst", "content", "writer", "manager", "coordinator",
+    # documents
+    "review", "audit", "compliance", "legal", "documentation",
+    # information
+    "data", "information", "intelligence", "market", "competitive",
+)
+
+_PERSONA_FIRST_NAMES: Tuple[str, ...] = ("Alex", "Sam", "Jordan", "Morgan", "Taylor", "Casey", "Riley", "Avery", "Quinn", "Jamie")
+_PERSONA_LAST_NAMES: Tuple[str, ...] = ("Chen", "Smith", "Rodriguez", "Johnson", "Patel", "Wilson", "Garcia", "Martinez", "Lee", "Brown")
+
+
+# ---------------------------------------------------------------------------
+# Team sizing
+# ---------------------------------------------------------------------------
+def _budget_team_size(budget_total: float) -> int:
+    """Team size implied by the budget alone (EUR)."""
+    if budget_total >= 8000:
+        return 6
+    if budget_total >= 5000:
+        return 5
+    if budget_total >= 3000:
+        return 4
+    if budget_total >= 1500:
+        return 3
+    if budget_total >= 800:
+        return 2
+    return 1
+
+
+def _extract_budget(constraints: Mapping[str, Any]) -> float:
+    """
+    Budget (EUR) from a constraints dict: ``max_amount``/``max_cost`` at top
+    level, a scalar ``budget``, or the same keys nested under ``budget`` /
+    ``budget_constraint``. First positive numeric value wins; 0 when absent.
+    """
+    candidates: List[Any] = [constraints.get("max_amount"), constraints.get("max_cost")]
+    for key in ("budget", "budget_constraint"):
+        value = constraints.get(key)
+        if isinstance(value, Mapping):
+            candidates.append(value.get("max_amount"))
+            candidates.append(value.get("max_cost"))
+        else:
+            candidates.append(value)
+    for value in candidates:
+        if not value or isinstance(value, bool):
+            continue
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            continue
+    return 0.0
+
+
+def _skills_overlap(a: List[str], b: List[str]) -> float:
+    """Jaccard similarity of two skill lists, case/spacing-insensitive."""
+    norm_a: Set[str] = {s.strip().lower().replace(" ", "_") for s in a if s}
+    norm_b: Set[str] = {s.strip().lower().replace(" ", "_") for s in b if s}
+    if not norm_a or not norm_b:
+        return 0.0
+    return len(norm_a & norm_b) / len(norm_a | norm_b)
+
+
+def _calculate_optimal_team_size(
+    budget_total: float, required_skills: List[str], user_requested_size: Optional[int] = None
+) -> int:
+    """Calcola team size ottimale basato su budget e complessità"""
+
+    # If user explicitly requested a size, prioritize it (if within reasonable bounds)
+    if user_requested_size is not None and 1 <= user_requested_size <= MAX_TEAM_SIZE:
+        logger.info(f"🎯 Using user-requested team size: {user_requested_size}")
+        return user_requested_size
+
+    # Budget-based sizing (più aggressivo nell'utilizzare il budget)
+    budget_team_size = _budget_team_size(budget_total)
+
+    # Skill-based sizing
+    skill_complexity_score = len(required_skills)
+
+    # 🤖 UNIVERSAL COMPLEXITY BOOST: Based on functional patterns, not domains
+    skill_tokens: Set[str] = set()
+    for skill in required_skills:
+        skill_tokens.update(_SKILL_TOKEN_RE.findall(skill.lower()))
+    # Boost for functionally complex patterns (universal across domains)
+    if skill_tokens & _COMPLEXITY_KEYWORDS:
+        skill_complexity_score += 2
+
+    # Additional boost for cross-functional requirements
+    if len(required_skills) > 5:
+        skill_complexity_score += 1
+
+    skill_team_size = min(6, max(2, skill_complexity_score // 2 + 1))
+
+    # Prendi il massimo tra budget e skill sizing (più generoso)
+    optimal_size = max(budget_team_size, skill_team_size)
+
+    logger.info(
+        f"Optimal team calculation: budget_size={budget_team_size}, skill_size={skill_team_size}, final={optimal_size}"
+    )
+    return optimal_size
+
+
+# ---------------------------------------------------------------------------
+# Per-agent configuration
+# ---------------------------------------------------------------------------
+def _pick_seniority(
+    budget_per_slot: float, high_importance: bool, remaining_budget: float
+) -> Optional[str]:
+    """
+    Seniority for the next specialist: the highest level the per-slot budget
+    supports (expert only for high-importance groups), downgraded until it fits
+    the remaining budget. None when not even a junior fits.
+    """
+    for s_val, cost in _SENIORITY_LADDER:
+        if s_val == _EXPERT and not high_importance:
+            continue
+        if s_val != _JUNIOR and budget_per_slot < cost:
+            continue
+        if cost <= remaining_budget:
+            return s_val
+    return None
+
+
+def _get_model_for_design(s_val: str) -> str:
+    return MODEL_BY_SENIORITY.get(s_val.lower(), MODEL_BY_SENIORITY[_JUNIOR])
+
+
+def _role_needs_file_search_tool_sync(role_str: str) -> bool:
+    """
+    🤖 AI-DRIVEN: Synchronous version - determine if role needs file search capability
+    """
+    role_lower = role_str.lower()
+    return any(indicator in role_lower for indicator in _FILE_SEARCH_INDICATORS)
+
+
+_TOOL_DESCRIPTIONS: Mapping[str, str] = MappingProxyType(
+    {
+        "web_search": "Enables web searching for current information.",
+        "file_search": "Enables searching through provided documents.",
+    }
+)
+
+
+@lru_cache(maxsize=128)
+def _tool_names_for_design(role_lower: str, s_lower: str) -> Tuple[str, ...]:
+    """Tool names per (role, seniority); the domain is small, so results are memoized."""
+    names: List[str] = []
+    if s_lower in (_SENIOR, _EXPERT) or "manager" in role_lower:
+        names.append("web_search")
+    # 🤖 AI-DRIVEN: Determine tool needs based on role semantics
+    if _role_needs_file_search_tool_sync(role_lower):
+        names.append("file_search")
+    return tuple(names)
+
+
+def _get_tools_for_design(
+    role_str: str, s_val: str
+) -> List[Dict[str, str]]:
+    # Fresh dicts per call: proposal sanitizing mutates tool entries in place
+    return [
+        {"type": name, "name": name, "description": _TOOL_DESCRIPTIONS[name]}
+        for name in _tool_names_for_design(role_str.lower(), s_val.lower())
+    ]
+
+
+def _generate_personality_fallback(role_str: str) -> Dict[str, Any]:
+    """🔄 FALLBACK: Basic personality generation when AI unavailable"""
+    return {
+        "first_name": random.choice(_PERSONA_FIRST_NAMES),
+        "last_name": random.choice(_PERSONA_LAST_NAMES),
+        "bio": "",
+        "personality_traits": ["PROFESSIONAL", "RELIABLE", "ADAPTABLE"],
+        "communication_style": "COLLABORATIVE",
+        "soft_skills": [
+            {"name": "Communication", "level": "ADVANCED"},
+            {"name": "Problem Solving", "level": "ADVANCED"}
+        ],
+        "hard_skills": [
+            {"name": "Technical Proficiency", "level": "ADVANCED"},
+            {"name": "Domain Knowledge", "level": "INTERMEDIATE"}
+        ],
+        "background_story": f"Experienced {role_str.lower()} with proven track record in project delivery and team collaboration."
+    }
@@ -15,19 +15,463 @@ Garantisce aderenza ai pilastri:
 import logging
 import json
 import asyncio
-from typing import Dict, List, Any, Optional, Tuple
+import functools
+import hashlib
+import os
+import re
+import shelve
+import time
+from collections import OrderedDict
+from types import MappingProxyType
+from typing import Dict, List, Any, Mapping, Optional, Tuple, Union
 from datetime import datetime
 from uuid import UUID
-from enum import Enum
+from enum import Enum, IntFlag
+
+from pydantic import BaseModel, ConfigDict, Field
 
 logger = logging.getLogger(__name__)
 
+# Resolved once at import; guarded so a missing/circular module only disables the AI path
+try:
+    from services.ai_provider_abstraction import ai_provider_manager
+    from project_agents.goal_decomposer_agent import GOAL_DECOMPOSER_AGENT_CONFIG
+    AI_DECOMPOSITION_AVAILABLE = True
+except Exception as e:  # ImportError, or services init failing on missing config
+    ai_provider_manager = None
+    GOAL_DECOMPOSER_AGENT_CONFIG = None
+    AI_DECOMPOSITION_AVAILABLE = False
+    logger.warning(f"⚠️ AI goal decomposition unavailable, pattern fallback only: {e}")
+
+# ---------------------------------------------------------------------------
+# Fast JSON (orjson if installed, stdlib otherwise)
+# ---------------------------------------------------------------------------
+try:
+    import orjson
+
+    ORJSON_AVAILABLE = True
+
+    def _loads(data: Union[str, bytes]) -> Any:
+        return orjson.loads(data)
+
+    def _dumps(obj: Any) -> str:
+        return orjson.dumps(obj).decode()
+
+    def _dumps_bytes(obj: Any) -> bytes:
+        return orjson.dumps(obj, default=str, option=orjson.OPT_NON_STR_KEYS)
+
+except ImportError:  # pragma: no cover - stdlib fallback
+    ORJSON_AVAILABLE = False
+
+    def _loads(data: Union[str, bytes]) -> Any:
+        return json.loads(data)
+
+    def _dumps(obj: Any) -> str:
+        return json.dumps(obj)
+
+    def _dumps_bytes(obj: Any) -> bytes:
+        return json.dumps(obj, default=str).encode("utf-8")
+
+# ---------------------------------------------------------------------------
+# Decomposition cache: repeated/near-identical goals skip the LLM round-trips
+# ---------------------------------------------------------------------------
+DECOMPOSITION_CACHE_MAX_SIZE: int = 1024
+DECOMPOSITION_CACHE_TTL_SECONDS: float = float(os.getenv("GOAL_DECOMPOSITION_CACHE_TTL", "86400"))
+# Optional on-disk second level (shelve file path) so results survive restarts
+DECOMPOSITION_DISK_CACHE_PATH: Optional[str] = os.getenv("GOAL_DECOMPOSITION_CACHE_PATH") or None
+
+# Batch API path (decompose_goals_batch)
+GOAL_DECOMPOSITION_BATCH_POLL_SECONDS: float = float(os.getenv("GOAL_DECOMPOSITION_BATCH_POLL_SECONDS", "30"))
+GOAL_DECOMPOSITION_BATCH_MAX_WAIT_SECONDS: float = float(os.getenv("GOAL_DECOMPOSITION_BATCH_MAX_WAIT_SECONDS", "86400"))
+_BATCH_FINAL_STATUSES = frozenset({"completed", "failed", "expired", "cancelled"})
+
+_NON_WORD_RE = re.compile(r"\W+")
+
+# Last formatted timestamp: batch decomposition stamps many results per second
+_LAST_ISO: List[Any] = [0.0, ""]
+
+
+def _iso_now() -> str:
+    """Local-time ISO timestamp, reformatted at most once per second"""
+    t = time.time()
+    if t - _LAST_ISO[0] < 1.0:
+        return _LAST_ISO[1]
+    s = datetime.fromtimestamp(t).isoformat()
+    _LAST_ISO[:] = [t, s]
+    return s
+
+
+class GoalDecompositionCache:
+    """
+    TTL cache for AI decomposition results: in-memory LRU plus an optional
+    shelve file. Keys normalize case, punctuation and spacing of the goal
+    description, so trivially reworded duplicates share an entry. Values are
+    held as JSON bytes (orjson when available): decoding yields a private copy
+    and the disk level pickles a flat bytes object instead of nested dicts.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float, disk_path: Optional[str] = None):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.disk_path = disk_path
+        self._entries: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self._shelf: Optional[shelve.Shelf] = None
+
+    @staticmethod
+    def make_key(namespace: str, description: str, metric_type: Any, target_value: Any) -> str:
+        normalized = " ".join(_NON_WORD_RE.sub(" ", (description or "").lower()).split())
+        payload = json.dumps(
+            [namespace, normalized, str(metric_type or "").lower(), target_value], default=str
+        )
+        return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+    def _get_shelf(self) -> Optional[shelve.Shelf]:
+        """Lazily opened disk level; disabled (None) when unset or it can't be opened."""
+        if self._shelf is None and self.disk_path:
+            try:
+                self._shelf = shelve.open(self.disk_path)
+            except Exception as e:
+                logger.warning(f"Goal decomposition disk cache unavailable ({self.disk_path}): {e}")
+                self.disk_path = None
+        return self._shelf
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Returns a private copy of the cached value, or None on miss/expiry."""
+        entry = self._entries.get(key)
+        if entry is None:
+            shelf = self._get_shelf()
+            if shelf is not None:
+                try:
+                    entry = shelf.get(key)
+                except Exception as e:
+                    logger.debug(f"Goal decomposition disk cache read failed: {e}")
+            # Entries written before values were serialized hold dicts: treat as a miss
+            if entry is None or not isinstance(entry[1], bytes):
+                return None
+            self._entries[key] = entry
+        stored_at, blob = entry
+        if time.time() - stored_at > self.ttl_seconds:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return _loads(blob)
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        entry = (time.time(), _dumps_bytes(value))
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+        shelf = self._get_shelf()
+        if shelf is not None:
+            try:
+                shelf[key] = entry
+                shelf.sync()
+            except Exception as e:
+                logger.debug(f"Goal decomposition disk cache write failed: {e}")
+
+
+_DECOMPOSITION_CACHE = GoalDecompositionCache(
+    DECOMPOSITION_CACHE_MAX_SIZE, DECOMPOSITION_CACHE_TTL_SECONDS, DECOMPOSITION_DISK_CACHE_PATH
+)
+
+
+def _build_decomposition_prompt(goal_description: str, goal_metric_type: Any, goal_target_value: Any) -> str:
+    """Fused intent + decomposition prompt: the model classifies the intent first, then decomposes according to it."""
+    return f"""Analyze this business goal to understand its TRUE INTENT, then decompose it into deliverables that match that TRUE PURPOSE.
+
+GOAL: "{goal_description}"
+TYPE: {goal_metric_type}
+TARGET: {goal_target_value}
+
+STEP 1 - INTENT. **CRITICAL**: Determine if this goal requires:
+- CONTENT_CREATION: Writing actual content (emails, documents, scripts, copy, articles)
+- DATA_GATHERING: Collecting information, lists, research, contacts
+- HYBRID: Both content creation and data gathering
+
+Examples:
+- "Email sequence 1 for lead nurturing" → CONTENT_CREATION (write actual emails with subjects/bodies)
+- "Contact list of potential clients" → DATA_GATHERING (collect contact information)
+- "Marketing campaign assets" → HYBRID (both content and contact lists)
+
+STEP 2 - DECOMPOSITION based on the intent from step 1.
+
+**CONTENT_CREATION Goals** must create ACTUAL CONTENT:
+- Email sequences → Write actual emails with subject lines and full body text
+- Social posts → Create actual post content with copy and hashtags
+- Documents → Write complete documents with real information
+
+**DATA_GATHERING Goals** collect REAL INFORMATION:
+- Contact lists → Find actual contact information
+- Research reports → Gather factual data and insights
+- Market analysis → Collect real market data
+
+Return ONE JSON object:
+{{
+  "intent_analysis": {{
+    "goal_intent": "CONTENT_CREATION|DATA_GATHERING|HYBRID",
+    "intent_confidence": 0.95,
+    "reasoning": "Explanation of why this classification was chosen",
+    "content_requirements": ["specific content types needed"],
+    "data_requirements": ["specific data types needed"]
+  }},
+  "decomposition": {{
+    "asset_deliverables": [{{
+      "name": "Specific deliverable name",
+      "description": "What will actually be created",
+      "value_proposition": "Concrete user value",
+      "completion_criteria": "How to validate it's complete",
+      "deliverable_type": "content|data|hybrid",
+      "content_specs": {{"format": "email", "count": 5, "includes": ["subject", "body"]}},
+      "estimated_effort": "low|medium|high",
+      "user_impact": "immediate|short-term|long-term"
+    }}],
+    "thinking_components": [{{...}}],
+    "completion_criteria": {{...}},
+    "user_value_score": 85,
+    "complexity_level": "simple|medium|complex",
+    "domain_category": "universal|specific",
+    "pillar_adherence": {{...}}
+  }}
+}}"""
+
+
+# Fallback pattern buckets, compiled once. Plain alternations keep the
+# substring semantics of the original keyword checks ("planning" → plan)
+_CONTENT_PATTERN_RE = re.compile("content|post|article|blog|social")
+_ANALYSIS_PATTERN_RE = re.compile("analysis|research|study|report")
+_PLANNING_PATTERN_RE = re.compile("plan|strategy|roadmap|timeline")
+_SETUP_PATTERN_RE = re.compile("setup|create|build|implement")
+_CONTENT_INTENT_RE = re.compile("email|content|post|article|blog|script|copy")
+_DATA_INTENT_RE = re.compile("list|contact|research|analysis|data|collect")
+
+# ---------------------------------------------------------------------------
+# Decomposition payload templates (read-only: copy before handing out)
+# ---------------------------------------------------------------------------
+_PILLAR_ADHERENCE_DEFAULT: Mapping[str, bool] = MappingProxyType({
+    "domain_agnostic": True,
+    "user_value_focused": True,
+    "minimal_interface_ready": True
+})
+_FALLBACK_COMPLETION_CRITERIA: Mapping[str, Any] = MappingProxyType({
+    "asset_quality_threshold": 75,
+    "thinking_depth_required": "medium",
+    "user_validation_needed": False
+})
+_EMERGENCY_COMPLETION_CRITERIA: Mapping[str, Any] = MappingProxyType({
+    "asset_quality_threshold": 60,
+    "thinking_depth_required": "simple",
+    "user_validation_needed": False
+})
+
+_AssetTemplates = Tuple[Mapping[str, str], ...]
+_ThinkingTemplates = Tuple[Mapping[str, Any], ...]
+
+# 📊 Content creation patterns ("{target_value}" is filled in per goal)
+_CONTENT_ASSETS_TEMPLATE: _AssetTemplates = (
+    MappingProxyType({
+        "name": "Content Library",
+        "description": "Collection of {target_value} ready-to-publish content pieces",
+        "value_proposition": "Immediate publishing capability",
+        "completion_criteria": "Each piece ready for distribution",
+        "estimated_effort": "medium",
+        "user_impact": "immediate"
+    }),
+    MappingProxyType({
+        "name": "Content Calendar",
+        "description": "Publishing schedule and distribution plan",
+        "value_proposition": "Organized content deployment",
+        "completion_criteria": "Calendar with dates and channels",
+        "estimated_effort": "low",
+        "user_impact": "immediate"
+    }),
+)
+_CONTENT_THINKING_TEMPLATE: _ThinkingTemplates = (
+    MappingProxyType({
+        "name": "Content Strategy Analysis",
+        "description": "Research target audience and content themes",
+        "supports_deliverables": ("Content Library", "Content Calendar"),
+        "complexity": "medium"
+    }),
+)
+# 📈 Analysis/research patterns
+_ANALYSIS_ASSETS_TEMPLATE: _AssetTemplates = (
+    MappingProxyType({
+        "name": "Research Report",
+        "description": "Comprehensive analysis document with findings",
+        "value_proposition": "Actionable insights and recommendations",
+        "completion_criteria": "Report with clear recommendations",
+        "estimated_effort": "high",
+        "user_impact": "long-term"
+    }),
+    MappingProxyType({
+        "name": "Executive Summary",
+        "description": "Key findings and action items",
+        "value_proposition": "Quick decision-making reference",
+        "completion_criteria": "1-page summary with actions",
+        "estimated_effort": "low",
+        "user_impact": "immediate"
+    }),
+)
+_ANALYSIS_THINKING_TEMPLATE: _ThinkingTemplates = (
+    MappingProxyType({
+        "name": "Data Collection Strategy",
+        "description": "Plan for gathering and analyzing information",
+        "supports_deliverables": ("Research Report",),
+        "complexity": "medium"
+    }),
+)
+# 📋 Planning patterns
+_PLANNING_ASSETS_TEMPLATE: _AssetTemplates = (
+    MappingProxyType({
+        "name": "Strategic Plan Document",
+        "description": "Complete planning document with timelines",
+        "value_proposition": "Clear execution roadmap",
+        "completion_criteria": "Plan with milestones and deadlines",
+        "estimated_effort": "high",
+        "user_impact": "long-term"
+    }),
+)
+_PLANNING_THINKING_TEMPLATE: _ThinkingTemplates = (
+    MappingProxyType({
+        "name": "Strategic Analysis",
+        "description": "Environment and capability assessment",
+        "supports_deliverables": ("Strategic Plan Document",),
+        "complexity": "complex"
+    }),
+)
+# 🛠️ Setup/implementation patterns
+_SETUP_ASSETS_TEMPLATE: _AssetTemplates = (
+    MappingProxyType({
+        "name": "Implementation Package",
+        "description": "Ready-to-use setup materials and configurations",
+        "value_proposition": "Immediate implementation capability",
+        "completion_criteria": "All components tested and documented",
+        "estimated_effort": "medium",
+        "user_impact": "immediate"
+    }),
+)
+_SETUP_THINKING_TEMPLATE: _ThinkingTemplates = (
+    MappingProxyType({
+        "name": "Requirements Analysis",
+        "description": "Technical and business requirements definition",
+        "supports_deliverables": ("Implementation Package",),
+        "complexity": "medium"
+    }),
+)
+
+# First matching pattern wins (same order as the original if/elif chain)
+_FALLBACK_BUCKETS: Tuple[Tuple["re.Pattern[str]", _AssetTemplates, _ThinkingTemplates], ...] = (
+    (_CONTENT_PATTERN_RE, _CONTENT_ASSETS_TEMPLATE, _CONTENT_THINKING_TEMPLATE),
+    (_ANALYSIS_PATTERN_RE, _ANALYSIS_ASSETS_TEMPLATE, _ANALYSIS_THINKING_TEMPLATE),
+    (_PLANNING_PATTERN_RE, _PLANNING_ASSETS_TEMPLATE, _PLANNING_THINKING_TEMPLATE),
+    (_SETUP_PATTERN_RE, _SETUP_ASSETS_TEMPLATE, _SETUP_THINKING_TEMPLATE),
+)
+
+_JSON_DECODER = json.JSONDecoder()
+
+
+def _extract_json(text: str) -> Optional[Dict[str, Any]]:
+    """
+    First JSON object embedded in ``text`` (prose, code fences, trailing
+    notes): linear ``raw_decode`` from each ``{`` instead of a greedy DOTALL
+    brace regex that backtracks over the whole response.
+    """
+    # ⚡ Fast path: JSON-mode responses are usually a bare object
+    try:
+        value = _loads(text)
+    except ValueError:
+        pass
+    else:
+        if isinstance(value, dict):
+            return value
+
+    start = text.find("{")
+    while start != -1:
+        try:
+            value, _ = _JSON_DECODER.raw_decode(text, start)
+        except ValueError:
+            start = text.find("{", start + 1)
+            continue
+        if isinstance(value, dict):
+            return value
+        start = text.find("{", start + 1)
+    return None
+
+
+def _parse_decomposition_response(response_content: Any) -> Dict[str, Any]:
+    """Parses a fused LLM response into a decomposition enriched with its intent analysis."""
+    # The provider should ideally return a parsed dict, but we handle string case for robustness
+    if isinstance(response_content, str):
+        combined_data = _extract_json(response_content)
+        if combined_data is None:
+            raise ValueError("No valid JSON found in AI response")
+    elif isinstance(response_content, dict):
+        combined_data = response_content
+    else:
+        raise TypeError(f"Unexpected response type from AI provider: {type(response_content)}")
+
+    intent_data = combined_data.get("intent_analysis")
+    if not isinstance(intent_data, dict):
+        intent_data = {}
+    decomposition_data = combined_data.get("decomposition")
+    if not isinstance(decomposition_data, dict):
+        # Model answered with a flat decomposition: use it as is
+        decomposition_data = combined_data
+
+    # 🔧 **ARCHITECTURAL FIX**: Enrich decomposition with intent classification
+    decomposition_data["goal_intent_classification"] = intent_data.get("goal_intent", "HYBRID")
+    decomposition_data["intent_analysis"] = intent_data
+    # Type-checked in pydantic-core; only keys the model actually returned are dumped
+    return Decomposition.model_validate(decomposition_data).model_dump(exclude_unset=True)
+
 class DeliverableType(str, Enum):
     """Types of deliverables a goal can produce"""
     ASSET = "asset"  # Concrete, actionable deliverable for user
     THINKING = "thinking"  # Strategic process, planning, analysis
     HYBRID = "hybrid"  # Both asset and thinking components
 
+class ValidationFlag(IntFlag):
+    """Decomposition issues found by validation; fixes branch on these bits"""
+    NO_ASSETS = 1
+    MISSING_VALUE_PROP = 2
+    ORPHAN_THINKING = 4
+    LOW_VALUE = 8
+    NOT_USER_FOCUSED = 16
+
+# ---------------------------------------------------------------------------
+# LLM output schema: parsed once at the response boundary, dicts downstream.
+# Fields are lenient (defaults, extra keys kept) so incomplete decompositions
+# still reach _validate_decomposition/_fix_decomposition; wrong types fail here.
+# ---------------------------------------------------------------------------
+class AssetDeliverable(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+    name: str = ""
+    description: str = ""
+    value_proposition: str = ""
+
+
+class ThinkingComponent(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+    name: str = ""
+    description: str = ""
+    supports_deliverables: List[str] = Field(default_factory=list)
+
+
+class Decomposition(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+    asset_deliverables: List[AssetDeliverable] = Field(default_factory=list)
+    thinking_components: List[ThinkingComponent] = Field(default_factory=list)
+    user_value_score: Union[int, float] = 0
+    complexity_level: str = "medium"
+    completion_criteria: Any = Field(default_factory=dict)  # passed through as-is
+    pillar_adherence: Dict[str, Any] = Field(default_factory=dict)
+    goal_intent_classification: str = "HYBRID"
+    intent_analysis: Dict[str, Any] = Field(default_factory=dict)
+
 class GoalDecomposition:
     """Decompose goals into concrete deliverables and thinking processes"""
     
@@ -39,10 +483,13 @@ class GoalDecomposition:
         # This is now handled by the AIProviderManager
         pass
     
-    async def decompose_goal(self, goal: Dict[str, Any]) -> Dict[str, Any]:
+    async def decompose_goal(self, goal: Dict[str, Any], emit_todos: bool = False) -> Dict[str, Any]:
         """
         🎯 CORE METHOD: Decompose a goal into deliverables and thinking components
         
+        With ``emit_todos`` the TODO structure is built in the same pass and
+        returned under ``"todo_structure"`` (see ``create_todo_structure``).
+        
         Returns:
             {
                 "goal_id": UUID,
@@ -56,161 +503,237 @@ class GoalDecomposition:
             }
         """
         try:
-            goal_id = goal.get("id")
             goal_description = goal.get("description", "")
             goal_metric_type = goal.get("metric_type", "")
-            goal_target_value = goal.get("target_value", 0)
             
             logger.info(f"🔍 Decomposing goal: '{goal_description}' (type: {goal_metric_type})")
             
             # Use AI to analyze goal and decompose it
-            if self.openai_client:
+            if AI_DECOMPOSITION_AVAILABLE:
                 decomposition = await self._ai_decompose_goal(goal)
             else:
                 decomposition = self._fallback_decompose_goal(goal)
             
-            # Validate decomposition quality
-            validation_result = self._validate_decomposition(decomposition)
-            if not validation_result["valid"]:
-                logger.warning(f"⚠️ Goal decomposition validation failed: {validation_result['reason']}")
-                decomposition = self._fix_decomposition(decomposition, validation_result)
-            
-            result = {
-                "goal_id": goal_id,
-                "original_goal": {
-                    "description": goal_description,
-                    "metric_type": goal_metric_type,
-                    "target_value": goal_target_value
-                },
-                "decomposition": decomposition,
-                "decomposed_at": datetime.now().isoformat(),
-                "decomposition_method": "ai" if self.openai_client else "fallback"
-            }
-            
-            logger.info(f"✅ Goal decomposed: {len(decomposition.get('asset_deliverables', []))} assets, {len(decomposition.get('thinking_components', []))} thinking components")
-            
-            return result
+            return self._finalize_decomposition(
+                goal, decomposition, "ai" if AI_DECOMPOSITION_AVAILABLE else "fallback", emit_todos
+            )
             
         except Exception as e:
             logger.error(f"❌ Error decomposing goal {goal.get('id')}: {e}")
             return self._emergency_decomposition(goal)
-    
-    async def _ai_decompose_goal(self, goal: Dict[str, Any]) -> Dict[str, Any]:
-        """🤖 AI-driven goal decomposition using the AI Provider Abstraction."""
-        from services.ai_provider_abstraction import ai_provider_manager
-        from project_agents.goal_decomposer_agent import GOAL_DECOMPOSER_AGENT_CONFIG
+
+    def _finalize_decomposition(
+        self, goal: Dict[str, Any], decomposition: Dict[str, Any], method: str, emit_todos: bool = False
+    ) -> Dict[str, Any]:
+        """Validates/fixes a decomposition and wraps it in the decompose_goal result shape."""
+        # Validate decomposition quality
+        validation_result = self._validate_decomposition(decomposition)
+        if not validation_result["valid"]:
+            logger.warning(f"⚠️ Goal decomposition validation failed: {validation_result['reason']}")
+            decomposition = self._fix_decomposition(decomposition, validation_result)
         
-        try:
-            goal_description = goal.get("description", "")
-            goal_metric_type = goal.get("metric_type", "")
-            goal_target_value = goal.get("target_value", 0)
-            
-            # 🤖 **AI-DRIVEN Goal Intent Recognition** - First analyze the goal intent
-            intent_analysis_prompt = f"""Analyze this business goal to understand its TRUE INTENT and classify the type of deliverables needed.
+        result = {
+            "goal_id": goal.get("id"),
+            "original_goal": {
+                "description": goal.get("description", ""),
+                "metric_type": goal.get("metric_type", ""),
+                "target_value": goal.get("target_value", 0)
+            },
+            "decomposition": decomposition,
+            "decomposed_at": _iso_now(),
+            "decomposition_method": method
+        }
+        if emit_todos:
+            result["todo_structure"] = self._build_todo_structure(
+                decomposition, result["goal_id"], result["original_goal"]["description"]
+            )
+        
+        logger.info(f"✅ Goal decomposed: {len(decomposition.get('asset_deliverables', []))} assets, {len(decomposition.get('thinking_components', []))} thinking components")
+        
+        return result
 
-GOAL: "{goal_description}"
-TYPE: {goal_metric_type}
-TARGET: {goal_target_value}
+    async def decompose_goals_batch(self, goals: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        📦 Decompose many goals through the OpenAI Batch API (half the token
+        price, no realtime rate-limit pressure, up to 24h latency): meant for
+        non-interactive flows such as workspace bootstrap.
 
-**CRITICAL**: Determine if this goal requires:
-- CONTENT_CREATION: Writing actual content (emails, documents, scripts, copy, articles)
-- DATA_GATHERING: Collecting information, lists, research, contacts
-- HYBRID: Both content creation and data gathering
+        Cached goals are served directly; goals flagged ``require_immediate``
+        and goals whose batch entry fails go through ``decompose_goal``.
+        Results keep the input order.
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(goals)
+        # custom_id -> (input index, goal, cache key)
+        batch_items: Dict[str, Tuple[int, Dict[str, Any], str]] = {}
+        realtime_indexes: List[int] = []
 
-Examples:
-- "Email sequence 1 for lead nurturing" → CONTENT_CREATION (write actual emails with subjects/bodies)
-- "Contact list of potential clients" → DATA_GATHERING (collect contact information)
-- "Marketing campaign assets" → HYBRID (both content and contact lists)
+        for i, goal in enumerate(goals):
+            if goal.get("require_immediate"):
+                realtime_indexes.append(i)
+                continue
+            key = GoalDecompositionCache.make_key(
+                "decomposition",
+                goal.get("description", ""),
+                goal.get("metric_type", ""),
+                goal.get("target_value", 0),
+            )
+            cached = _DECOMPOSITION_CACHE.get(key)
+            if cached is not None:
+                results[i] = self._finalize_decomposition(goal, cached, "ai")
+            else:
+                batch_items[f"goal-{i}"] = (i, goal, key)
 
-Return as JSON:
-{{
-  "goal_intent": "CONTENT_CREATION|DATA_GATHERING|HYBRID",
-  "intent_confidence": 0.95,
-  "reasoning": "Explanation of why this classification was chosen",
-  "content_requirements": ["specific content types needed"],
-  "data_requirements": ["specific data types needed"]
-}}"""
+        if batch_items:
+            # One batch per workspace so the quota tracker bills each workspace its own tokens
+            by_workspace: Dict[Optional[str], Dict[str, Tuple[int, Dict[str, Any], str]]] = {}
+            for custom_id, item in batch_items.items():
+                workspace_id = item[1].get("workspace_id")
+                by_workspace.setdefault(str(workspace_id) if workspace_id else None, {})[custom_id] = item
+            batch_results = await asyncio.gather(
+                *(self._run_decomposition_batch(items, workspace_id) for workspace_id, items in by_workspace.items()),
+                return_exceptions=True,
+            )
+            outputs: Dict[str, str] = {}
+            for workspace_id, batch_result in zip(by_workspace, batch_results):
+                if isinstance(batch_result, BaseException):
+                    logger.error(f"❌ Goal decomposition batch failed for workspace {workspace_id}, using realtime path: {batch_result}")
+                else:
+                    outputs.update(batch_result)
 
-            intent_response = await ai_provider_manager.call_ai(
-                provider_type='openai_sdk',
-                agent=GOAL_DECOMPOSER_AGENT_CONFIG,
-                prompt=intent_analysis_prompt,
+            for custom_id, (i, goal, key) in batch_items.items():
+                content = outputs.get(custom_id)
+                if content is None:
+                    realtime_indexes.append(i)
+                    continue
+                try:
+                    decomposition_data = _parse_decomposition_response(content)
+                    _DECOMPOSITION_CACHE.set(key, decomposition_data)
+                    results[i] = self._finalize_decomposition(goal, decomposition_data, "ai_batch")
+                except Exception as e:
+                    logger.warning(f"⚠️ Unusable batch decomposition for goal {goal.get('id')}: {e}")
+                    realtime_indexes.append(i)
+
+        if realtime_indexes:
+            realtime_results = await asyncio.gather(
+                *(self.decompose_goal(goals[i]) for i in realtime_indexes)
             )
-            
-            # Parse intent analysis
-            intent_data = {}
-            if isinstance(intent_response, str):
-                import re
-                json_match = re.search(r'\{.*\}', intent_response, re.DOTALL)
-                if json_match:
-                    intent_data = json.loads(json_match.group())
-            elif isinstance(intent_response, dict):
-                intent_data = intent_response
-            
-            goal_intent = intent_data.get("goal_intent", "HYBRID")
-            logger.info(f"🎯 Goal intent recognized: {goal_intent}")
-            
-            # Now decompose based on the recognized intent
-            decomposition_prompt = f"""Based on the goal intent analysis, decompose this goal into deliverables that match the TRUE PURPOSE.
+            for i, result in zip(realtime_indexes, realtime_results):
+                results[i] = result
 
-GOAL: "{goal_description}"
-INTENT: {goal_intent}
-CONTENT_REQUIREMENTS: {intent_data.get('content_requirements', [])}
-DATA_REQUIREMENTS: {intent_data.get('data_requirements', [])}
+        return results  # type: ignore[return-value]
 
-**CONTENT_CREATION Goals** must create ACTUAL CONTENT:
-- Email sequences → Write actual emails with subject lines and full body text
-- Social posts → Create actual post content with copy and hashtags
-- Documents → Write complete documents with real information
+    async def _run_decomposition_batch(
+        self,
+        batch_items: Dict[str, Tuple[int, Dict[str, Any], str]],
+        workspace_id: Optional[str] = None,
+    ) -> Dict[str, str]:
+        """Runs one Batch API job for a workspace; returns custom_id -> message content for the successful lines."""
+        from utils.openai_client_factory_enhanced import get_enhanced_async_openai_client
 
-**DATA_GATHERING Goals** collect REAL INFORMATION:
-- Contact lists → Find actual contact information
-- Research reports → Gather factual data and insights
-- Market analysis → Collect real market data
+        if not AI_DECOMPOSITION_AVAILABLE:
+            raise RuntimeError("Goal decomposer agent config not importable")
 
-Return as JSON:
-{{
-  "asset_deliverables": [{{
-    "name": "Specific deliverable name",
-    "description": "What will actually be created",
-    "value_proposition": "Concrete user value",
-    "completion_criteria": "How to validate it's complete",
-    "deliverable_type": "content|data|hybrid",
-    "content_specs": {{"format": "email", "count": 5, "includes": ["subject", "body"]}},
-    "estimated_effort": "low|medium|high",
-    "user_impact": "immediate|short-term|long-term"
-  }}],
-  "thinking_components": [{{...}}],
-  "completion_criteria": {{...}},
-  "user_value_score": 85,
-  "complexity_level": "simple|medium|complex",
-  "domain_category": "universal|specific",
-  "pillar_adherence": {{...}},
-  "goal_intent_classification": "{goal_intent}"
-}}"""
+        client = get_enhanced_async_openai_client(workspace_id=workspace_id)
+        lines = []
+        for custom_id, (_, goal, _) in batch_items.items():
+            prompt = _build_decomposition_prompt(
+                goal.get("description", ""), goal.get("metric_type", ""), goal.get("target_value", 0)
+            )
+            lines.append(_dumps({
+                "custom_id": custom_id,
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {
+                    "model": GOAL_DECOMPOSER_AGENT_CONFIG["model"],
+                    "messages": [
+                        {"role": "system", "content": GOAL_DECOMPOSER_AGENT_CONFIG["instructions"]},
+                        {"role": "user", "content": prompt},
+                    ],
+                    "response_format": {"type": "json_object"},
+                },
+            }))
+
+        batch_input = await client.files.create(
+            file=("goal_decompositions.jsonl", "\n".join(lines).encode("utf-8")),
+            purpose="batch",
+        )
+        batch = await client.batches.create(
+            input_file_id=batch_input.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h",
+        )
+        logger.info(f"📦 Submitted goal decomposition batch {batch.id} ({len(lines)} goals)")
+
+        deadline = time.monotonic() + GOAL_DECOMPOSITION_BATCH_MAX_WAIT_SECONDS
+        while batch.status not in _BATCH_FINAL_STATUSES:
+            if time.monotonic() >= deadline:
+                await client.batches.cancel(batch.id)
+                raise TimeoutError(f"Batch {batch.id} still '{batch.status}' after max wait")
+            await asyncio.sleep(GOAL_DECOMPOSITION_BATCH_POLL_SECONDS)
+            batch = await client.batches.retrieve(batch.id)
+
+        if batch.status != "completed" or not batch.output_file_id:
+            raise RuntimeError(f"Batch {batch.id} ended with status '{batch.status}'")
+
+        output = await client.files.content(batch.output_file_id)
+        contents: Dict[str, str] = {}
+        for line in output.text.splitlines():
+            if not line.strip():
+                continue
+            record = _loads(line)
+            response = record.get("response") or {}
+            if response.get("status_code") != 200:
+                continue
+            try:
+                contents[record["custom_id"]] = response["body"]["choices"][0]["message"]["content"]
+            except (KeyError, IndexError, TypeError):
+                continue
+            # The wrapper only sees files/batches calls, so the completion tokens are recorded here
+            if hasattr(client, "_record_usage"):
+                body = response["body"]
+                client._record_usage(
+                    success=True,
+                    tokens_used=(body.get("usage") or {}).get("total_tokens", 0),
+                    model=body.get("model", GOAL_DECOMPOSER_AGENT_CONFIG["model"]),
+                    api_method="batches.chat.completions",
+                )
+        logger.info(f"📦 Goal decomposition batch {batch.id}: {len(contents)}/{len(lines)} usable results")
+        return contents
+    
+    async def _ai_decompose_goal(self, goal: Dict[str, Any]) -> Dict[str, Any]:
+        """🤖 AI-driven goal decomposition using the AI Provider Abstraction."""
+        try:
+            goal_description = goal.get("description", "")
+            goal_metric_type = goal.get("metric_type", "")
+            goal_target_value = goal.get("target_value", 0)
+
+            # ⚡ Cache hit skips the LLM call
+            decomposition_key = GoalDecompositionCache.make_key(
+                "decomposition", goal_description, goal_metric_type, goal_target_value
+            )
+            cached_decomposition = _DECOMPOSITION_CACHE.get(decomposition_key)
+            if cached_decomposition is not None:
+                logger.info("⚡ Goal decomposition served from cache")
+                return cached_decomposition
+            
+            if not AI_DECOMPOSITION_AVAILABLE:
+                raise RuntimeError("AI provider or goal decomposer agent config not importable")
+
+            # 🤖 **AI-DRIVEN Goal Intent Recognition + Decomposition** in a single call
+            combined_prompt = _build_decomposition_prompt(
+                goal_description, goal_metric_type, goal_target_value
+            )
 
             response_content = await ai_provider_manager.call_ai(
                 provider_type='openai_sdk',
                 agent=GOAL_DECOMPOSER_AGENT_CONFIG,
-                prompt=decomposition_prompt,
+                prompt=combined_prompt,
             )
             
-            # The provider should ideally return a parsed dict, but we handle string case for robustness
-            if isinstance(response_content, str):
-                import re
-                json_match = re.search(r'\{.*\}', response_content, re.DOTALL)
-                if json_match:
-                    decomposition_data = json.loads(json_match.group())
-                else:
-                    raise ValueError("No valid JSON found in AI response")
-            elif isinstance(response_content, dict):
-                decomposition_data = response_content
-            else:
-                raise TypeError(f"Unexpected response type from AI provider: {type(response_content)}")
-
-            # 🔧 **ARCHITECTURAL FIX**: Enrich decomposition with intent classification
-            decomposition_data["goal_intent_classification"] = goal_intent
-            decomposition_data["intent_analysis"] = intent_data
+            decomposition_data = _parse_decomposition_response(response_content)
+            goal_intent = decomposition_data["goal_intent_classification"]
+            logger.info(f"🎯 Goal intent recognized: {goal_intent}")
+            _DECOMPOSITION_CACHE.set(decomposition_key, decomposition_data)
             
             logger.info(f"🤖 AI goal decomposition successful via SDK Provider. Intent: {goal_intent}")
             return decomposition_data
@@ -226,108 +749,21 @@ Return as JSON:
         goal_target_value = goal.get("target_value", 0)
         
         # Pattern-based decomposition
-        asset_deliverables = []
-        thinking_components = []
-        
-        # 📊 Content creation patterns
-        if any(keyword in goal_description for keyword in ["content", "post", "article", "blog", "social"]):
-            asset_deliverables.extend([
-                {
-                    "name": "Content Library",
-                    "description": f"Collection of {goal_target_value} ready-to-publish content pieces",
-                    "value_proposition": "Immediate publishing capability",
-                    "completion_criteria": "Each piece ready for distribution",
-                    "estimated_effort": "medium",
-                    "user_impact": "immediate"
-                },
-                {
-                    "name": "Content Calendar",
-                    "description": "Publishing schedule and distribution plan",
-                    "value_proposition": "Organized content deployment",
-                    "completion_criteria": "Calendar with dates and channels",
-                    "estimated_effort": "low",
-                    "user_impact": "immediate"
-                }
-            ])
-            thinking_components.extend([
-                {
-                    "name": "Content Strategy Analysis",
-                    "description": "Research target audience and content themes",
-                    "supports_deliverables": ["Content Library", "Content Calendar"],
-                    "complexity": "medium"
-                }
-            ])
+        asset_deliverables: List[Dict[str, Any]] = []
+        thinking_components: List[Dict[str, Any]] = []
         
-        # 📈 Analysis/research patterns
-        elif any(keyword in goal_description for keyword in ["analysis", "research", "study", "report"]):
-            asset_deliverables.extend([
-                {
-                    "name": "Research Report",
-                    "description": "Comprehensive analysis document with findings",
-                    "value_proposition": "Actionable insights and recommendations",
-                    "completion_criteria": "Report with clear recommendations",
-                    "estimated_effort": "high",
-                    "user_impact": "long-term"
-                },
-                {
-                    "name": "Executive Summary",
-                    "description": "Key findings and action items",
-                    "value_proposition": "Quick decision-making reference",
-                    "completion_criteria": "1-page summary with actions",
-                    "estimated_effort": "low",
-                    "user_impact": "immediate"
-                }
-            ])
-            thinking_components.extend([
-                {
-                    "name": "Data Collection Strategy",
-                    "description": "Plan for gathering and analyzing information",
-                    "supports_deliverables": ["Research Report"],
-                    "complexity": "medium"
-                }
-            ])
-        
-        # 📋 Planning patterns
-        elif any(keyword in goal_description for keyword in ["plan", "strategy", "roadmap", "timeline"]):
-            asset_deliverables.extend([
-                {
-                    "name": "Strategic Plan Document",
-                    "description": "Complete planning document with timelines",
-                    "value_proposition": "Clear execution roadmap",
-                    "completion_criteria": "Plan with milestones and deadlines",
-                    "estimated_effort": "high",
-                    "user_impact": "long-term"
-                }
-            ])
-            thinking_components.extend([
-                {
-                    "name": "Strategic Analysis",
-                    "description": "Environment and capability assessment",
-                    "supports_deliverables": ["Strategic Plan Document"],
-                    "complexity": "complex"
-                }
-            ])
-        
-        # 🛠️ Setup/implementation patterns
-        elif any(keyword in goal_description for keyword in ["setup", "create", "build", "implement"]):
-            asset_deliverables.extend([
-                {
-                    "name": "Implementation Package",
-                    "description": "Ready-to-use setup materials and configurations",
-                    "value_proposition": "Immediate implementation capability",
-                    "completion_criteria": "All components tested and documented",
-                    "estimated_effort": "medium",
-                    "user_impact": "immediate"
-                }
-            ])
-            thinking_components.extend([
-                {
-                    "name": "Requirements Analysis",
-                    "description": "Technical and business requirements definition",
-                    "supports_deliverables": ["Implementation Package"],
-                    "complexity": "medium"
-                }
-            ])
+        for pattern_re, assets_template, thinking_template in _FALLBACK_BUCKETS:
+            if pattern_re.search(goal_description):
+                for template in assets_template:
+                    asset = dict(template)
+                    if "{target_value}" in asset["description"]:
+                        asset["description"] = asset["description"].format(target_value=goal_target_value)
+                    asset_deliverables.append(asset)
+                for template in thinking_template:
+                    component = dict(template)
+                    component["supports_deliverables"] = list(template["supports_deliverables"])
+                    thinking_components.append(component)
+                break
         
         # 🌍 Universal fallback
         else:
@@ -351,19 +787,15 @@ Return as JSON:
         
         # 🔧 **ARCHITECTURAL FIX**: Add intent classification to fallback
         goal_intent = "HYBRID"  # Default fallback intent
-        if any(keyword in goal_description for keyword in ["email", "content", "post", "article", "blog", "script", "copy"]):
+        if _CONTENT_INTENT_RE.search(goal_description):
             goal_intent = "CONTENT_CREATION"
-        elif any(keyword in goal_description for keyword in ["list", "contact", "research", "analysis", "data", "collect"]):
+        elif _DATA_INTENT_RE.search(goal_description):
             goal_intent = "DATA_GATHERING"
         
         return {
             "asset_deliverables": asset_deliverables,
             "thinking_components": thinking_components,
-            "completion_criteria": {
-                "asset_quality_threshold": 75,
-                "thinking_depth_required": "medium",
-                "user_validation_needed": False
-            },
+            "completion_criteria": dict(_FALLBACK_COMPLETION_CRITERIA),
             "user_value_score": user_value_score,
             "complexity_level": "medium" if len(asset_deliverables) > 1 else "simple",
             "domain_category": "universal",
@@ -374,56 +806,59 @@ Return as JSON:
                 "reasoning": "Fallback pattern-based classification",
                 "method": "fallback"
             },
-            "pillar_adherence": {
-                "domain_agnostic": True,
-                "user_value_focused": True,
-                "minimal_interface_ready": True
-            }
+            "pillar_adherence": dict(_PILLAR_ADHERENCE_DEFAULT)
         }
     
     def _validate_decomposition(self, decomposition: Dict[str, Any]) -> Dict[str, Any]:
         """🔍 Validate decomposition quality and pillar adherence"""
         issues = []
+        flags = ValidationFlag(0)
         
         # Check asset deliverables
         assets = decomposition.get("asset_deliverables", [])
         if not assets:
             issues.append("No asset deliverables defined")
+            flags |= ValidationFlag.NO_ASSETS
         
         for asset in assets:
             if not asset.get("name") or not asset.get("description"):
                 issues.append(f"Asset missing name/description: {asset}")
             if not asset.get("value_proposition"):
                 issues.append(f"Asset missing value proposition: {asset.get('name')}")
+                flags |= ValidationFlag.MISSING_VALUE_PROP
         
         # Check thinking components
         thinking = decomposition.get("thinking_components", [])
         for component in thinking:
             if not component.get("supports_deliverables"):
                 issues.append(f"Thinking component not linked to deliverables: {component.get('name')}")
+                flags |= ValidationFlag.ORPHAN_THINKING
         
         # Check user value score
         user_value = decomposition.get("user_value_score", 0)
         if user_value < 50:
             issues.append(f"User value score too low: {user_value}")
+            flags |= ValidationFlag.LOW_VALUE
         
         # Check pillar adherence
         pillar_adherence = decomposition.get("pillar_adherence", {})
         if not pillar_adherence.get("user_value_focused"):
             issues.append("Decomposition not user value focused")
+            flags |= ValidationFlag.NOT_USER_FOCUSED
         
         return {
             "valid": len(issues) == 0,
+            "flags": int(flags),
             "issues": issues,
             "reason": "; ".join(issues) if issues else "Valid decomposition"
         }
     
     def _fix_decomposition(self, decomposition: Dict[str, Any], validation_result: Dict[str, Any]) -> Dict[str, Any]:
         """🔧 Fix decomposition issues"""
-        issues = validation_result.get("issues", [])
+        flags = ValidationFlag(validation_result.get("flags", 0))
         
         # Add missing asset deliverables
-        if "No asset deliverables defined" in str(issues):
+        if flags & ValidationFlag.NO_ASSETS:
             decomposition["asset_deliverables"] = [{
                 "name": "Goal Achievement Package",
                 "description": "Comprehensive deliverable for goal completion",
@@ -434,27 +869,25 @@ Return as JSON:
             }]
         
         # Fix missing value propositions
-        for asset in decomposition.get("asset_deliverables", []):
-            if not asset.get("value_proposition"):
-                asset["value_proposition"] = f"Provides value through {asset.get('name', 'deliverable')}"
+        if flags & ValidationFlag.MISSING_VALUE_PROP:
+            for asset in decomposition.get("asset_deliverables", []):
+                if not asset.get("value_proposition"):
+                    asset["value_proposition"] = f"Provides value through {asset.get('name', 'deliverable')}"
         
         # Fix thinking component linkage
-        asset_names = [a.get("name", "") for a in decomposition.get("asset_deliverables", [])]
-        for component in decomposition.get("thinking_components", []):
-            if not component.get("supports_deliverables"):
-                component["supports_deliverables"] = asset_names[:1]  # Link to first asset
+        if flags & ValidationFlag.ORPHAN_THINKING:
+            asset_names = [a.get("name", "") for a in decomposition.get("asset_deliverables", [])]
+            for component in decomposition.get("thinking_components", []):
+                if not component.get("supports_deliverables"):
+                    component["supports_deliverables"] = asset_names[:1]  # Link to first asset
         
         # Fix user value score
-        if decomposition.get("user_value_score", 0) < 50:
+        if flags & ValidationFlag.LOW_VALUE:
             decomposition["user_value_score"] = 65
         
         # Fix pillar adherence
-        if not decomposition.get("pillar_adherence"):
-            decomposition["pillar_adherence"] = {
-                "domain_agnostic": True,
-                "user_value_focused": True,
-                "minimal_interface_ready": True
-            }
+        if flags & ValidationFlag.NOT_USER_FOCUSED and not decomposition.get("pillar_adherence"):
+            decomposition["pillar_adherence"] = dict(_PILLAR_ADHERENCE_DEFAULT)
         
         logger.info("🔧 Decomposition fixed based on validation results")
         return decomposition
@@ -483,11 +916,7 @@ Return as JSON:
                     "supports_deliverables": ["Goal Result"],
                     "complexity": "simple"
                 }],
-                "completion_criteria": {
-                    "asset_quality_threshold": 60,
-                    "thinking_depth_required": "simple",
-                    "user_validation_needed": False
-                },
+                "completion_criteria": dict(_EMERGENCY_COMPLETION_CRITERIA),
                 "user_value_score": 60,
                 "complexity_level": "simple",
                 "domain_category": "universal",
@@ -498,16 +927,91 @@ Return as JSON:
                     "reasoning": "Emergency fallback - insufficient data for classification",
                     "method": "emergency"
                 },
-                "pillar_adherence": {
-                    "domain_agnostic": True,
-                    "user_value_focused": True,
-                    "minimal_interface_ready": True
-                }
+                "pillar_adherence": dict(_PILLAR_ADHERENCE_DEFAULT)
             },
-            "decomposed_at": datetime.now().isoformat(),
+            "decomposed_at": _iso_now(),
             "decomposition_method": "emergency"
         }
     
+    def _build_todo_structure(
+        self, decomposition: Dict[str, Any], goal_id: Any, goal_description: str
+    ) -> Dict[str, Any]:
+        """Single pass over deliverables/components: TODOs and completion flow are filled together"""
+        asset_todos = []
+        thinking_todos = []
+        asset_ids = []
+        asset_names = []
+        thinking_support_map = {}
+        thinking_names = []
+        
+        # Create asset TODOs (high priority, concrete deliverables)
+        for asset in decomposition.get("asset_deliverables", []):
+            todo_id = f"asset_{len(asset_todos) + 1}"
+            name = asset.get("name", "Asset Creation")
+            asset_todos.append({
+                "id": todo_id,
+                "type": "asset",
+                "name": name,
+                "description": asset.get("description", ""),
+                "value_proposition": asset.get("value_proposition", ""),
+                "completion_criteria": asset.get("completion_criteria", ""),
+                "priority": "high",
+                "estimated_effort": asset.get("estimated_effort", "medium"),
+                "user_impact": asset.get("user_impact", "immediate"),
+                "goal_id": goal_id,
+                "deliverable_type": "concrete_asset"
+            })
+            asset_ids.append(todo_id)
+            asset_names.append(name)
+        
+        # Create thinking TODOs (medium priority, strategic support)
+        for thinking in decomposition.get("thinking_components", []):
+            todo_id = f"thinking_{len(thinking_todos) + 1}"
+            name = thinking.get("name", "Strategic Analysis")
+            supports = thinking.get("supports_deliverables", [])
+            thinking_todos.append({
+                "id": todo_id,
+                "type": "thinking", 
+                "name": name,
+                "description": thinking.get("description", ""),
+                "supports_assets": supports,
+                "complexity": thinking.get("complexity", "medium"),
+                "priority": "medium",
+                "goal_id": goal_id,
+                "deliverable_type": "strategic_thinking"
+            })
+            thinking_support_map[todo_id] = supports
+            thinking_names.append(name)
+        
+        user_value_score = decomposition.get("user_value_score", 70)
+        completion_flow = {
+            "asset_dependency_chain": asset_ids,
+            "thinking_support_map": thinking_support_map,
+            "completion_criteria": decomposition.get("completion_criteria", {}),
+            "final_deliverable": {
+                "name": f"Complete Goal Package: {goal_description}",
+                "components": asset_names,
+                "thinking_support": thinking_names,
+                "user_value_score": user_value_score
+            }
+        }
+        
+        todo_structure = {
+            "goal_id": goal_id,
+            "asset_todos": asset_todos,
+            "thinking_todos": thinking_todos,
+            "completion_flow": completion_flow,
+            "total_todos": len(asset_todos) + len(thinking_todos),
+            "asset_count": len(asset_todos),
+            "thinking_count": len(thinking_todos),
+            "expected_user_value": user_value_score,
+            "created_at": _iso_now()
+        }
+        
+        logger.info(f"✅ TODO structure created: {len(asset_todos)} assets, {len(thinking_todos)} thinking components")
+        
+        return todo_structure
+
     async def create_todo_structure(self, goal_decomposition: Dict[str, Any]) -> Dict[str, Any]:
         """
         🎯 Create structured TODO list from goal decomposition
@@ -520,75 +1024,11 @@ Return as JSON:
             }
         """
         try:
-            decomposition = goal_decomposition.get("decomposition", {})
-            goal_id = goal_decomposition.get("goal_id")
-            
-            asset_todos = []
-            thinking_todos = []
-            
-            # Create asset TODOs (high priority, concrete deliverables)
-            for asset in decomposition.get("asset_deliverables", []):
-                asset_todo = {
-                    "id": f"asset_{len(asset_todos) + 1}",
-                    "type": "asset",
-                    "name": asset.get("name", "Asset Creation"),
-                    "description": asset.get("description", ""),
-                    "value_proposition": asset.get("value_proposition", ""),
-                    "completion_criteria": asset.get("completion_criteria", ""),
-                    "priority": "high",
-                    "estimated_effort": asset.get("estimated_effort", "medium"),
-                    "user_impact": asset.get("user_impact", "immediate"),
-                    "goal_id": goal_id,
-                    "deliverable_type": "concrete_asset"
-                }
-                asset_todos.append(asset_todo)
-            
-            # Create thinking TODOs (medium priority, strategic support)
-            for thinking in decomposition.get("thinking_components", []):
-                thinking_todo = {
-                    "id": f"thinking_{len(thinking_todos) + 1}",
-                    "type": "thinking", 
-                    "name": thinking.get("name", "Strategic Analysis"),
-                    "description": thinking.get("description", ""),
-                    "supports_assets": thinking.get("supports_deliverables", []),
-                    "complexity": thinking.get("complexity", "medium"),
-                    "priority": "medium",
-                    "goal_id": goal_id,
-                    "deliverable_type": "strategic_thinking"
-                }
-                thinking_todos.append(thinking_todo)
-            
-            # Create completion flow
-            completion_flow = {
-                "asset_dependency_chain": [todo["id"] for todo in asset_todos],
-                "thinking_support_map": {
-                    todo["id"]: todo.get("supports_assets", []) 
-                    for todo in thinking_todos
-                },
-                "completion_criteria": decomposition.get("completion_criteria", {}),
-                "final_deliverable": {
-                    "name": f"Complete Goal Package: {goal_decomposition.get('original_goal', {}).get('description', 'Unknown')}",
-                    "components": [todo["name"] for todo in asset_todos],
-                    "thinking_support": [todo["name"] for todo in thinking_todos],
-                    "user_value_score": decomposition.get("user_value_score", 70)
-                }
-            }
-            
-            todo_structure = {
-                "goal_id": goal_id,
-                "asset_todos": asset_todos,
-                "thinking_todos": thinking_todos,
-                "completion_flow": completion_flow,
-                "total_todos": len(asset_todos) + len(thinking_todos),
-                "asset_count": len(asset_todos),
-                "thinking_count": len(thinking_todos),
-                "expected_user_value": decomposition.get("user_value_score", 70),
-                "created_at": datetime.now().isoformat()
-            }
-            
-            logger.info(f"✅ TODO structure created: {len(asset_todos)} assets, {len(thinking_todos)} thinking components")
-            
-            return todo_structure
+            return self._build_todo_structure(
+                goal_decomposition.get("decomposition", {}),
+                goal_decomposition.get("goal_id"),
+                goal_decomposition.get("original_goal", {}).get("description", "Unknown"),
+            )
             
         except Exception as e:
             logger.error(f"❌ Error creating TODO structure: {e}")
@@ -601,11 +1041,26 @@ Return as JSON:
             }
 
 # Factory function for easy usage
+@functools.lru_cache(maxsize=1)
 def create_goal_decomposer() -> GoalDecomposition:
-    """Create a new GoalDecomposition instance"""
+    """Shared GoalDecomposition instance (stateless, so one is enough)"""
     return GoalDecomposition()
 
+async def decompose_goals_batch(goals: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    📦 Convenience function: many goals → decompositions via the OpenAI Batch API
+
+    For latency-tolerant flows (e.g. workspace bootstrap); see
+    ``GoalDecomposition.decompose_goals_batch``.
+    """
+    return await create_goal_decomposer().decompose_goals_batch(goals)
+
 # Async wrapper for easy integration
+def serialize_decomposition(result: Dict[str, Any]) -> bytes:
+    """UTF-8 JSON bytes of a decomposition/TODO result, ready for persistence or HTTP bodies"""
+    return _dumps_bytes(result)
+
+
 async def decompose_goal_to_todos(goal: Dict[str, Any]) -> Dict[str, Any]:
     """
     🎯 Convenience function: Goal → TODO structure in one call
@@ -613,8 +1068,11 @@ async def decompose_goal_to_todos(goal: Dict[str, Any]) -> Dict[str, Any]:
     Returns complete structure with assets and thinking components
     """
     decomposer = create_goal_decomposer()
-    decomposition = await decomposer.decompose_goal(goal)
-    todo_structure = await decomposer.create_todo_structure(decomposition)
+    decomposition = await decomposer.decompose_goal(goal, emit_todos=True)
+    todo_structure = decomposition.pop("todo_structure", None)
+    if todo_structure is None:
+        # Emergency path returns a bare decomposition
+        todo_structure = await decomposer.create_todo_structure(decomposition)
     
     return {
         "goal_decomposition": decomposition,
@@ -0,0 +1,320 @@
+# backend/tests/test_director_helpers.py
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+import ai_agents.director as director
+from ai_agents.director import (
+    MAX_TEAM_SIZE,
+    _budget_team_size,
+    _calculate_optimal_team_size,
+    _extract_budget,
+    _extract_json,
+    _generate_personality_fallback,
+    _get_model_for_design,
+    _get_tools_for_design,
+    _pick_seniority,
+    _simple_semantic_fallback,
+    _skills_overlap,
+)
+from models import AgentSeniority
+
+
+@pytest.mark.parametrize(
+    "budget,expected",
+    [(0, 1), (799, 1), (800, 2), (1500, 3), (3000, 4), (5000, 5), (8000, 6), (20000, 6)],
+)
+def test_budget_team_size_buckets(budget, expected):
+    assert _budget_team_size(budget) == expected
+
+
+def test_optimal_team_size_prefers_user_requested_size():
+    assert _calculate_optimal_team_size(20000, ["a", "b", "c"], user_requested_size=2) == 2
+
+
+def test_optimal_team_size_ignores_out_of_range_request():
+    size = _calculate_optimal_team_size(20000, ["a"], user_requested_size=MAX_TEAM_SIZE + 5)
+    assert size == _budget_team_size(20000)
+
+
+def test_optimal_team_size_complexity_boost_matches_snake_case_skills():
+    plain = _calculate_optimal_team_size(0, ["copywriting", "seo", "editing"])
+    boosted = _calculate_optimal_team_size(0, ["copywriting", "seo", "project_management"])
+    assert boosted > plain
+
+
+def test_model_and_tools_for_design():
+    assert _get_model_for_design("EXPERT") == "gpt-4.1"
+    assert _get_model_for_design("unknown") == _get_model_for_design(AgentSeniority.JUNIOR.value)
+
+    junior_tools = _get_tools_for_design("Graphic Designer", AgentSeniority.JUNIOR.value)
+    assert junior_tools == []
+
+    senior_tools = {t["name"] for t in _get_tools_for_design("Market Analyst", AgentSeniority.SENIOR.value)}
+    assert senior_tools == {"web_search", "file_search"}
+
+
+def test_personality_fallback_shape():
+    personality = _generate_personality_fallback("Data Analyst")
+    for key in ("first_name", "last_name", "personality_traits", "communication_style",
+                "hard_skills", "soft_skills", "background_story"):
+        assert key in personality
+    assert "data analyst" in personality["background_story"]
+
+
+@pytest.mark.asyncio
+async def test_simple_semantic_fallback_groups_by_pattern():
+    groups = await _simple_semantic_fallback(["project_planning", "data_analysis", "quantum_knitting"])
+    by_domain = {g["domain"]: g for g in groups}
+
+    assert by_domain["coordination_activities"]["skills"] == ["project_planning"]
+    assert by_domain["coordination_activities"]["importance"] == "high"
+    assert by_domain["analytical_tasks"]["skills"] == ["data_analysis"]
+    assert by_domain["specialized_tasks"]["skills"] == ["quantum_knitting"]
+    assert by_domain["specialized_tasks"]["importance"] == "medium"
+
+
+def test_skills_overlap_is_normalized_jaccard():
+    assert _skills_overlap(["Data Analysis", "research"], ["data_analysis", "Research"]) == 1.0
+    assert _skills_overlap(["a", "b"], ["b", "c"]) == pytest.approx(1 / 3)
+    assert _skills_overlap([], ["a"]) == 0.0
+
+
+def test_extract_json_finds_embedded_values():
+    fenced = 'Here you go:\n```json\n{"agents": [{"name": "A"}]}\n```\nThanks'
+    assert _extract_json(fenced, "{") == {"agents": [{"name": "A"}]}
+    assert _extract_json('see [1, 2] and {broken', "[") == [1, 2]
+    assert _extract_json('{not json} then {"ok": true}', "{") == {"ok": True}
+    assert _extract_json("no json here") is None
+    assert _extract_json(None) is None
+    mixed = 'e.g. {"name": "x"} -> {"agents": [], "rationale": "r\ufffd"}'
+    assert _extract_json(mixed, "{", required_key="agents") == {"agents": [], "rationale": "r"}
+
+
+def test_pick_seniority_ladder():
+    junior, senior, expert = (AgentSeniority.JUNIOR.value, AgentSeniority.SENIOR.value,
+                              AgentSeniority.EXPERT.value)
+    assert _pick_seniority(10_000, True, 10_000) == expert
+    assert _pick_seniority(10_000, False, 10_000) == senior  # expert only for high importance
+    assert _pick_seniority(10_000, True, 500) == senior  # downgraded to what still fits
+    assert _pick_seniority(0, True, 10_000) == junior
+    assert _pick_seniority(10_000, True, 100) is None
+
+
+@pytest.mark.parametrize(
+    "constraints,expected",
+    [
+        ({"max_amount": 5000}, 5000.0),
+        ({"max_cost": "1200"}, 1200.0),
+        ({"budget": 5000}, 5000.0),
+        ({"budget": {"max_amount": 5000}}, 5000.0),
+        ({"budget": {"max_cost": 3000}}, 3000.0),
+        ({"budget_constraint": {"max_cost": 2500}}, 2500.0),
+        ({"max_amount": 0, "budget": {"max_cost": 900}}, 900.0),
+        ({"budget": "lots", "budget_constraint": {"max_amount": 700}}, 700.0),
+        ({"budget": True}, 0.0),
+        ({"raw_constraints": "cheap"}, 0.0),
+        ({}, 0.0),
+    ],
+)
+def test_extract_budget_shapes(constraints, expected):
+    assert _extract_budget(constraints) == expected
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "constraints",
+    [{"budget": {"max_amount": 5000}}, {"max_amount": 5000}, {"budget": 5000}, {"max_cost": 5000}],
+)
+async def test_propose_team_and_analyzer_share_budget_extraction(monkeypatch, constraints):
+    designed_budgets = []
+    analyzed_budgets = []
+
+    async def fake_analyze(goal, constraints_json, on_required_skills=None):
+        analyzed_budgets.append(_extract_budget(json.loads(constraints_json)))
+        return json.dumps({"required_skills": ["seo"], "recommended_team_size": 1})
+
+    async def fake_design(skills_json, budget_total, max_team_size, user_feedback, workspace_id):
+        designed_budgets.append(budget_total)
+        return json.dumps([{"name": "A", "role": "SEO Specialist", "seniority": "senior"}])
+
+    async def fake_costs(team_json):
+        return json.dumps({"total_estimated_cost": 450})
+
+    monkeypatch.setattr(director, "_analyze_project_requirements", fake_analyze)
+    monkeypatch.setattr(director, "_design_team_structure", fake_design)
+    monkeypatch.setattr(director, "_estimate_costs", fake_costs)
+
+    result = await director.DirectorAgent().propose_team("Grow organic traffic", constraints)
+
+    assert set(designed_budgets) == {5000.0}
+    assert analyzed_budgets == [5000.0]
+    assert "error" not in result["team"][0]
+
+
+@pytest.mark.asyncio
+async def test_analyzer_accepts_scalar_budget():
+    # Pinned size + explicit skills return before any LLM call, right after budget extraction
+    constraints = {"budget": 5000, "user_feedback": "2 agents please", "required_skills": ["seo", "copywriting"]}
+    analysis = json.loads(await director._analyze_project_requirements("Grow traffic", json.dumps(constraints)))
+
+    assert analysis["required_skills"] == ["seo", "copywriting"]
+    assert analysis["recommended_team_size"] == 2
+
+
+def test_role_tools_are_private_copies_of_read_only_prototypes():
+    agent = director.DirectorAgent()
+    tools = agent._get_tools_for_role("Content Manager", AgentSeniority.SENIOR.value)
+    assert [t["name"] for t in tools] == ["web_search", "file_search"]
+
+    tools[0]["description"] = "mutated"
+    assert director._WEB_SEARCH_TOOL["description"] != "mutated"
+    assert agent._get_tools_for_role("Content Manager", "senior")[0]["description"] != "mutated"
+    with pytest.raises(TypeError):
+        director._FILE_SEARCH_TOOL["name"] = "x"  # type: ignore[index]
+
+
+def test_specialist_prompt_is_memoized_per_role_and_skills():
+    prompt = director._specialist_prompt("SEO Specialist", ("seo", "copywriting"))
+    assert prompt.startswith("You are a SEO Specialist. Your expertise covers: seo, copywriting.")
+    assert director._specialist_prompt("SEO Specialist", ("seo", "copywriting")) is prompt
+
+
+def test_openai_clients_are_pooled_per_workspace(monkeypatch):
+    import utils.openai_client_factory_enhanced as factory
+
+    built = []
+
+    def fake_factory(api_key=None, workspace_id=None):
+        built.append(workspace_id)
+        return object()
+
+    monkeypatch.setattr(factory, "get_enhanced_async_openai_client", fake_factory)
+    monkeypatch.setattr(director, "_openai_clients", director.OrderedDict())
+
+    ws_a = director._get_openai("ws-a")
+    assert director._get_openai("ws-a") is ws_a
+    assert director._get_openai("ws-b") is not ws_a
+    director._get_openai(None)
+    assert built == ["ws-a", "ws-b", "global"]
+
+
+@pytest.mark.asyncio
+async def test_analysis_cache_embeds_alongside_analyzer_on_cold_cache(monkeypatch):
+    events = []
+
+    async def fake_embed(text, workspace_id=None):
+        events.append(("embed", workspace_id))
+        return [1.0, 0.0]
+
+    async def fake_run(agent, user_msg):
+        events.append(("analyze", None))
+        await asyncio.sleep(0)
+        return SimpleNamespace(final_output=director.ProjectAnalysisOutput(
+            required_skills=["seo"], expertise_areas=["marketing"], recommended_team_size=2, rationale="r"
+        ))
+
+    cache = director._AnalysisCache()
+    monkeypatch.setattr(director, "AI_AVAILABLE", True)
+    monkeypatch.setattr(director, "_analysis_cache", cache)
+    monkeypatch.setattr(director, "_embed_text", fake_embed)
+    monkeypatch.setattr(director, "_get_analyzer_agent", lambda: None)
+    monkeypatch.setattr(director, "Runner", SimpleNamespace(run=fake_run))
+
+    key = cache.make_key("Grow traffic", 3000, None, {})
+    assert await cache.get_semantic(key) == (None, None)
+    assert events == []  # no candidates in scope: no embedding round trip
+
+    constraints = json.dumps({"max_amount": 3000, "workspace_id": "ws-1"})
+    await director._analyze_project_requirements("Grow traffic", constraints)
+
+    assert events == [("analyze", None), ("embed", "ws-1")]  # analyzer did not wait on the embedding
+    assert next(iter(cache._entries.values()))[2] == [1.0, 0.0]
+
+
+@pytest.mark.asyncio
+async def test_personality_locks_dropped_when_generation_fails(monkeypatch):
+    async def failing_request(roles, workspace_id=None):
+        raise RuntimeError("API down")
+
+    monkeypatch.setattr(director, "AI_AVAILABLE", True)
+    monkeypatch.setattr(director, "_request_personalities", failing_request)
+    before = set(director._PERSONALITY_LOCKS)
+
+    personalities = await director._generate_personalities_batch(["Quantum Knitter", "Lunar Botanist"])
+
+    assert len(personalities) == 2
+    assert all("first_name" in p for p in personalities)  # degraded to the fallback
+    assert set(director._PERSONALITY_LOCKS) == before
+
+
+@pytest.mark.asyncio
+async def test_create_team_proposal_cancels_prewarm_on_run_error(monkeypatch):
+    from uuid import uuid4
+
+    from models import DirectorTeamProposal
+
+    prewarm = {}
+
+    async def slow_fallback(self, proposal_request):
+        prewarm["task"] = asyncio.current_task()
+        await asyncio.sleep(3600)
+
+    async def failing_run(agent, user_input, session=None):
+        await asyncio.sleep(0)
+        raise RuntimeError("API error")
+
+    monkeypatch.setattr(director.DirectorAgent, "_create_fallback_dict_async", slow_fallback)
+    monkeypatch.setattr(director, "_run_director_streamed", failing_run)
+    monkeypatch.setattr(director, "_get_director_llm_agent", lambda: None)
+    monkeypatch.setattr(director, "SDK_AVAILABLE", True)
+
+    request = DirectorTeamProposal(workspace_id=uuid4(), requirements="Grow traffic", budget_limit=3000)
+    proposal = await director.DirectorAgent().create_team_proposal(request)
+
+    assert proposal.agents  # minimal fallback proposal
+    await asyncio.sleep(0)
+    assert prewarm["task"].cancelled()
+
+
+class _FakeStreamedRun:
+    """Minimal RunResultStreaming: text deltas, then the SDK's session save after the last turn"""
+
+    def __init__(self, deltas, session):
+        self.deltas = deltas
+        self.session = session
+        self.cancelled = False
+        self.final_output = None
+
+    async def stream_events(self):
+        from openai.types.responses import ResponseTextDeltaEvent
+
+        for delta in self.deltas:
+            await asyncio.sleep(0)
+            if self.cancelled:
+                return
+            yield SimpleNamespace(type="raw_response_event", data=ResponseTextDeltaEvent.model_construct(delta=delta))
+        if self.session is not None:
+            self.session.append("saved")
+
+    def cancel(self):
+        self.cancelled = True
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("with_session", [True, False])
+async def test_director_stream_returns_early_and_still_saves_session(monkeypatch, with_session):
+    session = [] if with_session else None
+    run = _FakeStreamedRun(['{"agents": [', '], "rationale": "r"}', " trailing", " tail"], session)
+    monkeypatch.setattr(director, "Runner", SimpleNamespace(run_streamed=lambda *a, **kw: run))
+
+    value = await director._run_director_streamed(SimpleNamespace(output_type=None), "{}", session)
+
+    assert value == {"agents": [], "rationale": "r"}
+    await asyncio.gather(*director._DIRECTOR_DRAIN_TASKS)
+    if with_session:
+        assert not run.cancelled and session == ["saved"]
+    else:
+        assert run.cancelled
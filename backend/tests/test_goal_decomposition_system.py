@@ -0,0 +1,344 @@
+# backend/tests/test_goal_decomposition_system.py
+import json
+from types import SimpleNamespace
+
+import pytest
+from pydantic import ValidationError
+
+import goal_decomposition_system as gds
+
+GOAL = {"id": "g1", "description": "Write 5 blog posts for launch", "metric_type": "deliverables", "target_value": 5}
+
+AI_RESPONSE = (
+    'Here: {"intent_analysis": {"goal_intent": "CONTENT_CREATION"}, "decomposition": '
+    '{"asset_deliverables": [{"name": "Posts", "description": "5 posts", "value_proposition": "v"}], '
+    '"thinking_components": [{"name": "Plan", "supports_deliverables": ["Posts"]}], '
+    '"user_value_score": 80, "pillar_adherence": {"user_value_focused": true}}} thanks'
+)
+
+
+class FakeProviderManager:
+    def __init__(self, response=AI_RESPONSE):
+        self.response = response
+        self.prompts = []
+
+    async def call_ai(self, provider_type, agent, prompt):
+        self.prompts.append(prompt)
+        return self.response
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache(monkeypatch):
+    cache = gds.GoalDecompositionCache(max_size=16, ttl_seconds=60)
+    monkeypatch.setattr(gds, "_DECOMPOSITION_CACHE", cache)
+    return cache
+
+
+@pytest.fixture
+def ai_provider(monkeypatch):
+    manager = FakeProviderManager()
+    monkeypatch.setattr(gds, "AI_DECOMPOSITION_AVAILABLE", True)
+    monkeypatch.setattr(gds, "ai_provider_manager", manager)
+    monkeypatch.setattr(gds, "GOAL_DECOMPOSER_AGENT_CONFIG", {"model": "m", "instructions": "i"})
+    return manager
+
+
+# ---------------------------------------------------------------------------
+# decompose_goal
+# ---------------------------------------------------------------------------
+@pytest.mark.asyncio
+async def test_decompose_goal_uses_fallback_without_ai(monkeypatch):
+    monkeypatch.setattr(gds, "AI_DECOMPOSITION_AVAILABLE", False)
+    result = await gds.GoalDecomposition().decompose_goal(GOAL)
+
+    assert result["decomposition_method"] == "fallback"
+    assert result["decomposition"]["asset_deliverables"]
+
+
+@pytest.mark.asyncio
+async def test_decompose_goal_uses_ai_and_cache(ai_provider):
+    decomposer = gds.GoalDecomposition()
+    first = await decomposer.decompose_goal(GOAL)
+    reworded = await decomposer.decompose_goal({**GOAL, "description": "  write 5 BLOG posts, for launch!"})
+
+    assert first["decomposition_method"] == "ai"
+    assert first["decomposition"]["goal_intent_classification"] == "CONTENT_CREATION"
+    assert reworded["decomposition"] == first["decomposition"]
+    assert len(ai_provider.prompts) == 1  # second goal served from cache
+
+
+@pytest.mark.asyncio
+async def test_emit_todos_matches_create_todo_structure(ai_provider, monkeypatch):
+    decomposer = gds.GoalDecomposition()
+    build_calls = []
+    original_build = decomposer._build_todo_structure
+
+    def tracking_build(*args):
+        build_calls.append(args)
+        return original_build(*args)
+
+    async def unexpected_create(*_):
+        raise AssertionError("create_todo_structure should not run on the fused path")
+
+    monkeypatch.setattr(decomposer, "_build_todo_structure", tracking_build)
+    monkeypatch.setattr(decomposer, "create_todo_structure", unexpected_create)
+    monkeypatch.setattr(gds, "create_goal_decomposer", lambda: decomposer)
+
+    result = await gds.decompose_goal_to_todos(GOAL)
+    fused = result["todo_structure"]
+
+    assert len(build_calls) == 1  # built inside _finalize_decomposition
+    assert "todo_structure" not in result["goal_decomposition"]
+    assert result["summary"]["asset_deliverables_count"] == fused["asset_count"] == 1
+
+    separate = await gds.GoalDecomposition.create_todo_structure(decomposer, result["goal_decomposition"])
+    fused.pop("created_at")
+    separate.pop("created_at")
+    assert fused == separate
+
+
+# ---------------------------------------------------------------------------
+# Batch API path
+# ---------------------------------------------------------------------------
+class FakeBatchClient:
+    """Stands in for AsyncOpenAI: records uploads and replays batch statuses"""
+
+    def __init__(self, statuses, output_lines=()):
+        self.statuses = list(statuses)
+        self.output_lines = list(output_lines)
+        self.uploaded = []
+        self.cancelled = []
+        self.retrieves = 0
+        self.usage = []
+        self.files = SimpleNamespace(create=self._files_create, content=self._files_content)
+        self.batches = SimpleNamespace(
+            create=self._batches_create, retrieve=self._batches_retrieve, cancel=self._batches_cancel
+        )
+
+    def _batch(self):
+        status = self.statuses.pop(0) if len(self.statuses) > 1 else self.statuses[0]
+        output_file_id = "out-1" if status == "completed" else None
+        return SimpleNamespace(id="batch-1", status=status, output_file_id=output_file_id)
+
+    async def _files_create(self, file, purpose):
+        self.uploaded = [json.loads(line) for line in file[1].decode("utf-8").splitlines()]
+        return SimpleNamespace(id="in-1")
+
+    async def _batches_create(self, input_file_id, endpoint, completion_window):
+        return self._batch()
+
+    async def _batches_retrieve(self, batch_id):
+        self.retrieves += 1
+        return self._batch()
+
+    async def _batches_cancel(self, batch_id):
+        self.cancelled.append(batch_id)
+
+    async def _files_content(self, file_id):
+        return SimpleNamespace(text="\n".join(self.output_lines))
+
+    def _record_usage(self, success, tokens_used=0, model="unknown", api_method="unknown", error=None):
+        self.usage.append((success, tokens_used, model, api_method))
+
+
+def _batch_line(custom_id, content, status_code=200, total_tokens=0):
+    return json.dumps({
+        "custom_id": custom_id,
+        "response": {
+            "status_code": status_code,
+            "body": {"model": "m", "usage": {"total_tokens": total_tokens}, "choices": [{"message": {"content": content}}]},
+        },
+    })
+
+
+BATCH_CONTENT = json.dumps({
+    "intent_analysis": {"goal_intent": "DATA_GATHERING"},
+    "decomposition": {
+        "asset_deliverables": [{"name": "Contacts", "description": "d", "value_proposition": "v"}],
+        "user_value_score": 75,
+        "pillar_adherence": {"user_value_focused": True},
+    },
+})
+
+
+@pytest.fixture
+def batch_client(monkeypatch, ai_provider):
+    import utils.openai_client_factory_enhanced as factory
+
+    monkeypatch.setattr(gds, "GOAL_DECOMPOSITION_BATCH_POLL_SECONDS", 0)
+
+    def install(client):
+        client.workspace_ids = []
+
+        def get_client(api_key=None, workspace_id=None):
+            client.workspace_ids.append(workspace_id)
+            return client
+
+        monkeypatch.setattr(factory, "get_enhanced_async_openai_client", get_client)
+        return client
+
+    return install
+
+
+def _goals(n):
+    return [
+        {"id": f"g{i}", "description": f"Collect contact list number {i}", "metric_type": "contacts", "target_value": 10}
+        for i in range(n)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_batch_keeps_order_and_falls_back_per_goal(batch_client, ai_provider, fresh_cache):
+    goals = _goals(4)
+    goals[1]["require_immediate"] = True
+    cached_key = gds.GoalDecompositionCache.make_key("decomposition", goals[3]["description"], "contacts", 10)
+    fresh_cache.set(cached_key, json.loads(BATCH_CONTENT)["decomposition"])
+    client = batch_client(FakeBatchClient(
+        ["validating", "in_progress", "completed"],
+        [_batch_line("goal-0", BATCH_CONTENT), "", _batch_line("goal-2", "rate limited", status_code=429)],
+    ))
+
+    results = await gds.GoalDecomposition().decompose_goals_batch(goals)
+
+    assert [r["goal_id"] for r in results] == ["g0", "g1", "g2", "g3"]
+    assert [r["decomposition_method"] for r in results] == ["ai_batch", "ai", "ai", "ai"]
+    assert [line["custom_id"] for line in client.uploaded] == ["goal-0", "goal-2"]
+    assert client.uploaded[0]["body"]["model"] == "m"
+    assert client.retrieves == 2
+    assert results[0]["decomposition"]["goal_intent_classification"] == "DATA_GATHERING"
+    assert len(ai_provider.prompts) == 2  # goal-1 (immediate) and goal-2 (failed line)
+
+
+@pytest.mark.asyncio
+async def test_batch_uses_goal_workspace_and_records_usage(batch_client, ai_provider, fresh_cache):
+    goals = _goals(2)
+    for goal in goals:
+        goal["workspace_id"] = "ws-1"
+    client = batch_client(FakeBatchClient(
+        ["completed"],
+        [_batch_line("goal-0", BATCH_CONTENT, total_tokens=120), _batch_line("goal-1", BATCH_CONTENT, total_tokens=80)],
+    ))
+
+    results = await gds.GoalDecomposition().decompose_goals_batch(goals)
+
+    assert [r["decomposition_method"] for r in results] == ["ai_batch", "ai_batch"]
+    assert client.workspace_ids == ["ws-1"]
+    assert client.usage == [
+        (True, 120, "m", "batches.chat.completions"),
+        (True, 80, "m", "batches.chat.completions"),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_batch_timeout_cancels_and_goes_realtime(batch_client, ai_provider, monkeypatch):
+    monkeypatch.setattr(gds, "GOAL_DECOMPOSITION_BATCH_MAX_WAIT_SECONDS", 0)
+    client = batch_client(FakeBatchClient(["in_progress"]))
+
+    results = await gds.GoalDecomposition().decompose_goals_batch(_goals(2))
+
+    assert client.cancelled == ["batch-1"]
+    assert [r["decomposition_method"] for r in results] == ["ai", "ai"]
+    assert len(ai_provider.prompts) == 2
+
+
+@pytest.mark.asyncio
+async def test_batch_failed_status_goes_realtime(batch_client, ai_provider):
+    batch_client(FakeBatchClient(["failed"]))
+
+    results = await gds.GoalDecomposition().decompose_goals_batch(_goals(2))
+
+    assert [r["goal_id"] for r in results] == ["g0", "g1"]
+    assert [r["decomposition_method"] for r in results] == ["ai", "ai"]
+
+
+# ---------------------------------------------------------------------------
+# Decomposition cache
+# ---------------------------------------------------------------------------
+def test_cache_key_normalizes_description():
+    make_key = gds.GoalDecompositionCache.make_key
+    key = make_key("decomposition", "Write 5 Blog posts!", "Deliverables", 5)
+
+    assert make_key("decomposition", "  write 5 blog   POSTS ", "deliverables", 5) == key
+    assert make_key("decomposition", "Write 6 blog posts", "deliverables", 5) != key
+    assert make_key("decomposition", "Write 5 blog posts", "deliverables", 6) != key
+    assert make_key("intent", "Write 5 blog posts", "deliverables", 5) != key
+
+
+def test_cache_returns_private_copies_and_evicts_lru():
+    cache = gds.GoalDecompositionCache(max_size=2, ttl_seconds=60)
+    cache.set("a", {"assets": [1]})
+    cache.set("b", {"assets": [2]})
+
+    cache.get("a")["assets"].append(99)  # caller mutation must not leak back
+    assert cache.get("a") == {"assets": [1]}
+
+    cache.set("c", {"assets": [3]})  # "b" is least recently used now
+    assert cache.get("b") is None
+    assert cache.get("a") == {"assets": [1]}
+    assert cache.get("c") == {"assets": [3]}
+
+
+def test_cache_expires_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(gds.time, "time", lambda: now[0])
+    cache = gds.GoalDecompositionCache(max_size=4, ttl_seconds=10)
+    cache.set("k", {"v": 1})
+
+    now[0] += 10
+    assert cache.get("k") == {"v": 1}
+    now[0] += 1
+    assert cache.get("k") is None
+
+
+def test_cache_disk_level_and_legacy_entries(tmp_path):
+    path = str(tmp_path / "decompositions")
+    writer = gds.GoalDecompositionCache(max_size=4, ttl_seconds=60, disk_path=path)
+    writer.set("k", {"asset_deliverables": [{"name": "a"}], "user_value_score": 80})
+    writer._get_shelf()["legacy"] = (gds.time.time(), {"asset_deliverables": []})
+    writer._shelf.close()
+
+    reader = gds.GoalDecompositionCache(max_size=4, ttl_seconds=60, disk_path=path)
+    assert reader.get("k") == {"asset_deliverables": [{"name": "a"}], "user_value_score": 80}
+    assert isinstance(reader._entries["k"][1], bytes)
+    assert reader.get("legacy") is None  # pre-serialization dict entries are misses
+    reader._shelf.close()
+
+
+# ---------------------------------------------------------------------------
+# LLM response parsing
+# ---------------------------------------------------------------------------
+def test_extract_json_finds_first_object():
+    assert gds._extract_json('{"a": 1}') == {"a": 1}
+    assert gds._extract_json('Sure:\n```json\n{"a": {"b": 2}}\n```\nDone') == {"a": {"b": 2}}
+    assert gds._extract_json('{broken} [1] then {"ok": true} {"later": 1}') == {"ok": True}
+    assert gds._extract_json("[1, 2]") is None
+    assert gds._extract_json("no json") is None
+
+
+def test_parse_decomposition_response_shapes():
+    fused = gds._parse_decomposition_response(AI_RESPONSE)
+    assert fused["goal_intent_classification"] == "CONTENT_CREATION"
+    assert fused["intent_analysis"] == {"goal_intent": "CONTENT_CREATION"}
+    assert fused["asset_deliverables"][0]["name"] == "Posts"
+
+    flat = gds._parse_decomposition_response(
+        {"asset_deliverables": [{"name": "a", "estimated_effort": "low"}], "user_value_score": "80"}
+    )
+    assert flat["goal_intent_classification"] == "HYBRID"
+    assert flat["user_value_score"] == 80  # coerced by the schema
+    assert flat["asset_deliverables"] == [{"name": "a", "estimated_effort": "low"}]  # no defaults filled in
+    assert "thinking_components" not in flat
+
+
+@pytest.mark.parametrize(
+    "response,error",
+    [
+        ('{"asset_deliverables": ["not an object"]}', ValidationError),
+        ('{"thinking_components": [{"supports_deliverables": "a"}]}', ValidationError),
+        ("no json at all", ValueError),
+        (42, TypeError),
+    ],
+)
+def test_parse_decomposition_response_rejects_malformed(response, error):
+    with pytest.raises(error):
+        gds._parse_decomposition_response(response)